@@ -0,0 +1,10 @@
+# -*- encoding: utf-8 -*-
+"""
+Name: benchmarks
+Version: 0.1
+Summary: Small benchmark scripts for the loaders, kept outside of the
+         footballpy package. Each module is run from the repository root,
+         e.g. python -m benchmarks.bench_dfl_position, and works on
+         synthetic files written to a temporary folder.
+Keywords: soccer, benchmark, loader
+"""
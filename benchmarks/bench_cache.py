@@ -0,0 +1,59 @@
+# -*- encoding: utf-8 -*-
+"""
+bench_cache: Cold against warm loads through the MatchCache.
+
+Loads a synthetic DFL and impire match once with an empty cache (parse
+and store) and then repeatedly from the cache.
+
+    python -m benchmarks.bench_cache --frames 67500
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+from __future__ import print_function
+import os
+import argparse
+import tempfile
+import footballpy.fs.loader.cache as fcache
+import footballpy.fs.loader.dfl as dfl
+import footballpy.fs.loader.impire as impire
+import benchmarks.synthetic as syn
+
+
+def main(no_frames, repeats):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = fcache.MatchCache(os.path.join(tmp_dir, 'cache'))
+        dfl_pos = os.path.join(tmp_dir, 'positions.xml')
+        syn.write_dfl_position_file(dfl_pos, no_frames)
+        impire_pos = os.path.join(tmp_dir, '123456.pos')
+        syn.write_impire_position_file(impire_pos, no_frames)
+        loaders = [
+            ('dfl sax', lambda: dfl.run(syn.DFL_MATCH_INFO, dfl_pos,
+                trace = False, cache = cache)),
+            ('dfl scan', lambda: dfl.run(syn.DFL_MATCH_INFO, dfl_pos,
+                trace = False, engine = 'scan', cache = cache)),
+            ('impire', lambda: impire.run(syn.IMPIRE_MATCH_INFO, impire_pos,
+                cache = cache)),
+        ]
+        results = []
+        for name, load in loaders:
+            cache.clear()
+            cold, _ = syn.timed(load)
+            warm = min(syn.timed(load)[0] for _ in range(repeats))
+            results.append((name, cold, warm))
+        entry_mb = cache.size() / 2.0**20
+    print('%-10s %10s %10s %10s' % ('loader', 'cold s', 'warm s', 'speedup'))
+    for name, cold, warm in results:
+        print('%-10s %10.3f %10.4f %10.0f' % (name, cold, warm, cold / warm))
+    print('impire cache entry %.1f MB' % entry_mb)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--frames', type=int, default=67500,
+            help='number of frames per half')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    main(args.frames, args.repeats)
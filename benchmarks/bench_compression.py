@@ -0,0 +1,75 @@
+# -*- encoding: utf-8 -*-
+"""
+bench_compression: Loading compressed against uncompressed match files.
+
+Writes a synthetic DFL and impire match, compresses the position files
+with gzip, bz2 and xz and loads every variant end to end. Compressed
+files are decompressed while they are parsed, the parallel engine falls
+back to the sequential scanner for them.
+
+    python -m benchmarks.bench_compression --frames 67500
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+from __future__ import print_function
+import os
+import bz2
+import gzip
+import lzma
+import shutil
+import argparse
+import tempfile
+import footballpy.fs.loader.dfl as dfl
+import footballpy.fs.loader.impire as impire
+import benchmarks.synthetic as syn
+
+formats = [
+    ('plain', '', open),
+    ('gzip', '.gz', lambda fname, mode: gzip.open(fname, mode, compresslevel = 6)),
+    ('bz2', '.bz2', bz2.open),
+    ('xz', '.xz', lzma.open),
+]
+
+
+def compress(fname, suffix, opener):
+    """Writes a compressed copy of fname and returns its path."""
+    target = fname + suffix
+    with open(fname, 'rb') as src, opener(target, 'wb') as dst:
+        shutil.copyfileobj(src, dst, 2**20)
+    return target
+
+
+def main(no_frames):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dfl_pos = os.path.join(tmp_dir, 'positions.xml')
+        syn.write_dfl_position_file(dfl_pos, no_frames)
+        impire_pos = os.path.join(tmp_dir, '123456.pos')
+        syn.write_impire_position_file(impire_pos, no_frames)
+        results = []
+        for name, suffix, opener in formats:
+            if suffix:
+                files = [compress(f, suffix, opener) for f in (dfl_pos, impire_pos)]
+            else:
+                files = [dfl_pos, impire_pos]
+            sizes = [os.path.getsize(f) / 2.0**20 for f in files]
+            times = [syn.timed(dfl.run, syn.DFL_MATCH_INFO, files[0],
+                        trace = False, engine = engine)[0]
+                    for engine in ('sax', 'scan')]
+            times.append(syn.timed(impire.run, syn.IMPIRE_MATCH_INFO, files[1])[0])
+            results.append((name, sizes, times))
+    print('%-6s %9s %9s %9s %9s %9s' % ('format', 'dfl MB', 'impire MB',
+        'dfl sax', 'dfl scan', 'impire'))
+    for name, sizes, times in results:
+        print('%-6s %9.1f %9.1f %8.2fs %8.2fs %8.2fs' % ((name,) + tuple(sizes)
+            + tuple(times)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--frames', type=int, default=67500,
+            help='number of frames per half')
+    args = parser.parse_args()
+    main(args.frames)
@@ -0,0 +1,59 @@
+# -*- encoding: utf-8 -*-
+"""
+bench_dfl_events: Bulk loading of DFL event data.
+
+Writes a season of synthetic EventData files and loads them into one
+table with get_event_table, sequentially and on all cpus. The legacy
+MatchEventParser and get_match_events, which only extract a few event
+types, are timed for reference.
+
+    python -m benchmarks.bench_dfl_events --matches 306
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+from __future__ import print_function
+import os
+import argparse
+import tempfile
+import footballpy.fs.loader.dfl as dfl
+import benchmarks.synthetic as syn
+
+
+def legacy(fnames):
+    for fname in fnames:
+        mep = dfl.MatchEventParser()
+        mep.run(fname)
+        dfl.get_match_events(fname)
+
+
+def main(no_matches, no_events):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fnames = []
+        for i in range(no_matches):
+            fnames.append(os.path.join(tmp_dir, 'events_%03d.xml' % i))
+            syn.write_dfl_event_file(fnames[-1], no_events, seed = i,
+                    match_id = 'DFL-MAT-%06d' % i)
+        size = sum(os.path.getsize(f) for f in fnames)
+        print('%d matches, %.1f MB, %d cpus' % (no_matches, size / 2.0**20,
+            os.cpu_count()))
+        results = [('legacy', syn.timed(legacy, fnames)[0], None)]
+        for processes in sorted(set([1, os.cpu_count()])):
+            secs, table = syn.timed(dfl.get_event_table, fnames, processes)
+            results.append(('table-%d' % processes, secs, table.shape))
+    print('%-10s %10s %14s' % ('loader', 'seconds', 'events/s'))
+    for name, secs, shape in results:
+        print('%-10s %10.3f %14s' % (name, secs,
+            '%.0f' % (shape[0] / secs) if shape else '-'))
+    print('table: %d rows, %d columns' % shape)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--matches', type=int, default=306)
+    parser.add_argument('--events', type=int, default=1800,
+            help='number of events per match')
+    args = parser.parse_args()
+    main(args.matches, args.events)
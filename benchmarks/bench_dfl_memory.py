@@ -0,0 +1,68 @@
+# -*- encoding: utf-8 -*-
+"""
+bench_dfl_memory: Peak memory of loading DFL position data.
+
+Every engine, and the FrameSet generator iter_frame_sets as 'stream',
+runs in a fresh interpreter such that the peak resident set
+size (ru_maxrss) belongs to a single load. The baseline is the peak after
+the imports, including pandas, and the match information parsing.
+
+    python -m benchmarks.bench_dfl_memory --frames 67500
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+from __future__ import print_function
+import os
+import sys
+import argparse
+import subprocess
+import tempfile
+import footballpy.fs.loader.dfl as dfl
+import benchmarks.synthetic as syn
+
+
+def child(engine, fname):
+    """Loads fname with engine and prints baseline and peak RSS."""
+    import pandas # imported lazily by the loaders, part of the baseline
+    mip = dfl.MatchInformationParser()
+    mip.run(syn.DFL_MATCH_INFO)
+    teams, match = mip.getTeamInformation()
+    baseline = syn.peak_rss_mb()
+    if engine == 'stream':
+        for frame_set in dfl.iter_frame_sets(fname, match, teams):
+            pass
+    else:
+        mpp = dfl.position_engines[engine](match, teams)
+        mpp.run(fname, trace = False)
+        pos_data, ball, timestamps = mpp.getPositionInformation()
+    print('RSS %.1f %.1f' % (baseline, syn.peak_rss_mb()))
+
+
+def main(no_frames):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fname = os.path.join(tmp_dir, 'positions.xml')
+        total = syn.write_dfl_position_file(fname, no_frames)
+        print('%d frames, %.1f MB' % (total, os.path.getsize(fname) / 2.0**20))
+        print('%-12s %12s %12s %12s' % ('engine', 'baseline MB', 'peak MB', 'delta MB'))
+        for engine in sorted(dfl.position_engines) + ['stream']:
+            out = subprocess.check_output([sys.executable, '-m', __spec__.name,
+                '--child', engine, fname]).decode()
+            line = [l for l in out.splitlines() if l.startswith('RSS')][0]
+            baseline, peak = [float(v) for v in line.split()[1:]]
+            print('%-12s %12.1f %12.1f %12.1f' % (engine, baseline, peak, peak - baseline))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--frames', type=int, default=67500,
+            help='number of frames per half')
+    parser.add_argument('--child', nargs=2, metavar=('ENGINE', 'FILE'),
+            help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+    else:
+        main(args.frames)
@@ -0,0 +1,63 @@
+# -*- encoding: utf-8 -*-
+"""
+bench_dfl_parallel: Scaling of the parallel DFL position parser.
+
+Loads a synthetic ObservedPositionalData file with the single process
+scanner and with MatchPositionParallelParser for an increasing number
+of processes up to the number of cpus.
+
+    python -m benchmarks.bench_dfl_parallel --frames 67500
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+from __future__ import print_function
+import os
+import argparse
+import tempfile
+import footballpy.fs.loader.dfl as dfl
+import benchmarks.synthetic as syn
+
+
+def load(parser, fname):
+    parser.run(fname, trace = False)
+    return parser.getPositionInformation()
+
+
+def main(no_frames, max_processes):
+    mip = dfl.MatchInformationParser()
+    mip.run(syn.DFL_MATCH_INFO)
+    teams, match = mip.getTeamInformation()
+    processes = [1]
+    while processes[-1] * 2 <= max_processes:
+        processes.append(processes[-1] * 2)
+    if processes[-1] != max_processes:
+        processes.append(max_processes)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fname = os.path.join(tmp_dir, 'positions.xml')
+        total = syn.write_dfl_position_file(fname, no_frames)
+        print('%d frames, %.1f MB, %d cpus' % (total,
+            os.path.getsize(fname) / 2.0**20, os.cpu_count()))
+        index_secs, index = syn.timed(dfl.index_frame_sets, fname)
+        print('index of %d FrameSets %.3f s' % (len(index), index_secs))
+        scan, _ = syn.timed(load, dfl.MatchPositionScanner(match, teams), fname)
+        results = [('scan', scan)]
+        for no_proc in processes:
+            secs, _ = syn.timed(load, dfl.MatchPositionParallelParser(
+                match, teams, no_proc), fname)
+            results.append(('parallel-%d' % no_proc, secs))
+    print('%-14s %10s %14s %10s' % ('engine', 'seconds', 'frames/s', 'speedup'))
+    for name, secs in results:
+        print('%-14s %10.3f %14.0f %10.2f' % (name, secs, total / secs, scan / secs))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--frames', type=int, default=67500,
+            help='number of frames per half')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(),
+            help='maximum number of processes')
+    args = parser.parse_args()
+    main(args.frames, args.processes)
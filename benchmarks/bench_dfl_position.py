@@ -0,0 +1,54 @@
+# -*- encoding: utf-8 -*-
+"""
+bench_dfl_position: Compares the DFL position data engines.
+
+Writes a synthetic ObservedPositionalData file and reports the
+throughput in frames per second for each engine in dfl.position_engines.
+
+    python -m benchmarks.bench_dfl_position --frames 20000
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+from __future__ import print_function
+import os
+import argparse
+import tempfile
+import footballpy.fs.loader.dfl as dfl
+import benchmarks.synthetic as syn
+
+
+def run_engine(engine, fname, match, teams):
+    """Loads fname with the given engine."""
+    mpp = dfl.position_engines[engine](match, teams)
+    mpp.run(fname, trace = False)
+    return mpp.getPositionInformation()
+
+
+def main(no_frames, repeats):
+    mip = dfl.MatchInformationParser()
+    mip.run(syn.DFL_MATCH_INFO)
+    teams, match = mip.getTeamInformation()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fname = os.path.join(tmp_dir, 'positions.xml')
+        total = syn.write_dfl_position_file(fname, no_frames)
+        print('%d frames, %.1f MB' % (total, os.path.getsize(fname) / 2.0**20))
+        results = []
+        for engine in sorted(dfl.position_engines):
+            secs = min(syn.timed(run_engine, engine, fname, match, teams)[0]
+                    for _ in range(repeats))
+            results.append((engine, secs, total / secs))
+    print('%-12s %10s %14s' % ('engine', 'seconds', 'frames/s'))
+    for engine, secs, fps in results:
+        print('%-12s %10.3f %14.0f' % (engine, secs, fps))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--frames', type=int, default=20000,
+            help='number of frames per half')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    main(args.frames, args.repeats)
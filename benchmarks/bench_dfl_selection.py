@@ -0,0 +1,58 @@
+# -*- encoding: utf-8 -*-
+"""
+bench_dfl_selection: Selective against full DFL position loading.
+
+Compares a full load with get_position_selection for a single player,
+a single team half and a short frame window around a shot.
+
+    python -m benchmarks.bench_dfl_selection --frames 67500
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+from __future__ import print_function
+import os
+import argparse
+import tempfile
+import footballpy.fs.loader.dfl as dfl
+import benchmarks.synthetic as syn
+
+
+def count_frames(result):
+    """Number of loaded player and ball frames."""
+    pos_data, ball, _ = result
+    no_frames = sum(p[1].shape[0] for team in pos_data.values()
+            for half in team.values() for p in half)
+    return no_frames + sum(b.shape[0] for b in ball if not isinstance(b, int))
+
+
+def main(no_frames):
+    mip = dfl.MatchInformationParser()
+    mip.run(syn.DFL_MATCH_INFO)
+    teams, match = mip.getTeamInformation()
+    selections = [
+        ('full', {}),
+        ('one player', dict(person_ids = ['DFL-OBJ-a00003'], ball = False)),
+        ('guest 2nd half', dict(team_role = 'guest', game_section = 'secondHalf')),
+        ('10s window', dict(game_section = 'secondHalf',
+            frames = (100000 + no_frames // 2, 100000 + no_frames // 2 + 250))),
+    ]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fname = os.path.join(tmp_dir, 'positions.xml')
+        total = syn.write_dfl_position_file(fname, no_frames)
+        print('%d frames, %.1f MB' % (total, os.path.getsize(fname) / 2.0**20))
+        print('%-16s %10s %12s' % ('selection', 'seconds', 'frames'))
+        for name, kwargs in selections:
+            secs, res = syn.timed(dfl.get_position_selection, fname,
+                    match, teams, **kwargs)
+            print('%-16s %10.3f %12d' % (name, secs, count_frames(res)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--frames', type=int, default=67500,
+            help='number of frames per half')
+    args = parser.parse_args()
+    main(args.frames)
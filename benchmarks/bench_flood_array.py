@@ -0,0 +1,96 @@
+# -*- encoding: utf-8 -*-
+"""
+bench_flood_array: Appending rows to the growing buffers.
+
+Appends the rows of a match row by row and in blocks of one second to
+FloodArray and FloodColumns and compares them with the former FloodArray,
+which grew by 1000 rows with an in-place resize and copied on every data
+call. The data call is timed after every block as a live consumer would.
+
+    python -m benchmarks.bench_flood_array --frames 135000
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+from __future__ import print_function
+import argparse
+import numpy as np
+import footballpy.fs.loader.flood_array as fa
+import benchmarks.synthetic as syn
+
+
+class LegacyFloodArray(object):
+    """The former single_frame_parser.FloodArray for reference.
+
+    The former one did not update max_rows and failed on the second
+    expansion, which is fixed here.
+    """
+
+    def __init__(self, max_rows=10000, no_cols=4, expand_step=1000):
+        self.max_rows = max_rows
+        self.expand = expand_step
+        self.array = -13 * np.ones((max_rows, no_cols))
+        self.current_row = 0
+
+    def push(self, data):
+        if self.current_row + 2 == self.max_rows:
+            no_rows, no_cols = self.array.shape
+            self.array.resize((no_rows + self.expand, no_cols), refcheck=False)
+            self.max_rows += self.expand
+        self.array[self.current_row,:] = data
+        self.current_row += 1
+
+    def data(self):
+        return self.array[:self.current_row,:].copy()
+
+
+def push_rows(buf, rows):
+    for row in rows:
+        buf.push(row)
+    return buf
+
+
+def push_blocks(buf, rows, block, columns = False):
+    for i in range(0, len(rows), block):
+        if columns:
+            buf.extend(rows[i:i+block, 0].astype(np.int32), rows[i:i+block, 1:])
+        else:
+            buf.extend(rows[i:i+block])
+    return buf
+
+
+def read_blocks(buf, rows, block):
+    for i in range(0, len(rows), block):
+        for row in rows[i:i+block]:
+            buf.push(row)
+        buf.data()
+
+
+def main(no_frames, block):
+    rows = np.random.RandomState(0).uniform(0.0, 100.0, (no_frames, 4))
+    rows[:, 0] = np.arange(no_frames)
+    columns = [('frame', np.int32), ('xy', np.float64, (3,))]
+    results = [
+        ('legacy-push', syn.timed(push_rows, LegacyFloodArray(), rows)[0]),
+        ('push', syn.timed(push_rows, fa.FloodArray(), rows)[0]),
+        ('extend', syn.timed(push_blocks, fa.FloodArray(), rows, block)[0]),
+        ('columns', syn.timed(push_blocks, fa.FloodColumns(columns), rows,
+            block, True)[0]),
+        ('legacy-live', syn.timed(read_blocks, LegacyFloodArray(), rows, block)[0]),
+        ('live', syn.timed(read_blocks, fa.FloodArray(), rows, block)[0]),
+    ]
+    print('%d rows, blocks of %d rows' % (no_frames, block))
+    print('%-12s %10s %12s' % ('buffer', 'seconds', 'rows/s'))
+    for name, secs in results:
+        print('%-12s %10.3f %12.0f' % (name, secs, no_frames / secs))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--frames', type=int, default=135000)
+    parser.add_argument('--block', type=int, default=25,
+            help='rows per extend call')
+    args = parser.parse_args()
+    main(args.frames, args.block)
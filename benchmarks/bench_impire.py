@@ -0,0 +1,67 @@
+# -*- encoding: utf-8 -*-
+"""
+bench_impire: Conversion speed of impire position files.
+
+Writes a synthetic impire .pos file and reads it with the block
+converter, once for a regular file and once for a file where a home
+player is missing after three quarters of the match, like after a
+red card. Only the block with both layouts goes through the general
+tokenizer. The regular file is additionally converted in a process
+pool with all cpus and with the referees.
+
+    python -m benchmarks.bench_impire --frames 67500
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+from __future__ import print_function
+import os
+import argparse
+import tempfile
+import footballpy.fs.loader.impire as impire
+import benchmarks.synthetic as syn
+
+
+def drop_player(fname):
+    """Removes the first home player from the last quarter of fname."""
+    with open(fname, 'rb') as fid:
+        lines = fid.read().split(b'\n')
+    for i in range(3 * len(lines) // 4, len(lines) - 1):
+        sections = lines[i].split(b'#')
+        sections[1] = sections[1].split(b';', 1)[1]
+        lines[i] = b'#'.join(sections)
+    with open(fname, 'wb') as fid:
+        fid.write(b'\n'.join(lines))
+
+
+def main(no_frames, repeats):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fname = os.path.join(tmp_dir, '123456.pos')
+        syn.write_impire_position_file(fname, no_frames)
+        size = os.path.getsize(fname) / 2.0**20
+        results = []
+        for name, processes, referees in (('regular', 1, False),
+                ('regular', os.cpu_count(), False), ('referees', 1, True),
+                ('irregular', 1, False)):
+            if name == 'irregular':
+                drop_player(fname)
+            secs = min(syn.timed(impire.parse_position_file, fname,
+                processes = processes, referees = referees)[0]
+                for _ in range(repeats))
+            results.append(('%s-%d' % (name, processes), secs))
+    print('%d frames, %.1f MB, %d cpus' % (2 * no_frames, size, os.cpu_count()))
+    print('%-12s %10s %10s %12s' % ('file', 'seconds', 'MB/s', 'frames/s'))
+    for name, secs in results:
+        print('%-12s %10.3f %10.1f %12.0f' % (name, secs, size / secs,
+            2 * no_frames / secs))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--frames', type=int, default=67500,
+            help='number of frames per half')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    main(args.frames, args.repeats)
@@ -0,0 +1,61 @@
+# -*- encoding: utf-8 -*-
+"""
+bench_impire_grouping: Grouping impire position data by player.
+
+Times split, sort and combine on the arrays of read_in_position_data
+and the grouping of CompactPositions used by load_match, compared to
+converting the position file.
+
+    python -m benchmarks.bench_impire_grouping --frames 67500
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+from __future__ import print_function
+import os
+import argparse
+import tempfile
+import footballpy.fs.loader.impire as impire
+import benchmarks.synthetic as syn
+
+
+def group_arrays(arrays, teams):
+    home, guest, ball, half_time_id = arrays
+    for team, role in ((home, 'home'), (guest, 'guest')):
+        lookup = impire.trikot_lookup(teams[role])
+        for half in impire.split_positions_into_game_halves(team, half_time_id, ball):
+            impire.combine_position_with_role(impire.sort_position_data(half),
+                    teams[role], lookup)
+
+
+def group_compact(data):
+    for role in data.roles:
+        for half in (1, 2):
+            data.player_positions(role, half)
+
+
+def main(no_frames):
+    mip = impire.MatchInformationParser()
+    mip.run(syn.IMPIRE_MATCH_INFO)
+    teams, match = mip.getTeamInformation()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fname = os.path.join(tmp_dir, '123456.pos')
+        syn.write_impire_position_file(fname, no_frames)
+        parse, arrays = syn.timed(impire.read_in_position_data, fname)
+        parse_compact, data = syn.timed(impire.read_compact_position_data, fname)
+    results = [('arrays', parse, syn.timed(group_arrays, arrays, teams)[0]),
+            ('compact', parse_compact, syn.timed(group_compact, data)[0])]
+    print('%d frames' % (2 * no_frames))
+    print('%-10s %10s %10s %10s' % ('data', 'parse s', 'group s', 'group %'))
+    for name, secs, group in results:
+        print('%-10s %10.3f %10.3f %10.1f' % (name, secs, group, 100 * group / secs))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--frames', type=int, default=67500,
+            help='number of frames per half')
+    args = parser.parse_args()
+    main(args.frames)
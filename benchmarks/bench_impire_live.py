@@ -0,0 +1,63 @@
+# -*- encoding: utf-8 -*-
+"""
+bench_impire_live: Latency of following a growing impire position file.
+
+Writes a synthetic match, then replays it into a second file in
+batches like a live feed and polls a PositionFollower after every
+batch. Reports the time of a poll and of reading the ring buffer
+against the number of frames already in the match.
+
+    python -m benchmarks.bench_impire_live --frames 67500 --batch 25
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+from __future__ import print_function
+import os
+import argparse
+import tempfile
+import numpy as np
+import footballpy.fs.loader.impire as impire
+import benchmarks.synthetic as syn
+
+
+def main(no_frames, batch, window):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, 'source.pos')
+        syn.write_impire_position_file(source, no_frames)
+        with open(source, 'rb') as fid:
+            lines = fid.read().splitlines(True)
+        fname = os.path.join(tmp_dir, '123456.pos')
+        follower = impire.PositionFollower(fname, window = window)
+        polls, reads, sizes = [], [], []
+        with open(fname, 'wb') as out:
+            for start in range(0, len(lines), batch):
+                out.write(b''.join(lines[start:start + batch]))
+                out.flush()
+                polls.append(syn.timed(follower.poll)[0])
+                reads.append(syn.timed(follower.latest)[0])
+                sizes.append(follower.frames)
+        full = syn.timed(impire.read_in_position_data, fname)[0]
+    polls, reads, sizes = np.array(polls), np.array(reads), np.array(sizes)
+    print('%d frames in batches of %d, %.0f s window' % (len(lines), batch, window))
+    print('%-16s %10s %10s %10s' % ('frames in match', 'poll ms', 'p99 ms', 'latest ms'))
+    for lo, hi in ((0, 0.1), (0.45, 0.55), (0.9, 1.0)):
+        sel = (sizes > lo * len(lines)) & (sizes <= hi * len(lines))
+        print('%-16s %10.3f %10.3f %10.3f' % ('%d-%d%%' % (100 * lo, 100 * hi),
+            1e3 * polls[sel].mean(), 1e3 * np.percentile(polls[sel], 99),
+            1e3 * reads[sel].mean()))
+    print('full re-read of the final file %.1f ms' % (1e3 * full))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--frames', type=int, default=67500,
+            help='number of frames per half')
+    parser.add_argument('--batch', type=int, default=25,
+            help='number of frames appended between two polls')
+    parser.add_argument('--window', type=float, default=60.0,
+            help='ring buffer length in seconds')
+    args = parser.parse_args()
+    main(args.frames, args.batch, args.window)
@@ -0,0 +1,99 @@
+# -*- encoding: utf-8 -*-
+"""
+bench_impire_memory: Memory of loading impire position data.
+
+Compares the float64 arrays of read_in_position_data with the
+CompactPositions of read_compact_position_data, and the per player
+match data built the legacy way (split, sort and combine the float64
+arrays) with load_match, which builds it from CompactPositions. Every
+variant runs in a fresh interpreter such that the peak resident set size
+belongs to a single load.
+
+    python -m benchmarks.bench_impire_memory --frames 67500
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+from __future__ import print_function
+import os
+import sys
+import argparse
+import subprocess
+import tempfile
+import numpy as np
+import footballpy.fs.loader.impire as impire
+import benchmarks.synthetic as syn
+
+variants = ['arrays', 'compact', 'legacy match', 'match']
+
+
+def legacy_match(fname, teams):
+    """Per player data as built before CompactPositions."""
+    home, guest, ball, half_time_id = impire.read_in_position_data(fname)
+    res = []
+    for team, role in ((home, 'home'), (guest, 'guest')):
+        periods = impire.split_positions_into_game_halves(team, half_time_id, ball)
+        res.append([impire.combine_position_with_role(
+            impire.sort_position_data(p), teams[role]) for p in periods])
+    res.append([ball[half_time_id == 1], ball[half_time_id == 2]])
+    return res
+
+
+def result_bytes(obj):
+    """Bytes of all numpy arrays in a nested structure."""
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, impire.CompactPositions):
+        return obj.nbytes
+    if isinstance(obj, (list, tuple)):
+        return sum(result_bytes(o) for o in obj)
+    if isinstance(obj, dict):
+        return sum(result_bytes(o) for o in obj.values())
+    return 0
+
+
+def child(variant, fname):
+    """Loads fname and prints baseline RSS, peak RSS and result size."""
+    mip = impire.MatchInformationParser()
+    mip.run(syn.IMPIRE_MATCH_INFO)
+    teams, match = mip.getTeamInformation()
+    baseline = syn.peak_rss_mb()
+    if variant == 'arrays':
+        res = impire.read_in_position_data(fname)
+    elif variant == 'compact':
+        res = impire.read_compact_position_data(fname)
+    elif variant == 'legacy match':
+        res = legacy_match(fname, teams)
+    else:
+        res = impire.load_match(syn.IMPIRE_MATCH_INFO, fname)[:2]
+    print('RSS %.1f %.1f %.1f' % (baseline, syn.peak_rss_mb(),
+        result_bytes(res) / 2.0**20))
+
+
+def main(no_frames):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fname = os.path.join(tmp_dir, '123456.pos')
+        total = syn.write_impire_position_file(fname, no_frames)
+        print('%d frames, %.1f MB' % (total, os.path.getsize(fname) / 2.0**20))
+        print('%-14s %12s %12s' % ('variant', 'result MB', 'peak MB'))
+        for variant in variants:
+            out = subprocess.check_output([sys.executable, '-m', __spec__.name,
+                '--child', variant, fname]).decode()
+            line = [l for l in out.splitlines() if l.startswith('RSS')][0]
+            baseline, peak, result = [float(v) for v in line.split()[1:]]
+            print('%-14s %12.1f %12.1f' % (variant, result, peak - baseline))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--frames', type=int, default=67500,
+            help='number of frames per half')
+    parser.add_argument('--child', nargs=2, metavar=('VARIANT', 'FILE'),
+            help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+    else:
+        main(args.frames)
@@ -0,0 +1,54 @@
+# -*- encoding: utf-8 -*-
+"""
+bench_impire_normalize: Rescaling and frame re-indexing of impire data.
+
+Loads a synthetic match and times rescale_xy_positions followed by
+increase_frame_counter against normalize_positions, in place on the
+blocks of load_match and as a copy.
+
+    python -m benchmarks.bench_impire_normalize --frames 67500
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+from __future__ import print_function
+import os
+import argparse
+import tempfile
+import footballpy.fs.loader.impire as impire
+import benchmarks.synthetic as syn
+
+
+def two_stages(pos_data, ball, stadium):
+    return impire.increase_frame_counter(*impire.rescale_xy_positions(
+        pos_data, ball, **stadium))
+
+
+def main(no_frames, repeats):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fname = os.path.join(tmp_dir, '123456.pos')
+        syn.write_impire_position_file(fname, no_frames)
+        pos_data, ball, match, teams = impire.run(syn.IMPIRE_MATCH_INFO, fname)
+    stadium = match['stadium']
+    variants = [
+        ('two stages', lambda: two_stages(pos_data, ball, stadium)),
+        ('fused', lambda: impire.normalize_positions(pos_data, ball, **stadium)),
+        ('fused copy', lambda: impire.normalize_positions(pos_data, ball,
+            copy = True, **stadium)),
+    ]
+    print('%d frames' % (2 * no_frames))
+    print('%-12s %10s' % ('variant', 'ms'))
+    for name, fun in variants:
+        secs = min(syn.timed(fun)[0] for _ in range(repeats))
+        print('%-12s %10.2f' % (name, 1e3 * secs))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--frames', type=int, default=67500,
+            help='number of frames per half')
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+    main(args.frames, args.repeats)
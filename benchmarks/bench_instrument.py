@@ -0,0 +1,64 @@
+# -*- encoding: utf-8 -*-
+"""
+bench_instrument: Overhead of the loader instrumentation.
+
+Loads a synthetic DFL position file with every engine without recorder,
+with a Recorder and with a Recorder with a progress callback and prints
+the stage records of the last load.
+
+    python -m benchmarks.bench_instrument --frames 20000
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+from __future__ import print_function
+import os
+import argparse
+import tempfile
+import footballpy.fs.instrument as instrument
+import footballpy.fs.loader.dfl as dfl
+import benchmarks.synthetic as syn
+
+
+def load(engine, fname, match, teams, recorder):
+    if recorder is None:
+        mpp = dfl.position_engines[engine](match, teams)
+        mpp.run(fname, trace = False)
+        return
+    with recorder:
+        mpp = dfl.position_engines[engine](match, teams)
+        mpp.run(fname, trace = False)
+
+
+def main(no_frames, repeats):
+    mip = dfl.MatchInformationParser()
+    mip.run(syn.DFL_MATCH_INFO)
+    teams, match = mip.getTeamInformation()
+    events = []
+    modes = [('off', lambda: None),
+             ('recorder', instrument.Recorder),
+             ('callback', lambda: instrument.Recorder(events.append))]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fname = os.path.join(tmp_dir, 'positions.xml')
+        syn.write_dfl_position_file(fname, no_frames)
+        print('%-12s %-10s %10s' % ('engine', 'mode', 'seconds'))
+        for engine in sorted(dfl.position_engines):
+            for mode, make in modes:
+                secs = min(syn.timed(load, engine, fname, match, teams, make())[0]
+                        for _ in range(repeats))
+                print('%-12s %-10s %10.3f' % (engine, mode, secs))
+        with instrument.Recorder() as rec:
+            dfl.run(syn.DFL_MATCH_INFO, fname, trace = False, engine = 'scan')
+    for record in rec.stages:
+        print(record)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--frames', type=int, default=20000,
+            help='number of frames per half')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    main(args.frames, args.repeats)
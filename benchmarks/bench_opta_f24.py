@@ -0,0 +1,97 @@
+# -*- encoding: utf-8 -*-
+"""
+bench_opta_f24: Loading the passes and shots of Opta F24 files.
+
+Writes synthetic F24 files and extracts the parse_* dictionaries of the
+passes, misses, posts, attempts and goals in three ways: the former
+element functions with one XPath per qualifier lookup, the element
+functions as they are now and the single pass EventTable. The table
+alone, without records, is timed as well.
+
+    python -m benchmarks.bench_opta_f24 --matches 10
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+from __future__ import print_function
+import os
+import argparse
+import tempfile
+import footballpy.fs.loader.opta_f24 as f24
+import benchmarks.synthetic as syn
+
+_parsers = {'pass': f24.parse_pass, 'miss': f24.parse_miss,
+        'post': f24.parse_post, 'attempt': f24.parse_attempt,
+        'goal': f24.parse_goal}
+
+
+def xpath_q_value(el, id):
+    return el.xpath('./Q[@qualifier_id="{0}"]'.format(id))[0].get('value')
+
+
+def xpath_q_present(el, id):
+    return len(el.xpath('./Q[@qualifier_id="{0}"]'.format(id))) > 0
+
+
+def elements(fnames):
+    res = []
+    for fname in fnames:
+        root = f24.read_f24(fname)
+        for name, parse in sorted(_parsers.items()):
+            res.extend(parse(ev) for ev in
+                    f24.get_events(root, f24.event_specs[name][0]))
+    return res
+
+
+def legacy(fnames):
+    """elements with the former XPath qualifier lookups."""
+    found = f24.get_q_value, f24.check_q_element_present
+    f24.get_q_value, f24.check_q_element_present = xpath_q_value, xpath_q_present
+    try:
+        return elements(fnames)
+    finally:
+        f24.get_q_value, f24.check_q_element_present = found
+
+
+def table(fnames):
+    res = []
+    for fname in fnames:
+        events = f24.read_event_table(fname)
+        for name in sorted(_parsers):
+            res.extend(events.records(name))
+    return res
+
+
+def main(no_matches, no_events):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fnames = []
+        for i in range(no_matches):
+            fnames.append(os.path.join(tmp_dir, 'f24-22-2016-%d-eventdetails.xml' % i))
+            syn.write_f24_file(fnames[-1], no_events, seed = i, game_id = i)
+        size = sum(os.path.getsize(f) for f in fnames)
+        print('%d matches, %.1f MB' % (no_matches, size / 2.0**20))
+        results = []
+        for name, fun in (('xpath', legacy), ('elements', elements),
+                ('table', table)):
+            secs, res = syn.timed(fun, fnames)
+            results.append((name, secs, len(res)))
+            if name != 'xpath':
+                assert res == expected, name
+            expected = res
+        secs = syn.timed(lambda: [f24.read_event_table(f) for f in fnames])[0]
+        results.append(('table only', secs, no_matches * no_events))
+    print('%-12s %10s %10s %12s' % ('loader', 'seconds', 'records', 'records/s'))
+    for name, secs, no_records in results:
+        print('%-12s %10.3f %10d %12.0f' % (name, secs, no_records,
+            no_records / secs))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--matches', type=int, default=10)
+    parser.add_argument('--events', type=int, default=1700,
+            help='number of events per match')
+    args = parser.parse_args()
+    main(args.matches, args.events)
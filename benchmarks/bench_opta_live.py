@@ -0,0 +1,69 @@
+# -*- encoding: utf-8 -*-
+"""
+bench_opta_live: Refresh latency for an Opta F24 file delivered live.
+
+Writes a synthetic match and delivers it again and again with a batch
+of further events, correcting the version of a few earlier events each
+time like the live feed does. After every delivery an EventFollower is
+refreshed and, for reference, the whole file read with read_event_table.
+Reports both against the number of events already in the match.
+
+    python -m benchmarks.bench_opta_live --events 1700 --batch 20
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+from __future__ import print_function
+import os
+import re
+import argparse
+import tempfile
+import numpy as np
+import footballpy.fs.loader.opta_f24 as f24
+import benchmarks.synthetic as syn
+
+
+def main(no_events, batch, no_changes):
+    rng = np.random.RandomState(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, 'source.xml')
+        syn.write_f24_file(source, no_events)
+        with open(source, 'rb') as fid:
+            data = fid.read()
+        events = [m.group(0) for m in re.finditer(
+            rb'    <Event\b[^>]*?(?:/>|>.*?</Event>)\n', data, re.DOTALL)]
+        head = data[:data.index(events[0])]
+        tail = data[data.index(events[-1]) + len(events[-1]):]
+        fname = os.path.join(tmp_dir, 'f24-22-2016-123456-eventdetails.xml')
+        follower = f24.EventFollower(fname)
+        sizes, refreshs, full = [], [], []
+        for stop in range(batch, no_events + 1, batch):
+            for k in rng.randint(0, stop, no_changes):
+                events[k] = re.sub(rb'version="(\d+)"', lambda m: b'version="%d"'
+                        % (int(m.group(1)) + 1), events[k])
+            with open(fname, 'wb') as fid:
+                fid.write(head + b''.join(events[:stop]) + tail)
+            refreshs.append(syn.timed(follower.refresh)[0])
+            full.append(syn.timed(f24.read_event_table, fname)[0])
+            sizes.append(stop)
+    refreshs, full, sizes = np.array(refreshs), np.array(full), np.array(sizes)
+    print('%d events in batches of %d, %d corrections per delivery' % (
+        no_events, batch, no_changes))
+    print('%-16s %12s %12s' % ('events in match', 'refresh ms', 'full ms'))
+    for lo, hi in ((0, 0.1), (0.45, 0.55), (0.9, 1.0)):
+        sel = (sizes > lo * no_events) & (sizes <= hi * no_events)
+        print('%-16s %12.2f %12.2f' % ('%d-%d%%' % (100 * lo, 100 * hi),
+            1e3 * refreshs[sel].mean(), 1e3 * full[sel].mean()))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--events', type=int, default=1700)
+    parser.add_argument('--batch', type=int, default=20,
+            help='number of events added per delivery')
+    parser.add_argument('--changes', type=int, default=2,
+            help='number of corrected events per delivery')
+    args = parser.parse_args()
+    main(args.events, args.batch, args.changes)
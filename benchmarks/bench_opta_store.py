@@ -0,0 +1,76 @@
+# -*- encoding: utf-8 -*-
+"""
+bench_opta_store: Ingesting a season of Opta F24 files into an EventStore.
+
+Writes synthetic F24 files, ingests them sequentially and on all cpus
+and compares the size of the store with the xml files. A filter, the
+passes of one team with qualifier 2, is answered from the store and,
+for reference, by parsing all files again with read_event_table.
+
+    python -m benchmarks.bench_opta_store --matches 306
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+from __future__ import print_function
+import os
+import argparse
+import tempfile
+import footballpy.fs.loader.opta_f24 as f24
+import benchmarks.synthetic as syn
+
+
+def reparse(fnames):
+    res = 0
+    for fname in fnames:
+        table = f24.read_event_table(fname)
+        mask = (table.of_type(1) & table.has_qualifier(2) &
+                (table.events['team'] == '100').to_numpy())
+        res += mask.sum()
+    return res
+
+
+def query(directory):
+    store = f24.EventStore(directory)
+    return store.frame(store.select(type_id = 1, team = '100', qualifier = 2))
+
+
+def main(no_matches, no_events):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, 'season')
+        os.makedirs(source)
+        fnames = []
+        for i in range(no_matches):
+            fnames.append(os.path.join(source, 'f24-22-2016-%d-eventdetails.xml' % i))
+            syn.write_f24_file(fnames[-1], no_events, seed = i, game_id = i)
+        size = sum(os.path.getsize(f) for f in fnames)
+        print('%d matches, %d events, %.1f MB xml, %d cpus' % (no_matches,
+            no_matches * no_events, size / 2.0**20, os.cpu_count()))
+        results = []
+        for processes in sorted(set([1, os.cpu_count()])):
+            target = os.path.join(tmp_dir, 'store-%d' % processes)
+            secs = syn.timed(f24.ingest_f24_files, source, target, processes)[0]
+            results.append(('ingest-%d' % processes, secs))
+        store_size = sum(os.path.getsize(os.path.join(target, f))
+                for f in os.listdir(target))
+        secs, frame = syn.timed(query, target)
+        results.append(('query', secs))
+        secs, count = syn.timed(reparse, fnames)
+        results.append(('reparse', secs))
+        assert count == len(frame)
+    print('%-10s %10s %12s' % ('step', 'seconds', 'matches/s'))
+    for name, secs in results:
+        print('%-10s %10.3f %12.0f' % (name, secs, no_matches / secs))
+    print('store %.1f MB, %d passes of team 100 with qualifier 2'
+            % (store_size / 2.0**20, len(frame)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--matches', type=int, default=306)
+    parser.add_argument('--events', type=int, default=1700,
+            help='number of events per match')
+    args = parser.parse_args()
+    main(args.matches, args.events)
@@ -0,0 +1,122 @@
+# -*- encoding: utf-8 -*-
+"""
+bench_papi: Time and memory of building the position DataFrame.
+
+Builds synthetic position data of a match in memory, two halves with
+eleven players per team of which three are substituted during the 2nd
+half, and converts it with pos_data_to_df and, for reference, with the former
+per player DataFrames joined by pd.concat. Every variant runs in a fresh
+interpreter such that the peak resident set size belongs to a single
+conversion.
+
+    python -m benchmarks.bench_papi --frames 67500
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+from __future__ import print_function
+import sys
+import argparse
+import subprocess
+import numpy as np
+import pandas as pd
+import footballpy.fs.loader.papi as papi
+import benchmarks.synthetic as syn
+
+variants = ['legacy', 'block']
+
+
+def legacy_pos_data_to_df(pos_data, ball_data, half_tresh = 100000):
+    """Former pos_data_to_df, np.int replaced by int."""
+    def util_1(dataset):
+        return pd.concat([pd.DataFrame(player[1][:, 1:],
+            index = player[1][:, 0].astype(int),
+            columns = [player[0] + '_x', player[0] + '_y'])
+            for player in dataset], axis=1)
+
+    def util_2(team):
+        return pd.concat([util_1(pos_data[team]['1st']),
+            util_1(pos_data[team]['2nd'])], sort=False)
+
+    def util_ball(ball):
+        ball_df = pd.DataFrame(ball[:, [1, 2, 4, 5]],
+                columns = ['ball_x', 'ball_y', 'possession', 'game_state'],
+                index = ball[:, 0].astype(int))
+        ball_df['possession'] = ball_df['possession'].astype(int)
+        ball_df['game_state'] = ball_df['game_state'].astype(int)
+        return ball_df
+
+    home_df = util_2('home')
+    guest_df = util_2('guest')
+    guest_df['half'] = (guest_df.index >= half_tresh) + 1
+    player_df = pd.concat([home_df, guest_df], axis=1)
+    ball_df = pd.concat([util_ball(ball_data[0]), util_ball(ball_data[1])])
+    return pd.concat([player_df, ball_df], axis=1)
+
+
+def make_pos_data(no_frames, seed = 0):
+    """Position data of a match with no_frames frames per half."""
+    rng = np.random.RandomState(seed)
+    pos_data = {}
+    ball_data = []
+    for first in (10000, 100000):
+        frames = np.arange(first, first + no_frames, dtype = np.float32)
+        ball = np.column_stack([frames, rng.uniform(-50, 50, (no_frames, 3)),
+            rng.randint(1, 3, no_frames), rng.randint(0, 2, no_frames)])
+        ball_data.append(ball.astype(np.float32))
+    for team, base in (('home', 'DFL-OBJ-a'), ('guest', 'DFL-OBJ-b')):
+        pos_data[team] = {}
+        for half, first in (('1st', 10000), ('2nd', 100000)):
+            spans = [(i, 0, no_frames) for i in range(11)]
+            if half == '2nd':
+                # three substitutions during the 2nd half
+                for i in range(8, 11):
+                    change = rng.randint(1, no_frames)
+                    spans[i] = (i, 0, change)
+                    spans.append((i + 3, change, no_frames))
+            players = []
+            for pid, start, stop in spans:
+                frames = np.arange(first + start, first + stop, dtype = np.float32)
+                data = np.column_stack([frames, rng.uniform(-50, 50,
+                    (stop - start, 2))]).astype(np.float32)
+                players.append(('%s%05d' % (base, pid), data))
+            pos_data[team][half] = players
+    return pos_data, ball_data
+
+
+def child(variant, no_frames):
+    """Converts the data and prints seconds, baseline and peak RSS."""
+    pos_data, ball_data = make_pos_data(no_frames)
+    baseline = syn.peak_rss_mb()
+    fun = legacy_pos_data_to_df if variant == 'legacy' else papi.pos_data_to_df
+    secs, df = syn.timed(fun, pos_data, ball_data)
+    print('RSS %.3f %.1f %.1f %.1f' % (secs, baseline, syn.peak_rss_mb(),
+        df.memory_usage().sum() / 2.0**20))
+
+
+def main(no_frames):
+    pos_data, ball_data = make_pos_data(min(no_frames, 1000))
+    pd.testing.assert_frame_equal(papi.pos_data_to_df(pos_data, ball_data),
+            legacy_pos_data_to_df(pos_data, ball_data))
+    print('%d frames per half, 22 players' % no_frames)
+    print('%-8s %10s %12s %12s' % ('variant', 'seconds', 'frame MB', 'peak MB'))
+    for variant in variants:
+        out = subprocess.check_output([sys.executable, '-m', __spec__.name,
+            '--frames', str(no_frames), '--child', variant]).decode()
+        line = [l for l in out.splitlines() if l.startswith('RSS')][0]
+        secs, baseline, peak, size = [float(v) for v in line.split()[1:]]
+        print('%-8s %10.3f %12.1f %12.1f' % (variant, secs, size, peak - baseline))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--frames', type=int, default=67500,
+            help='number of frames per half')
+    parser.add_argument('--child', choices=variants, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.frames)
+    else:
+        main(args.frames)
@@ -0,0 +1,53 @@
+# -*- encoding: utf-8 -*-
+"""
+bench_single_frame: Loading a folder of PutPositionalDataRequest files.
+
+Writes synthetic single frame files of 25 frames each and loads them with
+load_folder, sequentially and on all cpus. The sax PositionFileParser is
+timed for reference.
+
+    python -m benchmarks.bench_single_frame --files 5400
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+from __future__ import print_function
+import os
+import argparse
+import tempfile
+import footballpy.fs.loader.single_frame_parser as sp
+import benchmarks.synthetic as syn
+
+
+def legacy(fnames):
+    for fname in fnames:
+        pfp = sp.PositionFileParser()
+        pfp.run(fname)
+
+
+def main(no_files):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fnames = syn.write_single_frame_files(tmp_dir, no_files)
+        size = sum(os.path.getsize(f) for f in fnames)
+        print('%d files, %.1f MB, %d cpus' % (no_files, size / 2.0**20,
+            os.cpu_count()))
+        results = [('sax', syn.timed(legacy, fnames)[0])]
+        for processes in sorted(set([1, os.cpu_count()])):
+            secs, res = syn.timed(sp.load_folder, tmp_dir,
+                    syn.SINGLE_GAME_STATS, processes)
+            results.append(('folder-%d' % processes, secs))
+    print('%-10s %10s %10s %12s' % ('loader', 'seconds', 'files/s', 'frames/s'))
+    for name, secs in results:
+        print('%-10s %10.3f %10.0f %12.0f' % (name, secs, no_files / secs,
+            25 * no_files / secs))
+    print('home %s, guest %s' % (res[0]['home'].shape, res[0]['guest'].shape))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--files', type=int, default=5400,
+            help='number of files, 5400 are 90 minutes')
+    args = parser.parse_args()
+    main(args.files)
@@ -0,0 +1,85 @@
+# -*- encoding: utf-8 -*-
+"""
+bench_single_frame_live: Latency of watching a folder of single frame files.
+
+A writer task delivers synthetic PutPositionalDataRequest files into a
+folder at a fixed rate while a FolderWatcher polls it within the same
+asyncio loop. The latency is the time from the write of a file until the
+subscriber is called with the updated rolling window. The time of the
+polls is reported as well, split into polls with and without new files
+and for the folder after the last file.
+
+    python -m benchmarks.bench_single_frame_live --files 600 --rate 25
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+from __future__ import print_function
+import os
+import time
+import asyncio
+import argparse
+import tempfile
+import numpy as np
+import footballpy.fs.loader.single_frame_parser as sp
+import benchmarks.synthetic as syn
+
+
+async def deliver(folder, no_files, rate, written):
+    for k in range(no_files):
+        fname = syn.write_single_frame_files(folder, 1, seed = k, first = k)[0]
+        written[fname] = time.perf_counter()
+        await asyncio.sleep(1.0 / rate)
+
+
+async def watch(watcher, interval, no_files, polls):
+    while len(watcher.seen) < no_files:
+        start = time.perf_counter()
+        no_new = watcher.poll()
+        polls.append((no_new, time.perf_counter() - start))
+        await asyncio.sleep(interval)
+
+
+def main(no_files, rate, interval, window):
+    written, latencies, polls = {}, [], []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        watcher = sp.FolderWatcher(tmp_dir, syn.SINGLE_GAME_STATS, window = window)
+        watcher.subscribe(lambda w, fname, frames:
+                latencies.append(time.perf_counter() - written[fname]))
+
+        async def run():
+            await asyncio.gather(deliver(tmp_dir, no_files, rate, written),
+                    watch(watcher, interval, no_files, polls))
+        asyncio.run(run())
+        window_frames = len(watcher.data()[2])
+        # once the folder is quiet its listing is skipped
+        time.sleep(2 * watcher.mtime_resolution)
+        watcher.poll()
+        quiet = min(syn.timed(watcher.poll)[0] for _ in range(100))
+    latencies = 1e3 * np.array(latencies)
+    polls = np.array(polls)
+    idle, busy = polls[polls[:, 0] == 0, 1], polls[polls[:, 0] > 0]
+    print('%d files at %.0f files/s, polled every %.0f ms, %.0f s window' % (
+        no_files, rate, 1e3 * interval, window))
+    print('latency ms: mean %.2f, median %.2f, p99 %.2f, max %.2f' % (
+        latencies.mean(), np.median(latencies), np.percentile(latencies, 99),
+        latencies.max()))
+    print('poll ms: idle %s, per new file %.3f, quiet folder %.3f' % (
+        '%.3f' % (1e3 * idle.mean()) if len(idle) else '-',
+        1e3 * (busy[:, 1] / busy[:, 0]).mean(), 1e3 * quiet))
+    print('%d frames in the window' % window_frames)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--files', type=int, default=600)
+    parser.add_argument('--rate', type=float, default=25.0,
+            help='files written per second, 1 is real time')
+    parser.add_argument('--interval', type=float, default=0.01,
+            help='seconds between two polls')
+    parser.add_argument('--window', type=float, default=600.0,
+            help='rolling window in seconds')
+    args = parser.parse_args()
+    main(args.files, args.rate, args.interval, args.window)
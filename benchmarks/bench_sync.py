@@ -0,0 +1,97 @@
+# -*- encoding: utf-8 -*-
+"""
+bench_sync: Synchronising a season of events with the position frames.
+
+Builds synthetic matches in memory, frame time stamps of both halves at
+25 fps and events with wall-clock time, period, game clock and Opta
+coordinates. The events of every match are mapped to their frames with
+sync_by_time and sync_opta_events. For reference a few matches are
+aligned with the per-event scan over the frame times and extrapolated
+to the season.
+
+    python -m benchmarks.bench_sync --matches 306
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+from __future__ import print_function
+import argparse
+import numpy as np
+import pandas as pd
+import footballpy.processing.sync as sync
+import benchmarks.synthetic as syn
+
+FRAME_RATE = 25
+HALF_STARTS = {1: 10000, 2: 100000}
+STADIUM = {'length': 105.0, 'width': 68.0}
+
+
+def make_match(no_events, seed):
+    """Frame numbers, frame times and events of one synthetic match."""
+    rng = np.random.RandomState(seed)
+    kickoff = pd.Timestamp('2016-08-26 20:30', tz = 'Europe/Berlin')
+    halves = []
+    for period, offset in ((1, 0), (2, 62)):
+        no_frames = (47 + period) * 60 * FRAME_RATE
+        halves.append((HALF_STARTS[period] + np.arange(no_frames),
+            pd.date_range(kickoff + pd.Timedelta(minutes = offset),
+                periods = no_frames, freq = '40ms')))
+    frames = np.concatenate([h[0] for h in halves])
+    frame_times = halves[0][1].append(halves[1][1])
+    secs = np.sort(rng.uniform(0, 90*60, no_events))
+    period = 1 + (secs >= 45*60)
+    times = kickoff + pd.to_timedelta(secs + 17*60 * (period - 1), unit = 's')
+    events = pd.DataFrame({'period': period, 'minute': (secs // 60).astype(int),
+        'second': (secs % 60).astype(int), 'team': rng.choice(['100', '101'],
+            no_events), 'x': rng.uniform(0, 100, no_events),
+        'y': rng.uniform(0, 100, no_events), 'time': times})
+    return frames, frame_times, events
+
+
+def scan(frame_times, events):
+    """Per-event scan over the frame times, the reference."""
+    frame_times = pd.Series(frame_times)
+    return [(frame_times - t).abs().idxmin() for t in events['time']]
+
+
+def vectorized(matches):
+    res = 0
+    for frames, frame_times, events in matches:
+        rows = sync.sync_by_time(events['time'], frame_times, tolerance = 0.02)
+        synced = sync.sync_opta_events(events, frames, HALF_STARTS, STADIUM,
+                FRAME_RATE, attacks_left = [('101', 1), ('100', 2)])
+        res += (rows >= 0).sum() + (synced['row'] >= 0).sum()
+    return res
+
+
+def main(no_matches, no_events, no_scanned):
+    secs, matches = syn.timed(lambda: [make_match(no_events, i)
+        for i in range(no_matches)])
+    print('%d matches, %d events, built in %.1f s' % (no_matches,
+        no_matches * no_events, secs))
+    secs, count = syn.timed(vectorized, matches)
+    results = [('searchsorted', secs)]
+    scanned = matches[:no_scanned]
+    secs, rows = syn.timed(lambda: [scan(m[1], m[2]) for m in scanned])
+    results.append(('scan', secs * no_matches / len(scanned)))
+    for (_, frame_times, events), expected in zip(scanned, rows):
+        np.testing.assert_array_equal(sync.sync_by_time(events['time'],
+            frame_times), expected)
+    print('%-14s %10s %12s' % ('method', 'seconds', 'events/s'))
+    for name, secs in results:
+        print('%-14s %10.3f %12.0f' % (name, secs, no_matches * no_events / secs))
+    print('scan extrapolated from %d matches, %d of %d events synced'
+            % (len(scanned), count, 2 * no_matches * no_events))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--matches', type=int, default=306)
+    parser.add_argument('--events', type=int, default=1700,
+            help='number of events per match')
+    parser.add_argument('--scanned', type=int, default=1,
+            help='number of matches aligned with the per-event scan')
+    args = parser.parse_args()
+    main(args.matches, args.events, args.scanned)
@@ -0,0 +1,296 @@
+# -*- encoding: utf-8 -*-
+"""
+synthetic: Writes synthetic raw data files for the benchmarks.
+
+The files follow the layout of the provider files but are filled with
+random positions. The DFL files reuse the teams and ids from the DFL
+test match information file such that they can be loaded with it.
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+from __future__ import print_function
+import os
+import time
+import resource
+import datetime as dt
+import numpy as np
+
+
+def path_to_tstfile(*parts):
+    """Full path to a file in the testfiles folder."""
+    return os.path.abspath(os.path.join(os.path.dirname(__file__),
+        '..', 'footballpy', 'testfiles', *parts))
+
+DFL_MATCH_INFO = path_to_tstfile('dfl', 'MatchInformation', 'test.xml')
+DFL_TEAMS = {'DFL-ABC-12345A': ['DFL-OBJ-a0000%d' % i for i in range(1, 7)],
+             'DFL-ABC-12345B': ['DFL-OBJ-b0000%d' % i for i in range(1, 7)]}
+DFL_KICKOFF = {
+        'firstHalf': (10000, dt.datetime(2015, 5, 16, 15, 30, 40, 320000,
+            dt.timezone(dt.timedelta(hours=2)))),
+        'secondHalf': (100000, dt.datetime(2015, 5, 16, 16, 32, 40, 320000,
+            dt.timezone(dt.timedelta(hours=2))))}
+
+_DFL_FRAME = '\t\t\t<Frame N="{0}" T="{1}" X="{2:.2f}" Y="{3:.2f}" S="1.00" M="1"/>\n'
+_DFL_BALL_FRAME = ('\t\t\t<Frame N="{0}" T="{1}" X="{2:.2f}" Y="{3:.2f}" '
+        'Z="{4:.2f}" S="1.00" M="1" BallPossession="{5}" BallStatus="{6}"/>\n')
+_DFL_FRAME_SET = ('\t\t<FrameSet GameSection="{0}" MatchId="DFL-MAT-1234AB" '
+        'TeamId="{1}" PersonId="{2}">\n')
+
+
+def write_dfl_position_file(fname, no_frames=10000, seed=0):
+    """Writes a DFL ObservedPositionalData file.
+
+        Every player of both teams gets a FrameSet for each half and
+        the ball gets one FrameSet per half.
+
+        Args:
+            fname: full path of the target file.
+            no_frames: number of frames per half.
+            seed: seed for the random positions.
+        Returns:
+            The total number of frames written.
+    """
+    rng = np.random.RandomState(seed)
+    stamps = {}
+    for section, (start, kickoff) in DFL_KICKOFF.items():
+        stamps[section] = [
+            (kickoff + dt.timedelta(milliseconds=40*i)).isoformat(
+                timespec='milliseconds') for i in range(no_frames)]
+    total = 0
+    with open(fname, 'w') as fid:
+        fid.write('<PutDataRequest>\n\t<Positions>\n')
+        for section, (start, kickoff) in sorted(DFL_KICKOFF.items()):
+            for team_id, players in sorted(DFL_TEAMS.items()):
+                for pid in players:
+                    xy = rng.uniform(-50, 50, (no_frames, 2))
+                    fid.write(_DFL_FRAME_SET.format(section, team_id, pid))
+                    fid.writelines(_DFL_FRAME.format(start + i, stamps[section][i],
+                        xy[i, 0], xy[i, 1]) for i in range(no_frames))
+                    fid.write('\t\t</FrameSet>\n')
+                    total += no_frames
+            xyz = rng.uniform(-50, 50, (no_frames, 3))
+            fid.write(_DFL_FRAME_SET.format(section, 'BALL', 'DFL-OBJ-0000XT'))
+            fid.writelines(_DFL_BALL_FRAME.format(start + i, stamps[section][i],
+                xyz[i, 0], xyz[i, 1], abs(xyz[i, 2]) / 10.0, 1 + i // 500 % 2,
+                int(i % 1000 > 100)) for i in range(no_frames))
+            fid.write('\t\t</FrameSet>\n')
+            total += no_frames
+        fid.write('\t</Positions>\n</PutDataRequest>\n')
+    return total
+
+
+_DFL_EVENT = ('\t<Event EventTime="{0}" EventId="{1}" InternalMatchId="{2}" '
+        'X-Position="{3:.2f}" Y-Position="{4:.2f}">\n\t\t{5}\n\t</Event>\n')
+_DFL_EVENT_TYPES = [
+    '<Play Team="{team}" Player="{p1}" Recipient="{p2}" '
+        'Evaluation="successfullyCompleted"><Pass/></Play>',
+    '<Play Team="{team}" Player="{p1}" Evaluation="unsuccessful" '
+        'FromOpenPlay="true"><Cross Side="left"/></Play>',
+    '<TacklingGame WinnerTeam="{team}" Winner="{p1}" LoserTeam="{other}" '
+        'Loser="{q1}" WinnerResult="ballControlRetained" Type="ground"/>',
+    '<OtherBallAction Team="{team}" Player="{p1}" DefensiveClearance="true"/>',
+    '<ShotAtGoal Team="{team}" Player="{p1}" TypeOfShot="rightLeg" '
+        'DistanceToGoal="{dist}"><SavedShot GoalKeeper="{q1}" '
+        'Player="{q1}"/></ShotAtGoal>',
+    '<Foul TeamFouler="{team}" Fouler="{p1}" TeamFouled="{other}" '
+        'Fouled="{q1}"/>',
+    '<ThrowIn Team="{team}" Side="right"><Play Team="{team}" Player="{p1}" '
+        'Recipient="{p2}"><Pass/></Play></ThrowIn>',
+]
+
+
+def write_dfl_event_file(fname, no_events=1800, seed=0,
+        match_id='DFL-MAT-1234AB'):
+    """Writes a DFL EventData file.
+
+        The events are drawn from a handful of common event types with
+        random players of the two teams of DFL_MATCH_INFO, half of them
+        in each half plus kickoff and final whistles.
+
+        Args:
+            fname: full path of the target file.
+            no_events: number of events.
+            seed: seed for the random draws.
+            match_id: InternalMatchId of the events.
+        Returns:
+            The number of events written.
+    """
+    rng = np.random.RandomState(seed)
+    teams = sorted(DFL_TEAMS)
+    events = []
+    for section, (_, kickoff) in sorted(DFL_KICKOFF.items()):
+        offsets = np.sort(rng.uniform(0, 45*60, no_events // 2))
+        events.append((kickoff, '<KickoffWhistle GameSection="%s"/>' % section))
+        for secs in offsets:
+            t = rng.randint(2)
+            p1, p2 = rng.choice(DFL_TEAMS[teams[t]], 2, replace=False)
+            q1 = DFL_TEAMS[teams[1 - t]][rng.randint(6)]
+            body = _DFL_EVENT_TYPES[rng.randint(len(_DFL_EVENT_TYPES))].format(
+                    team=teams[t], other=teams[1 - t], p1=p1, p2=p2, q1=q1,
+                    dist=rng.randint(5, 40))
+            events.append((kickoff + dt.timedelta(seconds=secs), body))
+        events.append((kickoff + dt.timedelta(minutes=46),
+            '<FinalWhistle GameSection="%s" FinalResult="1:1"/>' % section))
+    xy = rng.uniform(-50, 50, (len(events), 2))
+    with open(fname, 'w') as fid:
+        fid.write('<PutDataRequest>\n')
+        for i, (time, body) in enumerate(events):
+            fid.write(_DFL_EVENT.format(time.isoformat(timespec='milliseconds'),
+                7589330016000000 + i, match_id, xy[i, 0], xy[i, 1], body))
+        fid.write('</PutDataRequest>\n')
+    return len(events)
+
+
+IMPIRE_MATCH_INFO = path_to_tstfile('impire', 'vistrack-matchfacts-123456.xml')
+# shirt numbers of the starting players in IMPIRE_MATCH_INFO
+IMPIRE_TRIKOTS = {'home': [30, 4, 15, 2, 26, 24, 7, 18, 13, 10, 33],
+                  'guest': [1, 4, 17, 25, 5, 7, 24, 13, 15, 11, 18]}
+
+
+def write_impire_position_file(fname, no_frames=10000, seed=0):
+    """Writes an impire .pos file.
+
+        The file name has to be <match id>.pos with the match id of
+        IMPIRE_MATCH_INFO, i.e. 123456.pos, to be loaded with it.
+
+        Args:
+            fname: full path of the target file.
+            no_frames: number of frames per half.
+            seed: seed for the random positions.
+        Returns:
+            The total number of frames written.
+    """
+    rng = np.random.RandomState(seed)
+    with open(fname, 'w') as fid:
+        for half in (1, 2):
+            xy = rng.uniform(-1.0, 1.0, (no_frames, 25, 2))
+            speed = rng.uniform(0.0, 1.0, (no_frames, 25))
+            for i in range(no_frames):
+                frame = (half - 1) * no_frames + i
+                p = xy[i]
+                parts = ['%d,%d,%d;' % (frame, 1 + i // 25, half)]
+                for k, team in enumerate(('home', 'guest')):
+                    parts.append(''.join('%d,%.4f,%.4f,%.2f;' % (trikot,
+                        p[11*k + j, 0], p[11*k + j, 1], speed[i, 11*k + j])
+                        for j, trikot in enumerate(IMPIRE_TRIKOTS[team])))
+                parts.append(''.join('%.4f,%.4f,%.2f;' % (p[j, 0], p[j, 1],
+                    speed[i, j]) for j in range(22, 25)))
+                parts.append('%.4f,%.4f,%d,%.2f,%d,%d;' % (p[0, 0], p[0, 1],
+                    i % 50, speed[i, 0], int(i % 1000 > 100), 1 + i // 500 % 2))
+                # the first line carries the stadium dimensions
+                stadium = '4,105.0,68.0;' if frame == 0 else ''
+                fid.write('#'.join(parts) + '#' + stadium + '\n')
+    return 2 * no_frames
+
+
+# type ids with their frequency, mostly passes, and typical qualifiers
+_F24_TYPES = [(1, 50), (3, 3), (4, 3), (5, 4), (6, 1), (7, 4), (8, 2),
+        (10, 1), (12, 4), (13, 1), (14, 1), (15, 1), (16, 1), (44, 2),
+        (49, 5), (50, 3), (61, 3)]
+_F24_QUALIFIERS = [2, 5, 6, 9, 15, 22, 24, 28, 56, 102, 103, 155, 212, 213, 233]
+_F24_EVENT = ('    <Event id="{0}" event_id="{1}" type_id="{2}" period_id="{3}" '
+        'min="{4}" sec="{5}"{6} team_id="{7}" outcome="{8}" x="{9:.1f}" '
+        'y="{10:.1f}" timestamp="{11}" last_modified="{11}" version="{12}">\n')
+
+
+def write_f24_file(fname, no_events=1700, seed=0, game_id=123456):
+    """Writes an Opta F24 event file.
+
+        Every event carries two to six random qualifiers, passes
+        additionally their end point (140, 141).
+
+        Args:
+            fname: full path of the target file.
+            no_events: number of events.
+            seed: seed for the random draws.
+            game_id: id of the Game element, the event ids start at
+                game_id * 10000.
+        Returns:
+            The number of events written.
+    """
+    rng = np.random.RandomState(seed)
+    type_ids = np.array([t[0] for t in _F24_TYPES])
+    weights = np.array([t[1] for t in _F24_TYPES], float)
+    types = rng.choice(type_ids, no_events, p=weights / weights.sum())
+    secs = np.sort(rng.uniform(0, 90*60, no_events))
+    xy = rng.uniform(0, 100, (no_events, 4))
+    kickoff = dt.datetime(2016, 8, 26, 20, 30)
+    with open(fname, 'w') as fid:
+        fid.write('<?xml version="1.0" encoding="UTF-8"?>\n<Games>\n'
+                '  <Game id="%d" away_team_id="101" home_team_id="100">\n' % game_id)
+        for i in range(no_events):
+            team = 100 + rng.randint(2)
+            stamp = (kickoff + dt.timedelta(seconds=secs[i])).isoformat(
+                    timespec='milliseconds')
+            fid.write(_F24_EVENT.format(game_id * 10000 + i, i + 1, types[i],
+                1 + int(secs[i] >= 45*60), int(secs[i] // 60), int(secs[i] % 60),
+                ' player_id="%d"' % (team * 100 + rng.randint(1, 15)),
+                team, int(rng.uniform() < 0.8), xy[i, 0], xy[i, 1], stamp,
+                1472236201000 + i))
+            qualifiers = rng.choice(_F24_QUALIFIERS, rng.randint(2, 7), replace=False)
+            if types[i] == 1:
+                fid.write('      <Q id="%d" qualifier_id="140" value="%.1f"/>\n'
+                        '      <Q id="%d" qualifier_id="141" value="%.1f"/>\n'
+                        % (2 * i, xy[i, 2], 2 * i + 1, xy[i, 3]))
+            for q in qualifiers:
+                fid.write('      <Q id="%d" qualifier_id="%d" value="%.1f"/>\n'
+                        % (i * 100 + q, q, xy[i, 2]))
+            fid.write('    </Event>\n')
+        fid.write('  </Game>\n</Games>\n')
+    return no_events
+
+
+SINGLE_GAME_STATS = path_to_tstfile('single', 'GameStats_g123456.xml')
+SINGLE_PLAYERS = (['p%d' % i for i in range(10001, 10023)] +
+        ['o%d' % i for i in range(20001, 20004)])
+
+
+def write_single_frame_files(folder, no_files=1000, seed=0, first=0):
+    """Writes PutPositionalDataRequest files with 25 frames each.
+
+        The player ids are the ones of SINGLE_GAME_STATS.
+
+        Args:
+            folder: target folder.
+            no_files: number of files.
+            seed: seed for the random positions.
+            first: number of the first file, the files before are
+                taken as written already.
+        Returns:
+            The full paths of the files written.
+    """
+    rng = np.random.RandomState(seed)
+    fnames = []
+    for k in range(first, first + no_files):
+        xy = rng.uniform(-50.0, 50.0, (25, len(SINGLE_PLAYERS) + 1, 2))
+        lines = []
+        for i in range(25):
+            frame = 10000 + 25 * k + i
+            players = ''.join('%s,%.2f,%.2f,%.2f;' % (pid, xy[i, j, 0],
+                xy[i, j, 1], 5.0) for j, pid in enumerate(SINGLE_PLAYERS))
+            lines.append('%d,1,1,2020-01-01T13:32:52.680+02:00,1,22;#%s#'
+                    '%.2f,%.2f,1.00,4.02,0,2;' % (frame, players, xy[i, -1, 0],
+                        xy[i, -1, 1]))
+        fnames.append(os.path.join(folder, 'PutPositionalDataRequest%07d_%07d.xml'
+            % (25 * k, 25 * k + 24)))
+        with open(fnames[-1], 'w') as fid:
+            fid.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                    '<PutPositionalDataRequest><Positions FrameCount="25">'
+                    'CDATA[%s\n]</Positions></PutPositionalDataRequest>'
+                    % '\n'.join(lines))
+    return fnames
+
+
+def timed(fun, *args, **kwargs):
+    """Runs fun and returns the wall-clock time together with the result."""
+    start = time.perf_counter()
+    res = fun(*args, **kwargs)
+    return time.perf_counter() - start, res
+
+
+def peak_rss_mb():
+    """Peak resident set size of the current process in MB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
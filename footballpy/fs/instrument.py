@@ -0,0 +1,218 @@
+# -*- encoding: utf-8 -*-
+"""
+instrument: Progress and timing instrumentation for the loaders.
+
+The loaders report what they are doing through two hooks:
+
+    stage(name, total_bytes): a context manager around a loading step.
+    progress(frames, bytes, item): reports converted frames and consumed
+        bytes of the current stage, e.g. once per FrameSet.
+
+Both do nothing when no Recorder is active, such that the instrumentation
+is (almost) free when not used. A Recorder collects a StageRecord with
+wall-clock time, frames, bytes and peak memory for every finished stage
+and forwards the progress events to an optional callback:
+
+    with instrument.Recorder(on_progress = print) as rec:
+        dfl.run(match_info_file, match_pos_file, trace = False)
+    for record in rec.stages:
+        print(record)
+
+The Tracer prints the stages and progress events and replaces the
+former print statements of the loaders behind their trace flags.
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+from __future__ import print_function
+import sys
+import time
+from collections import namedtuple
+try:
+    import resource
+except ImportError: # not available on windows
+    resource = None
+
+ProgressEvent = namedtuple('ProgressEvent',
+        'stage item frames bytes total_bytes elapsed')
+ProgressEvent.__doc__ = """Progress of a stage.
+
+    frames and bytes are counted from the start of the stage, total_bytes
+    is the size of the input if known and elapsed the time since the
+    start of the stage in seconds.
+"""
+
+StageRecord = namedtuple('StageRecord',
+        'name depth seconds frames bytes peak_rss_mb peak_rss_growth_mb')
+StageRecord.__doc__ = """Timing and memory of a finished stage.
+
+    depth is the nesting level of the stage. peak_rss_mb is the peak
+    resident set size of the process at the end of the stage and
+    peak_rss_growth_mb the increase of the peak during the stage.
+    Frames and bytes of nested stages are included.
+"""
+
+# the active recorders, innermost last
+_recorders = []
+
+
+def peak_rss_mb():
+    """Peak resident set size of the current process in MB."""
+    if resource is None:
+        return float('nan')
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on mac os
+    return peak / 2.0**20 if sys.platform == 'darwin' else peak / 1024.0
+
+
+def enabled():
+    """True when a Recorder is active."""
+    return bool(_recorders)
+
+
+def progress(frames = 0, bytes = 0, item = None):
+    """Reports progress of the current stage to the active recorders.
+
+        Args:
+            frames: number of frames converted since the last call.
+            bytes: number of input bytes consumed since the last call.
+            item: optional description, e.g. the PersonId of a FrameSet.
+    """
+    if not _recorders:
+        return
+    for recorder in _recorders:
+        recorder.progress(frames, bytes, item)
+
+
+class _NullStage(object):
+    """Stage used when nothing is recorded."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_null_stage = _NullStage()
+
+
+class _Stage(object):
+    """Stage which notifies the recorders active at its start."""
+
+    def __init__(self, name, total_bytes, tracer):
+        self.name = name
+        self.total_bytes = total_bytes
+        self.tracer = tracer
+        self.recorders = ()
+
+    def __enter__(self):
+        if self.tracer is not None:
+            self.tracer.__enter__()
+        self.recorders = list(_recorders)
+        for recorder in self.recorders:
+            recorder.start(self.name, self.total_bytes)
+        return self
+
+    def __exit__(self, *exc_info):
+        for recorder in reversed(self.recorders):
+            recorder.stop()
+        if self.tracer is not None:
+            self.tracer.__exit__(*exc_info)
+        return False
+
+
+def stage(name, total_bytes = None, trace = False):
+    """Context manager around a loading step.
+
+        Args:
+            name: name of the stage, e.g. 'position data'.
+            total_bytes: size of the input of the stage if known.
+            trace: print the stage and its progress with a Tracer.
+        Returns:
+            A context manager.
+    """
+    if trace and not any(isinstance(r, Tracer) for r in _recorders):
+        return _Stage(name, total_bytes, Tracer())
+    if not _recorders:
+        return _null_stage
+    return _Stage(name, total_bytes, None)
+
+
+class Recorder(object):
+    """Collects stage records and forwards progress events.
+
+        Used as context manager, the recorder is active inside the
+        with block.
+
+        Args:
+            on_progress: called with a ProgressEvent for every progress
+                report.
+            on_stage: called with the StageRecord of every finished stage.
+        Attributes:
+            stages: list of StageRecords in the order the stages finished.
+    """
+
+    def __init__(self, on_progress = None, on_stage = None):
+        self.on_progress = on_progress
+        self.on_stage = on_stage
+        self.stages = []
+        # open stages: [name, total_bytes, start, frames, bytes, peak_rss]
+        self._open = []
+
+    def __enter__(self):
+        _recorders.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _recorders.remove(self)
+        return False
+
+    def start(self, name, total_bytes = None):
+        """Called at the start of a stage."""
+        self._open.append([name, total_bytes, time.perf_counter(), 0, 0,
+            peak_rss_mb()])
+
+    def progress(self, frames, bytes, item):
+        """Called for every progress report."""
+        if not self._open:
+            return
+        for entry in self._open:
+            entry[3] += frames
+            entry[4] += bytes
+        name, total_bytes, start, frames, bytes, _ = self._open[-1]
+        if self.on_progress is not None:
+            self.on_progress(ProgressEvent(name, item, frames, bytes,
+                total_bytes, time.perf_counter() - start))
+
+    def stop(self):
+        """Called at the end of a stage."""
+        name, _, start, frames, bytes, rss = self._open.pop()
+        peak = peak_rss_mb()
+        record = StageRecord(name, len(self._open),
+                time.perf_counter() - start, frames, bytes, peak, peak - rss)
+        self.stages.append(record)
+        if self.on_stage is not None:
+            self.on_stage(record)
+
+
+class Tracer(Recorder):
+    """Recorder which prints the stages and their progress."""
+
+    def __init__(self):
+        Recorder.__init__(self, on_stage = self.print_stage)
+
+    def start(self, name, total_bytes = None):
+        print('Start parsing %s' % name)
+        Recorder.start(self, name, total_bytes)
+
+    def progress(self, frames, bytes, item):
+        if item is not None:
+            print(item)
+        print('Processed %d frames' % frames)
+        Recorder.progress(self, frames, bytes, item)
+
+    @staticmethod
+    def print_stage(record):
+        print('finished parsing %s in %.2f s' % (record.name, record.seconds))
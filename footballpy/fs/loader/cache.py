@@ -0,0 +1,245 @@
+# -*- encoding: utf-8 -*-
+"""
+cache: On-disk cache for parsed matches.
+
+Parsing the provider files is by far the slowest part of loading a
+match. The MatchCache stores the parsed result, position and ball arrays
+together with the teams and match dictionaries, in a single uncompressed
+.npz file per entry. The numpy arrays are stored as npz members and the
+remaining structure is pickled into the 'skeleton' member.
+
+Entries are keyed by the absolute paths of the source files together with
+their size and modification time (optionally a content hash). The cache
+size is capped and the least recently used entries are evicted first.
+
+    cache = MatchCache('/tmp/footballpy')
+    pos_df, teams, match = dfl.get_df_from_files(info, pos, cache = cache)
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+import os
+import io
+import pickle
+import zipfile
+import hashlib
+import tempfile
+import numpy as np
+from footballpy.fs.loader.compression import is_file_like
+
+# part of every key, increase when the layout of the cached results changes
+CACHE_VERSION = 1
+
+
+class _ArrayRef(object):
+    """Placeholder for a numpy array in the pickled skeleton."""
+
+    def __init__(self, index):
+        self.index = index
+
+
+def split_arrays(obj, arrays):
+    """Replaces numpy arrays in a nested structure by references.
+
+        Args:
+            obj: nested structure of dicts, lists and tuples.
+            arrays: list the extracted arrays are appended to.
+        Returns:
+            The structure with every array replaced by an _ArrayRef.
+    """
+    if isinstance(obj, np.ndarray) and obj.dtype != object:
+        arrays.append(obj)
+        return _ArrayRef(len(arrays) - 1)
+    if isinstance(obj, dict):
+        return {k: split_arrays(v, arrays) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [split_arrays(v, arrays) for v in obj]
+    if isinstance(obj, tuple):
+        return tuple(split_arrays(v, arrays) for v in obj)
+    return obj
+
+
+def join_arrays(obj, arrays):
+    """Inverse of split_arrays."""
+    if isinstance(obj, _ArrayRef):
+        return arrays[obj.index]
+    if isinstance(obj, dict):
+        return {k: join_arrays(v, arrays) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [join_arrays(v, arrays) for v in obj]
+    if isinstance(obj, tuple):
+        return tuple(join_arrays(v, arrays) for v in obj)
+    return obj
+
+
+def file_fingerprint(fname, hash_content = False):
+    """Identifies the state of a source file.
+
+        Args:
+            fname: path to the file.
+            hash_content: include the sha1 of the file content.
+        Returns:
+            A string with absolute path, size, mtime and optionally hash.
+    """
+    stat = os.stat(fname)
+    parts = [os.path.abspath(fname), str(stat.st_size), str(stat.st_mtime_ns)]
+    if hash_content:
+        sha = hashlib.sha1()
+        with open(fname, 'rb') as fid:
+            for block in iter(lambda: fid.read(2**20), b''):
+                sha.update(block)
+        parts.append(sha.hexdigest())
+    return '|'.join(parts)
+
+
+class MatchCache(object):
+    """Size capped on-disk cache with least recently used eviction.
+
+        Args:
+            directory: cache folder, created when missing. Defaults to
+                $FOOTBALLPY_CACHE or ~/.cache/footballpy.
+            max_bytes: size cap for all entries together.
+            hash_content: key entries on the content hash of the source
+                files additionally to size and mtime.
+    """
+
+    suffix = '.npz'
+
+    def __init__(self, directory = None, max_bytes = 2**30, hash_content = False):
+        if directory is None:
+            directory = os.environ.get('FOOTBALLPY_CACHE',
+                    os.path.join(os.path.expanduser('~'), '.cache', 'footballpy'))
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hash_content = hash_content
+        os.makedirs(directory, exist_ok = True)
+
+    def key(self, loader, *fnames):
+        """Cache key for the result of loader on the files fnames.
+
+            Args:
+                loader: name of the loading function, e.g. 'dfl'.
+                fnames: source files.
+            Returns:
+                hex digest identifying the entry.
+        """
+        parts = [str(CACHE_VERSION), loader]
+        parts.extend(file_fingerprint(f, self.hash_content) for f in fnames)
+        return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        """Path of the entry file for key."""
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get(self, key):
+        """Loads an entry.
+
+            Args:
+                key: entry key.
+            Returns:
+                The cached result or None when key is not cached. A
+                corrupt or stale entry is removed and counts as a miss.
+        """
+        fname = self.path(key)
+        try:
+            with np.load(fname, allow_pickle = False) as npz:
+                skeleton = pickle.loads(npz['skeleton'].tobytes())
+                arrays = [npz['a%d' % i] for i in range(len(npz.files) - 1)]
+            result = join_arrays(skeleton, arrays)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, KeyError, IndexError, ValueError,
+                AttributeError, ImportError, zipfile.BadZipFile,
+                pickle.UnpicklingError):
+            # truncated file or skeleton of classes which changed since
+            try:
+                os.remove(fname)
+            except OSError:
+                pass
+            return None
+        # mark as recently used
+        os.utime(fname)
+        return result
+
+    def put(self, key, result):
+        """Stores result under key and evicts old entries.
+
+            Args:
+                key: entry key.
+                result: nested structure of dicts, lists and tuples
+                        with numpy arrays and picklable objects.
+        """
+        arrays = []
+        skeleton = pickle.dumps(split_arrays(result, arrays), pickle.HIGHEST_PROTOCOL)
+        members = {'a%d' % i: a for i, a in enumerate(arrays)}
+        members['skeleton'] = np.frombuffer(skeleton, np.uint8)
+        fd, tmp_name = tempfile.mkstemp(suffix = '.tmp', dir = self.directory)
+        try:
+            with io.open(fd, 'wb') as fid:
+                np.savez(fid, **members)
+            # atomic such that concurrent readers never see a partial entry
+            os.replace(tmp_name, self.path(key))
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+        self.evict()
+
+    def entries(self):
+        """List of (last access, size, path) of all entries, oldest first."""
+        res = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.suffix):
+                continue
+            fname = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(fname)
+            except OSError:
+                continue
+            res.append((stat.st_mtime_ns, stat.st_size, fname))
+        return sorted(res)
+
+    def size(self):
+        """Total size of all entries in bytes."""
+        return sum(e[1] for e in self.entries())
+
+    def evict(self):
+        """Removes least recently used entries until below max_bytes."""
+        entries = self.entries()
+        total = sum(e[1] for e in entries)
+        for _, size, fname in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(fname)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Removes all entries."""
+        for _, _, fname in self.entries():
+            os.remove(fname)
+
+
+def cached(cache, loader, fnames, fun, *args, **kwargs):
+    """Returns fun(*args, **kwargs) from cache or calls and stores it.
+
+        Args:
+            cache: MatchCache or None to always call fun. File objects
+                in fnames are never cached.
+            loader: name of the loader, part of the key.
+            fnames: source files the result depends on.
+            fun: loading function.
+        Returns:
+            The result of fun.
+    """
+    if cache is None or any(is_file_like(f) for f in fnames):
+        return fun(*args, **kwargs)
+    key = cache.key(loader, *fnames)
+    res = cache.get(key)
+    if res is None:
+        res = fun(*args, **kwargs)
+        cache.put(key, res)
+    return res
@@ -0,0 +1,157 @@
+# -*- encoding: utf-8 -*-
+"""
+compression: Transparent reading of compressed provider files.
+
+The loaders accept a path or an open file object for every input file.
+open_source detects gzip, bz2 and xz compression from the first bytes,
+independent of the file name, and decompresses while the file is read
+such that no temporary files are needed.
+
+    with open_source('match.pos.xz', 'rt') as fid:
+        for line in fid:
+            ...
+
+Loaders which need random access to the raw bytes (byte ranges, mmap)
+check is_plain_file and fall back to a sequential read otherwise.
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+import io
+import os
+import bz2
+import gzip
+import lzma
+import contextlib
+
+# magic bytes of the supported compression formats
+compression_formats = [
+    ('gzip', b'\x1f\x8b', lambda fid: gzip.GzipFile(fileobj = fid, mode = 'rb')),
+    ('bz2', b'BZh', lambda fid: bz2.BZ2File(fid, mode = 'rb')),
+    ('xz', b'\xfd7zXZ\x00', lambda fid: lzma.LZMAFile(fid, mode = 'rb')),
+]
+_no_magic = max(len(f[1]) for f in compression_formats)
+
+
+def is_file_like(source):
+    """True when source is an open file object and not a path."""
+    return hasattr(source, 'read')
+
+
+class _Prefixed(io.RawIOBase):
+    """Reads head first and then the rest of a non-seekable stream."""
+
+    def __init__(self, head, fid):
+        io.RawIOBase.__init__(self)
+        self.head = head
+        self.fid = fid
+
+    def readable(self):
+        return True
+
+    def readinto(self, buf):
+        if self.head:
+            n = min(len(buf), len(self.head))
+            buf[:n] = self.head[:n]
+            self.head = self.head[n:]
+            return n
+        data = self.fid.read(len(buf))
+        buf[:len(data)] = data
+        return len(data)
+
+
+def _peek(fid):
+    """Returns the first bytes of fid and a stream starting at them."""
+    if hasattr(fid, 'peek'):
+        return fid.peek(_no_magic)[:_no_magic], fid
+    if fid.seekable():
+        pos = fid.tell()
+        head = fid.read(_no_magic)
+        fid.seek(pos)
+        return head, fid
+    head = fid.read(_no_magic)
+    return head, io.BufferedReader(_Prefixed(head, fid))
+
+
+def detect_compression(source):
+    """Compression format of a path or binary file object.
+
+        Args:
+            source: path or binary file object, the position of the file
+                object is not changed.
+        Returns:
+            'gzip', 'bz2', 'xz' or None for uncompressed data.
+    """
+    if is_file_like(source):
+        head, _ = _peek(source)
+    else:
+        with open(source, 'rb') as fid:
+            head = fid.read(_no_magic)
+    for name, magic, _ in compression_formats:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def is_plain_file(source):
+    """True for a path to an uncompressed file which allows random access."""
+    return not is_file_like(source) and detect_compression(source) is None
+
+
+def source_size(source):
+    """Size in bytes of a plain file, None for compressed or file objects."""
+    return os.path.getsize(source) if is_plain_file(source) else None
+
+
+def source_name(source):
+    """File name of a path or file object, None if unknown."""
+    if is_file_like(source):
+        name = getattr(source, 'name', None)
+        return name if isinstance(name, str) else None
+    return os.fspath(source)
+
+
+@contextlib.contextmanager
+def open_source(source, mode = 'rb'):
+    """Opens a path or file object for reading, decompressing on the fly.
+
+        File objects passed in are not closed.
+
+        Args:
+            source: path or file object. Text file objects can only be
+                opened in text mode.
+            mode: 'rb' for a binary or 'rt' for a text stream.
+        Returns:
+            A context manager with the (decompressed) file object.
+    """
+    if mode not in ('rb', 'rt'):
+        raise ValueError('Unsupported mode: %s' % mode)
+    if isinstance(source, io.TextIOBase):
+        if mode != 'rt':
+            raise TypeError('Binary file object expected.')
+        yield source
+        return
+    owned = not is_file_like(source)
+    raw = open(source, 'rb') if owned else source
+    fid = text = None
+    try:
+        head, stream = _peek(raw)
+        fid = stream
+        for _, magic, opener in compression_formats:
+            if head.startswith(magic):
+                fid = opener(stream)
+                break
+        if mode == 'rt':
+            text = io.TextIOWrapper(fid, encoding = 'utf-8')
+            yield text
+        else:
+            yield fid
+    finally:
+        if text is not None:
+            text.detach()
+        if fid is not None and fid is not raw and fid is not stream:
+            fid.close()
+        if owned:
+            raw.close()
@@ -3,7 +3,8 @@
 dfl: Module which provides parsing function for Soccer
             position data. Individual parsers are provided for
             general match information data, match event data,
-            and match position data.
+            and match position data. All files can be passed as path
+            or file object and gzip, bz2 or xz compressed.
 
 @author: rein
 @license: MIT
@@ -13,9 +14,13 @@ dfl: Module which provides parsing function for Soccer
 from __future__ import print_function
 from xml.sax import make_parser, ContentHandler
 from xml.sax.handler import feature_external_ges
+import os
+import re
 import datetime as dt
 import dateutil.parser as dup
 import numpy as np
+import footballpy.fs.instrument as instrument
+import footballpy.fs.loader.compression as compression
 
 class MatchInformationParser(ContentHandler):
     """A XML parser for DFL match information files.
@@ -115,8 +120,9 @@ class MatchInformationParser(ContentHandler):
         """Runs the parse on fname."""
         parser = make_parser()
         parser.setContentHandler(self)
-        parser.parse(fname)
-        print('finished parsing match information')
+        with compression.open_source(fname) as fid, \
+                instrument.stage('match information'):
+            parser.parse(fid)
 
 
 def convertTime(tstring):
@@ -133,6 +139,49 @@ def convertTime(tstring):
     return dup.parse(tstring) 
 
 
+def empty_time_stamps():
+    """Timezone aware DatetimeIndex without stamps for a missing half."""
+    import pandas as pd
+
+    return pd.DatetimeIndex([], dtype='datetime64[ns, UTC]')
+
+
+def convert_time_stamps(tstrings):
+    """Converts a sequence of time stamps in one vectorized pass.
+
+        The time stamps are expected in the ISO 8601 format of the DFL
+        files, e.g. 2015-05-16T15:30:40.320+02:00. When all stamps share
+        the same utc offset the offset is cut off, the local times are
+        decoded by numpy in one go and the timezone is attached again.
+        Otherwise pandas is used to parse the stamps.
+
+        Args:
+            tstrings: sequence of timestamp strings or bytes.
+        Returns:
+            A pandas DatetimeIndex with datetime64[ns] values in the
+            timezone of the first timestamp, an empty one is in utc.
+    """
+    import pandas as pd
+
+    stamps = np.asarray(tstrings, dtype='S')
+    if stamps.size == 0:
+        return empty_time_stamps()
+    first = stamps[0].decode()
+    tz = convertTime(first).tzinfo
+    offset = re.search(r'(Z|[+-]\d\d:?\d\d)$', first)
+    no_chars = len(first)
+    no_local = no_chars - (len(offset.group()) if offset else 0)
+    if (stamps.dtype.itemsize == no_chars and
+            np.all(np.char.str_len(stamps) == no_chars)):
+        chars = stamps.view('S1').reshape(stamps.size, no_chars)
+        if np.all(chars[:,no_local:] == chars[0,no_local:]):
+            local = stamps.astype('S%d' % no_local).astype('datetime64[ns]')
+            times = pd.DatetimeIndex(local)
+            return times.tz_localize(tz) if tz is not None else times
+    times = pd.to_datetime(stamps.astype('U'), utc = True).tz_convert(tz)
+    return times.as_unit('ns') if hasattr(times, 'as_unit') else times
+
+
 class Substitution:
     """
     A simple wrapper object for substitution events.
@@ -193,8 +242,9 @@ class MatchEventParser(ContentHandler):
     def run(self,fname):
         parser = make_parser()
         parser.setContentHandler(self)
-        parser.parse(fname)
-        print('finished parsing event data')
+        with compression.open_source(fname) as fid, \
+                instrument.stage('event data'):
+            parser.parse(fid)
     
     def getEventInformation(self):
         return self.playing_time, self.subs
@@ -229,11 +279,147 @@ def get_match_events(match_event_file):
 
     result = dict()
 
-    root = etree.parse(match_event_file).getroot()
+    with compression.open_source(match_event_file) as fid:
+        root = etree.parse(fid).getroot()
     result['goal_shots'] = [process_goal_shot(shot) for shot in root.xpath('//ShotAtGoal')]
     return result
 
 
+# event attributes which go into the team, player and player_2 columns of
+# the event table in the order of precedence
+event_team_attrs = ('Team', 'WinnerTeam', 'TeamFouler', 'CausingTeam')
+event_player_attrs = ('Player', 'PlayerIn', 'Winner', 'Fouler', 'Guardian')
+event_player_2_attrs = ('Recipient', 'PlayerOut', 'Loser', 'Fouled')
+
+
+def read_event_columns(match_event_file):
+    """Walks a DFL EventData file once and collects its events.
+
+    Args:
+        match_event_file: full path to an EventData file.
+    Returns:
+        A dictionary with a list entry per event for time (the utc
+        nanoseconds as int64 array), event_id, match_id, type and
+        subtype, the flat lists keys and values with the remaining
+        attributes of all events, no_attrs with the number of
+        attributes per event and tz, the timezone of the first event.
+        Used by get_event_table.
+    """
+    from lxml import etree
+
+    stamps, event_ids, match_ids, types, subtypes = [], [], [], [], []
+    keys, values, no_attrs = [], [], []
+    with compression.open_source(match_event_file) as fid:
+        root = etree.parse(fid).getroot()
+    for event in root.iterchildren('Event'):
+        found = dict(event.items())
+        stamps.append(found.pop('EventTime'))
+        event_ids.append(found.pop('EventId', -1))
+        match_id = found.pop('MatchId', None)
+        match_ids.append(found.pop('InternalMatchId', match_id))
+        event_type, nested = None, []
+        for elem in event.iterdescendants(tag = etree.Element):
+            if event_type is None:
+                event_type = elem.tag
+            else:
+                nested.append(elem.tag)
+            for key, value in elem.items():
+                if key in found:
+                    key = elem.tag + ':' + key
+                found[key] = value
+        types.append(event_type)
+        subtypes.append('/'.join(nested) or None)
+        keys.extend(found)
+        values.extend(found.values())
+        no_attrs.append(len(found))
+    times = convert_time_stamps(stamps)
+    return dict(time = times.asi8, tz = times.tz, event_id = event_ids,
+            match_id = match_ids, type = types, subtype = subtypes,
+            keys = keys, values = values, no_attrs = no_attrs)
+
+
+def get_event_table(match_event_files, processes = 1):
+    """Loads all events of DFL EventData files into one table.
+
+    Every file is walked once, every Event becomes a row. The type
+    of an event is the tag of the first element below Event, the
+    subtype the path of the tags nested below the type. All other
+    attributes are qualifiers and become sparse columns, numeric if all
+    values of a qualifier are numbers. When an attribute name occurs
+    twice in an event the nested one is prefixed with its tag,
+    e.g. 'SavedShot:Player'. The attributes in event_team_attrs,
+    event_player_attrs and event_player_2_attrs fill the team, player
+    and player_2 columns instead.
+
+    Args:
+        match_event_files: full path to an EventData file or a list
+            of paths, e.g. of a whole season.
+        processes: number of worker processes reading the files,
+            None uses all cpus.
+    Returns:
+        A pandas DataFrame sorted by file, time and event id with
+        the columns time (datetime64[ns] in the timezone of the first
+        event), event_id (int64), match_id, type, subtype, team, player
+        and player_2 (categoricals, NaN when missing) and one sparse
+        column per qualifier.
+    """
+    import pandas as pd
+    from concurrent.futures import ProcessPoolExecutor
+
+    if isinstance(match_event_files, str):
+        match_event_files = [match_event_files]
+    processes = processes or os.cpu_count()
+    if processes > 1 and len(match_event_files) > 1:
+        with ProcessPoolExecutor(processes) as pool:
+            files = list(pool.map(read_event_columns, match_event_files))
+    else:
+        files = [read_event_columns(f) for f in match_event_files]
+
+    def concat(name):
+        return [v for f in files for v in f[name]]
+    file_no = np.repeat(np.arange(len(files), dtype=np.int32),
+            [len(f['type']) for f in files])
+    no_events = len(file_no)
+    event_ids = np.array(concat('event_id'), dtype=object).astype(np.int64)
+    times = np.concatenate([f['time'] for f in files] + [np.empty(0, np.int64)])
+    tz = next((f['tz'] for f in files if len(f['type'])), None)
+    order = np.lexsort((event_ids, times, file_no))
+    time_index = pd.DatetimeIndex(times[order].view('datetime64[ns]')).tz_localize('UTC')
+    table = pd.DataFrame({'time': time_index if tz is None else time_index.tz_convert(tz),
+        'event_id': event_ids[order]})
+    for name in ('match_id', 'type', 'subtype'):
+        table[name] = pd.Categorical(np.array(concat(name), dtype=object)[order])
+
+    # group the attributes by name, rows in table order
+    rank = np.empty_like(order)
+    rank[order] = np.arange(no_events)
+    rows = rank.repeat(np.array(concat('no_attrs'), dtype=np.intp))
+    codes, names = pd.factorize(np.array(concat('keys'), dtype=object))
+    values = np.array(concat('values'), dtype=object)
+    by_name = np.argsort(codes, kind = 'stable')
+    bounds = np.searchsorted(codes[by_name], np.arange(len(names) + 1))
+    attrs = dict((name, by_name[bounds[k]:bounds[k+1]])
+            for k, name in enumerate(names))
+    for name, precedence in (('team', event_team_attrs),
+            ('player', event_player_attrs), ('player_2', event_player_2_attrs)):
+        column = np.full(no_events, None, dtype=object)
+        for attr in reversed(precedence):
+            idx = attrs.pop(attr, None)
+            if idx is not None:
+                column[rows[idx]] = values[idx]
+        table[name] = pd.Categorical(column)
+    for name in sorted(attrs):
+        idx = attrs[name]
+        try:
+            column = np.full(no_events, np.nan)
+            column[rows[idx]] = values[idx].astype(np.float64)
+        except ValueError:
+            column = np.full(no_events, np.nan, dtype=object)
+            column[rows[idx]] = values[idx]
+        table[name] = pd.arrays.SparseArray(column, fill_value=np.nan)
+    return table
+
+
 def calculate_frame_estimate(playing_time,padding_time = 5*60, freq = 25):
     secs_1st = (playing_time['firstHalf'][1] - playing_time['firstHalf'][0]).seconds
     secs_2nd = (playing_time['secondHalf'][1] - playing_time['secondHalf'][0]).seconds
@@ -241,12 +427,38 @@ def calculate_frame_estimate(playing_time,padding_time = 5*60, freq = 25):
     return int(no_frames)
 
         
+def lookup_player(match, teams, team_id, person_id):
+    """Determines team role and playing position of a player.
+
+    Args:
+        match: match information dictionary.
+        teams: team information dictionary.
+        team_id: TeamId of the player.
+        person_id: PersonId of the player.
+    Returns:
+        A tuple with the team role ('home' or 'guest') and the
+        playing position.
+    """
+    team_role = 'home' if team_id == match['home'] else 'guest'
+    players = teams[team_role]
+    position = players[[p['id'] for p in players].index(person_id)]['position']
+    return team_role, position
+
+
 class MatchPositionParser(ContentHandler):
     """
     A parser for the position data.
+
+    The frames of the current FrameSet are written into a buffer with
+    three columns (frame, x, y) for players and six columns for the ball.
+    The buffer starts with no_frames rows or with the length of the
+    longest FrameSet seen so far in the same game section and is
+    reallocated with twice the rows when it is full. A buffer filled
+    exactly is handed out directly, otherwise a copy of the used rows.
     Attributes:
         currentID
         currentPos
+        frameEstimate
         timeStamps
         tmpTimeStamp
         inFrameSet
@@ -257,12 +469,25 @@ class MatchPositionParser(ContentHandler):
         ball
         match
         teams
+        fid: the open position file during run
+        bytesRead: file position at the last progress report
     """
-    def __init__(self,match,teams,no_frames = 200000):
+    def __init__(self,match,teams,no_frames = 2**14):
+        """Initialization of attributes.
+
+        Args:
+            match: match information dictionary.
+            teams: team information dictionary.
+            no_frames: initial buffer size for the first FrameSet of each
+                game section.
+        """
         ContentHandler.__init__(self)
         self.currentID = ""
-        self.currentPos = np.zeros((no_frames,6),dtype='float32')
-        self.timeStamps = [[],[]]
+        self.currentPos = None
+        self.no_frames = no_frames
+        self.frameEstimate = {}
+        # stay appendable for halves without ball FrameSet
+        self.timeStamps = [empty_time_stamps(), empty_time_stamps()]
         self.tmpTimeStamp = []
         self.inFrameSet = False
         self.frameCounter = 0
@@ -274,7 +499,8 @@ class MatchPositionParser(ContentHandler):
         self.ball = [0]*2
         self.match = match
         self.teams = teams
-        self.trace = True
+        self.fid = None
+        self.bytesRead = 0
 
     def startElement(self,name,attrs):
         if name == "FrameSet":
@@ -285,79 +511,106 @@ class MatchPositionParser(ContentHandler):
             self.teamID = attrs['TeamId']
             if self.teamID.upper() == "BALL":
                 self.isBall = True
-                if self.trace:
-                    print("Ball")
-            if self.trace:
-                print(self.currentID)
+            no_rows = self.frameEstimate.get(self.gameSection, self.no_frames)
+            self.currentPos = np.empty((max(no_rows, 1), 6 if self.isBall else 3),
+                    dtype='float32')
         elif (name == "Frame") & self.inFrameSet:
             x = float(attrs['X'])
             y = float(attrs['Y'])
             frame = float(attrs['N'])
+            if self.frameCounter == self.currentPos.shape[0]:
+                grown = np.empty((2 * self.frameCounter, self.currentPos.shape[1]),
+                        dtype='float32')
+                grown[:self.frameCounter] = self.currentPos
+                self.currentPos = grown
             if not self.isBall:
-                self.currentPos[self.frameCounter,:3] = (frame,x,y)
+                self.currentPos[self.frameCounter,] = (frame,x,y)
             else: # ball data
                 z = float(attrs['Z'])
                 possession = float(attrs['BallPossession'])
                 ball_status = float(attrs['BallStatus'])
                 self.currentPos[self.frameCounter,] = ( 
                     frame,x,y,z,possession,ball_status)
-                # add timestamp information
-                timestamp = convertTime(attrs['T'])
-                self.tmpTimeStamp.append(timestamp)
+                # add timestamp information, decoded at the FrameSet end
+                self.tmpTimeStamp.append(attrs['T'])
 
             self.frameCounter += 1
 
     def endElement(self,name):
         if name == "FrameSet":
-            if self.trace:
-                print("Processed %d frames" % (self.frameCounter))
+            if instrument.enabled():
+                # the parser reads ahead, good enough for progress
+                pos = self.fid.tell()
+                instrument.progress(self.frameCounter, pos - self.bytesRead,
+                        self.currentID)
+                self.bytesRead = pos
             self.inFrameSet = False
-            # get team: A or B            
-            section = self.gameSection
-            teamID = self.teamID
+            data = self.currentPos
+            if self.frameCounter < data.shape[0]:
+                # a view would keep the unused rows alive
+                data = data[:self.frameCounter].copy()
+            self.currentPos = None
+            self.frameEstimate[self.gameSection] = max(self.frameCounter,
+                    self.frameEstimate.get(self.gameSection, 0))
             if self.isBall: # ball data
-                if section == "firstHalf":
-                    self.ball[0] = np.copy(
-                            self.currentPos[:self.frameCounter,])
-                    self.timeStamps[0] = self.tmpTimeStamp
-
-                elif section == "secondHalf":
-                    self.ball[1] = np.copy(
-                            self.currentPos[:self.frameCounter,])
-                    self.timeStamps[1] = self.tmpTimeStamp
-                else:
-                    raise LookupError
-                self.tmpTimeStamp = []
-
+                timestamps = convert_time_stamps(self.tmpTimeStamp)
             else: # player data
-                secID = '1st' if section == 'firstHalf' else '2nd'
-                teamRole = 'home' if teamID == self.match['home'] else 'guest'
-                play_pos = (self.teams[teamRole][[p['id'] for p in 
-                    self.teams[teamRole]].index(self.currentID)]['position'])
-                entry = (self.currentID,np.copy(self.currentPos[:self.frameCounter,:3]),play_pos)
-                self.position_data[teamRole][secID].append(entry)
+                timestamps = None
+            self.add_frame_set(self.currentID, self.teamID,
+                    self.gameSection, data, timestamps)
             # cleaning up
+            self.tmpTimeStamp = []
             self.gameSection = "NaN"
             self.frameCounter = 0
             self.teamID = ''
             if self.isBall:                
                 self.isBall = False
 
+    def add_frame_set(self, person_id, team_id, section, data, timestamps):
+        """Stores the data of a completed FrameSet.
+
+        Args:
+            person_id: PersonId of the FrameSet.
+            team_id: TeamId of the FrameSet, 'Ball' for the ball.
+            section: GameSection of the FrameSet.
+            data: numpy array with the frame data.
+            timestamps: DatetimeIndex with the ball timestamps,
+                not used for players.
+        Returns:
+            Nothing
+        """
+        if team_id.upper() == "BALL": # ball data
+            if section == "firstHalf":
+                self.ball[0] = data
+                self.timeStamps[0] = timestamps
+            elif section == "secondHalf":
+                self.ball[1] = data
+                self.timeStamps[1] = timestamps
+            else:
+                raise LookupError
+        else: # player data
+            secID = '1st' if section == 'firstHalf' else '2nd'
+            teamRole, play_pos = lookup_player(self.match, self.teams,
+                    team_id, person_id)
+            entry = (person_id, data, play_pos)
+            self.position_data[teamRole][secID].append(entry)
+
     def run(self, fname, trace = True):
         """Starts parsing fname.
 
         Args:
-            fname: filepath of the file.
+            fname: path or file object, gzip, bz2 or xz compressed files
+                are decompressed while reading.
             trace: flag whether to print reading statements.
         Returns:
             Nothing
         """
-        self.trace = trace
         parser = make_parser()
         parser.setContentHandler(self)
-        print('Start parsing position data')
-        parser.parse(fname)
-        print('finished parsing position data')
+        with compression.open_source(fname) as self.fid, instrument.stage(
+                'position data', compression.source_size(fname), trace):
+            parser.parse(self.fid)
+        self.fid = None
 
 
     def getPositionInformation(self):
@@ -365,10 +618,547 @@ class MatchPositionParser(ContentHandler):
         Args:
             None
         Returns:
-            The player position data and the ball data.
+            The player position data, the ball data and the ball
+            timestamps as a pandas DatetimeIndex per half.
         """
         return self.position_data, self.ball, self.timeStamps
 
+class MatchPositionScanner(MatchPositionParser):
+    """
+    A bulk parser for the position data.
+
+    Returns the same data as MatchPositionParser but skips the XML
+    machinery. The file is read in large binary chunks, cut into its
+    FrameSet blocks and each block is converted in one go: every frame
+    attribute is pulled out of the block with a single regular expression
+    and handed to numpy as a whole column. Only works on files with the
+    flat PutDataRequest/Positions/FrameSet/Frame layout of the DFL
+    provider files.
+    """
+    player_attrs = ('N', 'X', 'Y')
+    ball_attrs = ('N', 'X', 'Y', 'Z', 'BallPossession', 'BallStatus')
+
+    def run(self, fname, trace = True):
+        """Starts parsing fname.
+
+        Args:
+            fname: path or file object, may be compressed.
+            trace: flag whether to print reading statements.
+        Returns:
+            Nothing
+        """
+        with compression.open_source(fname) as fid, instrument.stage(
+                'position data', compression.source_size(fname), trace):
+            for offset, header, body in iter_frame_set_blocks(fid):
+                attrs = parse_frame_set_header(header)
+                person_id = attrs['PersonId']
+                team_id = attrs['TeamId']
+                is_ball = team_id.upper() == "BALL"
+                end = offset + len(header) + len(body)
+                data, timestamps = convert_frame_set_body(body, is_ball)
+                del body
+                instrument.progress(data.shape[0], end - self.bytesRead, person_id)
+                self.bytesRead = end
+                self.add_frame_set(person_id, team_id,
+                        attrs['GameSection'], data, timestamps)
+
+
+def iter_frame_set_blocks(fid, chunk_size = 2**20):
+    """Cuts a DFL position file into its FrameSet blocks.
+
+    The file is read in chunks and only the currently incomplete
+    FrameSet is kept in memory.
+
+    Args:
+        fid: file object opened in binary mode.
+        chunk_size: number of bytes read at once.
+    Returns:
+        A generator with a (offset, header, body) tuple per FrameSet.
+        offset is the byte position of the FrameSet in the file, header
+        the opening tag and body the bytes up to the closing tag.
+    """
+    start_tag, end_tag = b'<FrameSet', b'</FrameSet>'
+    buf = bytearray()
+    buf_offset = 0  # file position of buf[0]
+    searched = 0    # buf is known to contain no end tag before this
+    eof = False
+    while True:
+        start = buf.find(start_tag)
+        end = buf.find(end_tag, max(start, searched)) if start >= 0 else -1
+        if end >= 0:
+            head_end = buf.index(b'>', start) + 1
+            with memoryview(buf) as view:
+                header = bytes(view[start:head_end])
+                body = bytes(view[head_end:end])
+            offset = buf_offset + start
+            # drop the FrameSet from the buffer before handing it out
+            stop = end + len(end_tag)
+            del buf[:stop]
+            buf_offset += stop
+            searched = 0
+            yield offset, header, body
+            del header, body
+            continue
+        if eof:
+            break
+        chunk = fid.read(chunk_size)
+        eof = not chunk
+        # keep the incomplete FrameSet or a possibly cut start tag
+        drop = start if start >= 0 else max(len(buf) - len(start_tag), 0)
+        searched = max(len(buf) - len(end_tag) + 1 - drop, 0)
+        del buf[:drop]
+        buf += chunk
+        buf_offset += drop
+
+
+def parse_frame_set_header(header):
+    """Returns the attributes of a FrameSet opening tag as a dictionary."""
+    return {key.decode(): value.decode() for key, value in
+            re.findall(br'([\w:-]+)\s*=\s*["\']([^"\']*)["\']', header)}
+
+
+_FRAME_ATTRS = ('N', 'T', 'X', 'Y', 'Z', 'BallPossession', 'BallStatus')
+
+# patterns pulling out the values of the frame attributes as the DFL
+# writes them, one space before and double quotes
+frame_attr_patterns = {attr: re.compile(br' ' + attr.encode() + br'="([^"]*)"')
+        for attr in _FRAME_ATTRS}
+
+# slower patterns for any whitespace and either quote style as xml allows
+frame_attr_patterns_xml = {attr: re.compile(br'\s' + attr.encode() +
+    br'\s*=\s*["\']([^"\']*)["\']') for attr in _FRAME_ATTRS}
+
+
+def frame_attr_values(body, attr, no_frames):
+    """Values of a frame attribute of all frames in body.
+
+    Args:
+        body: bytes between the FrameSet opening and closing tags.
+        attr: name of the frame attribute.
+        no_frames: number of frames in body.
+    Returns:
+        A list with the value bytes per frame.
+    """
+    values = frame_attr_patterns[attr].findall(body)
+    if len(values) != no_frames:
+        values = frame_attr_patterns_xml[attr].findall(body)
+    if len(values) != no_frames:
+        raise ValueError('Frame attribute %s found in %d of %d frames of a '
+                'FrameSet, use the sax engine for this file.' % (attr,
+                    len(values), no_frames))
+    return values
+
+
+def frame_set_to_array(body, attrs):
+    """Converts the frames of a FrameSet block into a numpy array.
+
+    Args:
+        body: bytes between the FrameSet opening and closing tags.
+        attrs: names of the frame attributes, one per column.
+    Returns:
+        A float32 numpy array with one row per frame.
+    """
+    no_frames = body.count(b'<Frame')
+    data = np.empty((no_frames, len(attrs)), dtype='float32')
+    for i, attr in enumerate(attrs):
+        # one column at a time to keep only one list of matches alive
+        data[:,i] = frame_attr_values(body, attr, no_frames)
+    return data
+
+
+def convert_frame_set_body(body, is_ball):
+    """Converts a FrameSet body into the frame data and the timestamps.
+
+    Args:
+        body: bytes between the FrameSet opening and closing tags.
+        is_ball: flag whether the FrameSet belongs to the ball.
+    Returns:
+        A tuple with the float32 frame array, with the columns used by
+        MatchPositionParser, and a DatetimeIndex with the frame timestamps
+        for the ball or None for players.
+    """
+    if is_ball:
+        return (frame_set_to_array(body, MatchPositionScanner.ball_attrs),
+                convert_time_stamps(frame_attr_values(body, 'T',
+                    body.count(b'<Frame'))))
+    return frame_set_to_array(body, MatchPositionScanner.player_attrs), None
+
+
+def iter_frame_sets(match_pos_file, match, teams):
+    """Yields the FrameSets of a DFL position file one at a time.
+
+    The FrameSets are converted when their closing tag is read and
+    nothing is kept afterwards, so memory stays at about one FrameSet
+    independent of the file size.
+
+    Args:
+        match_pos_file: path or file object of the PositionData file.
+        match: match information dictionary.
+        teams: team information dictionary.
+    Returns:
+        A generator with a (person_id, team_role, section, frames, position)
+        tuple per FrameSet. team_role is 'home', 'guest' or 'ball', section
+        '1st' or '2nd' and frames the float32 array with the columns used
+        by MatchPositionParser. position is the playing position for
+        players and the DatetimeIndex of the frame timestamps for the ball.
+    """
+    with compression.open_source(match_pos_file) as fid:
+        for _, header, body in iter_frame_set_blocks(fid):
+            attrs = parse_frame_set_header(header)
+            person_id = attrs['PersonId']
+            section = '1st' if attrs['GameSection'] == 'firstHalf' else '2nd'
+            is_ball = attrs['TeamId'].upper() == "BALL"
+            data, timestamps = convert_frame_set_body(body, is_ball)
+            del body
+            if is_ball:
+                yield person_id, 'ball', section, data, timestamps
+            else:
+                team_role, position = lookup_player(match, teams,
+                        attrs['TeamId'], person_id)
+                yield person_id, team_role, section, data, position
+
+
+class MatchPositionParallelParser(MatchPositionScanner):
+    """
+    A parallel parser for the position data.
+
+    Returns the same data as MatchPositionParser. The file is indexed
+    once with index_frame_sets, the FrameSets are cut into byte ranges
+    at Frame boundaries and the ranges are converted in a process pool
+    in the same way as MatchPositionScanner does it. The results are
+    stitched back together in file order. Compressed files and file
+    objects offer no random access and are read by the
+    MatchPositionScanner in a single pass instead.
+    """
+    def __init__(self, match, teams, processes = None):
+        """Initialization of attributes.
+
+        Args:
+            match: match information dictionary.
+            teams: team information dictionary.
+            processes: number of worker processes, defaults to the
+                number of cpus.
+        """
+        MatchPositionParser.__init__(self, match, teams)
+        self.processes = processes or os.cpu_count()
+
+    def run(self, fname, trace = True):
+        """Starts parsing fname.
+
+        Args:
+            fname: path or file object, may be compressed.
+            trace: flag whether to print reading statements.
+        Returns:
+            Nothing
+        """
+        if not compression.is_plain_file(fname):
+            MatchPositionScanner.run(self, fname, trace)
+            return
+        with instrument.stage('frame set index', os.path.getsize(fname), trace):
+            index = index_frame_sets(fname)
+        self.run_index(fname, index, trace)
+
+    def run_index(self, fname, index, trace = True):
+        """Parses the FrameSets of fname listed in index.
+
+        Args:
+            fname: filepath of the file.
+            index: list of FrameSet ranges as obtained from
+                index_frame_sets, possibly filtered or narrowed.
+            trace: flag whether to print reading statements.
+        Returns:
+            Nothing
+        """
+        # about four ranges per process to balance the load
+        total = sum(stop - start for start, stop, _ in index)
+        max_bytes = max(total // (4 * self.processes), 2**16)
+        with instrument.stage('position data', total, trace):
+            self.convert_ranges(fname, index, max_bytes)
+
+    def convert_ranges(self, fname, index, max_bytes):
+        """Converts the FrameSets listed in index, see run_index.
+
+        Args:
+            fname: filepath of the file.
+            index: list of FrameSet ranges.
+            max_bytes: approximate maximum size of a task.
+        Returns:
+            Nothing
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        tasks = []
+        for i, (start, stop, attrs) in enumerate(index):
+            is_ball = attrs['TeamId'].upper() == "BALL"
+            for range_start, range_stop in split_frame_set_range(
+                    fname, start, stop, max_bytes):
+                tasks.append((i, fname, range_start, range_stop, is_ball))
+        if self.processes > 1:
+            with ProcessPoolExecutor(self.processes) as pool:
+                parts = list(pool.map(parse_frame_set_range, tasks,
+                    chunksize = max(len(tasks) // (4 * self.processes), 1)))
+        else:
+            parts = [parse_frame_set_range(task) for task in tasks]
+        frame_sets = [[] for _ in index]
+        for task, part in zip(tasks, parts):
+            frame_sets[task[0]].append(part)
+        for (start, stop, attrs), frame_set in zip(index, frame_sets):
+            data, timestamps = zip(*frame_set)
+            data = data[0] if len(data) == 1 else np.concatenate(data)
+            if attrs['TeamId'].upper() == "BALL":
+                timestamps = timestamps[0].append(list(timestamps[1:]))
+            else:
+                timestamps = None
+            instrument.progress(data.shape[0], stop - start, attrs['PersonId'])
+            self.add_frame_set(attrs['PersonId'], attrs['TeamId'],
+                    attrs['GameSection'], data, timestamps)
+
+
+def index_frame_sets(fname):
+    """Indexes the FrameSets of a DFL position file.
+
+    A plain file is memory mapped and only searched for the FrameSet
+    opening and closing tags, the frames in between are neither copied
+    nor converted. Compressed files and file objects have no random
+    access, they are read through iter_frame_set_blocks instead.
+
+    Args:
+        fname: path or file object of the position file.
+    Returns:
+        A list with a (start, stop, attrs) tuple per FrameSet in file
+        order. start and stop are the byte positions of the FrameSet
+        body, attrs the attribute dictionary of the opening tag.
+    """
+    index = []
+    if not compression.is_plain_file(fname):
+        with compression.open_source(fname) as fid:
+            for offset, header, body in iter_frame_set_blocks(fid):
+                start = offset + len(header)
+                index.append((start, start + len(body),
+                    parse_frame_set_header(header)))
+        return index
+    import mmap
+
+    start_tag, end_tag = b'<FrameSet', b'</FrameSet>'
+    with open(fname, 'rb') as fid:
+        if os.fstat(fid.fileno()).st_size == 0:
+            return index
+        with mmap.mmap(fid.fileno(), 0, access = mmap.ACCESS_READ) as data:
+            pos = data.find(start_tag)
+            while pos >= 0:
+                head_end = data.find(b'>', pos) + 1
+                end = data.find(end_tag, head_end)
+                if head_end == 0 or end < 0:
+                    raise ValueError('Unclosed FrameSet at byte %d' % pos)
+                index.append((head_end, end,
+                    parse_frame_set_header(data[pos:head_end])))
+                pos = data.find(start_tag, end + len(end_tag))
+    return index
+
+
+def split_frame_set_range(fname, start, stop, max_bytes):
+    """Splits a FrameSet body into ranges at Frame boundaries.
+
+    Args:
+        fname: filepath of the position file.
+        start: byte position of the FrameSet body.
+        stop: byte position of the FrameSet closing tag.
+        max_bytes: approximate maximum size of a range.
+    Returns:
+        A list of (start, stop) tuples covering the body.
+    """
+    if stop - start <= max_bytes:
+        return [(start, stop)]
+    ranges = []
+    with open(fname, 'rb') as fid:
+        while stop - start > max_bytes:
+            fid.seek(start + max_bytes)
+            tail = fid.read(min(2**12, stop - start - max_bytes))
+            cut = tail.find(b'<Frame')
+            if cut < 0:
+                break
+            ranges.append((start, start + max_bytes + cut))
+            start += max_bytes + cut
+    ranges.append((start, stop))
+    return ranges
+
+
+def parse_frame_set_range(task):
+    """Converts the frames in a byte range of a position file.
+
+    Worker function of MatchPositionParallelParser.
+
+    Args:
+        task: tuple with (FrameSet number, filepath, start, stop, is_ball).
+    Returns:
+        A tuple with the frame data array and the ball timestamps or None.
+    """
+    _, fname, start, stop, is_ball = task
+    with open(fname, 'rb') as fid:
+        fid.seek(start)
+        body = fid.read(stop - start)
+    return convert_frame_set_body(body, is_ball)
+
+
+def select_frame_sets(index, match, person_ids = None, team_role = None,
+        game_section = None, ball = True):
+    """Filters a FrameSet index by the FrameSet attributes.
+
+    Args:
+        index: FrameSet index as obtained from index_frame_sets.
+        match: match information dictionary.
+        person_ids: list of PersonIds to keep, None keeps all players.
+        team_role: 'home' or 'guest' to keep only one team.
+        game_section: 'firstHalf' or 'secondHalf' to keep only one half.
+        ball: flag whether the ball FrameSets are kept.
+    Returns:
+        The filtered index.
+    """
+    if team_role not in (None, 'home', 'guest'):
+        raise ValueError('Unknown team role: %s' % team_role)
+    selected = []
+    for entry in index:
+        attrs = entry[2]
+        if game_section is not None and attrs['GameSection'] != game_section:
+            continue
+        if attrs['TeamId'].upper() == "BALL":
+            if ball:
+                selected.append(entry)
+            continue
+        if person_ids is not None and attrs['PersonId'] not in person_ids:
+            continue
+        if team_role is not None and (attrs['TeamId'] ==
+                match['home']) != (team_role == 'home'):
+            continue
+        selected.append(entry)
+    return selected
+
+
+def narrow_frame_sets(fname, index, first, last):
+    """Narrows the FrameSet ranges to the frames first <= N <= last.
+
+    The frames in a FrameSet are ordered by their frame number, so the
+    bounds are found by bisecting over the byte positions. Only a few
+    frames per FrameSet are looked at.
+
+    Args:
+        fname: filepath of the position file.
+        index: FrameSet index as obtained from index_frame_sets.
+        first: first frame number to keep.
+        last: last frame number to keep.
+    Returns:
+        The index with narrowed (start, stop) ranges.
+    """
+    import mmap
+
+    def first_frame_from(pos, stop):
+        """Frame number of the first Frame starting at or after pos."""
+        pos = data.find(b'<Frame', pos, stop)
+        if pos < 0:
+            return float('inf')
+        return float(frame_attr_patterns_xml['N'].search(data, pos, stop).group(1))
+
+    def lower_bound(start, stop, value):
+        """Byte position of the first Frame with N >= value."""
+        lo, hi = start, stop
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if first_frame_from(mid, stop) >= value:
+                hi = mid
+            else:
+                lo = mid + 1
+        pos = data.find(b'<Frame', lo, stop)
+        return stop if pos < 0 else pos
+
+    narrowed = []
+    with open(fname, 'rb') as fid:
+        data = mmap.mmap(fid.fileno(), 0, access = mmap.ACCESS_READ)
+        try:
+            for start, stop, attrs in index:
+                narrowed.append((lower_bound(start, stop, first),
+                    lower_bound(start, stop, last + 1), attrs))
+        finally:
+            data.close()
+    return narrowed
+
+
+def get_position_selection(match_pos_file, match, teams, person_ids = None,
+        team_role = None, game_section = None, frames = None, ball = True,
+        processes = 1, trace = False):
+    """Loads only a selection of the DFL position data.
+
+    FrameSets which are not selected are skipped without reading their
+    frames and frames outside of the frame interval are not converted.
+
+    Args:
+        match_pos_file: path or file object of the PositionData file.
+        match: match information dictionary.
+        teams: team information dictionary.
+        person_ids: list of PersonIds to load, None loads all players.
+        team_role: 'home' or 'guest' to load only one team.
+        game_section: 'firstHalf' or 'secondHalf' to load only one half.
+        frames: tuple (first, last) with the frame numbers to load.
+        ball: flag whether the ball data is loaded.
+        processes: number of worker processes.
+        trace: flag whether to print reading statements.
+    Returns:
+        The player position data, the ball data and the ball timestamps
+        as returned by MatchPositionParser.getPositionInformation
+        restricted to the selection.
+    """
+    if not compression.is_plain_file(match_pos_file):
+        return get_position_selection_from_stream(match_pos_file, match,
+                teams, person_ids, team_role, game_section, frames, ball, trace)
+    index = select_frame_sets(index_frame_sets(match_pos_file), match,
+            person_ids, team_role, game_section, ball)
+    if frames is not None:
+        index = narrow_frame_sets(match_pos_file, index, *frames)
+    mpp = MatchPositionParallelParser(match, teams, processes)
+    mpp.run_index(match_pos_file, index, trace)
+    return mpp.getPositionInformation()
+
+
+def get_position_selection_from_stream(match_pos_file, match, teams,
+        person_ids = None, team_role = None, game_section = None,
+        frames = None, ball = True, trace = False):
+    """Loads a selection of the DFL position data in a single pass.
+
+    Used by get_position_selection for compressed files and file objects.
+    All FrameSets are read but only the selected ones are converted.
+
+    Args:
+        see get_position_selection.
+    Returns:
+        see get_position_selection.
+    """
+    mpp = MatchPositionParser(match, teams)
+    with compression.open_source(match_pos_file) as fid, \
+            instrument.stage('position data', None, trace):
+        for _, header, body in iter_frame_set_blocks(fid):
+            attrs = parse_frame_set_header(header)
+            if not select_frame_sets([(0, 0, attrs)], match, person_ids,
+                    team_role, game_section, ball):
+                continue
+            data, timestamps = convert_frame_set_body(body,
+                    attrs['TeamId'].upper() == "BALL")
+            del body
+            if frames is not None:
+                keep = (data[:,0] >= frames[0]) & (data[:,0] <= frames[1])
+                data = data[keep]
+                if timestamps is not None:
+                    timestamps = timestamps[keep]
+            instrument.progress(data.shape[0], 0, attrs['PersonId'])
+            mpp.add_frame_set(attrs['PersonId'], attrs['TeamId'],
+                    attrs['GameSection'], data, timestamps)
+    return mpp.getPositionInformation()
+
+
+position_engines = {
+    'sax': MatchPositionParser,
+    'scan': MatchPositionScanner,
+    'parallel': MatchPositionParallelParser
+}
+
 def correct_substitions():
     """Correct position data overlap during substitions.
 
@@ -377,16 +1167,54 @@ def correct_substitions():
     """
     pass
 
-def get_df_from_files(match_info_file, match_pos_file, trace = True):
+def run(match_info_file, match_pos_file, trace = True, engine = 'sax',
+        cache = None):
+    """Driver function to run data loading of DFL data.
+
+    Args:
+        match_info_file: path or file object of the MatchInformation file.
+        match_pos_file: path or file object of the PositionData file.
+        trace: Enable loading trace on dfl-parser.
+        engine: position parser to use, see position_engines.
+        cache: optional cache.MatchCache, a cached result is returned
+            without parsing the files.
+    Returns:
+        pos_data: position data struct, see MatchPositionParser
+        ball: list with ball data for both halves
+        timestamps: list with ball time stamps for both halves
+        match: match information dictionary
+        teams: team information dictionary
+    """
+    import footballpy.fs.loader.cache as fcache
+
+    def load():
+        mip = MatchInformationParser()
+        mip.run(match_info_file)
+        teams, match = mip.getTeamInformation()
+        mpp = position_engines[engine](match, teams)
+        mpp.run(match_pos_file, trace = trace)
+        pos_data, ball_data, timestamps = mpp.getPositionInformation()
+        return pos_data, ball_data, timestamps, match, teams
+
+    with instrument.stage('dfl match', trace = trace):
+        return fcache.cached(cache, 'dfl', [match_info_file, match_pos_file], load)
+
+def get_df_from_files(match_info_file, match_pos_file, trace = True,
+        engine = 'sax', cache = None):
     """Wrapper function to get a pandas dataframe from DFl position data. 
 
     This function is meant as an outside API to load position data from
     DFL files.
 
     Args:
-        match_info_file: full path to the MatchInformation file.
-        match_pos_file: full path to the PositionData file.
+        match_info_file: path or file object of the MatchInformation file.
+        match_pos_file: path or file object of the PositionData file.
         trace: Enable loading trace on dfl-parser.
+        engine: position parser to use, one of position_engines:
+            'sax' (default), 'scan' (about 4 times faster, 760k
+            against 180k frames/s in bench_dfl_position) or
+            'parallel' (scan on all cpus).
+        cache: optional cache.MatchCache for the parsed files.
     Returns:
         A tuple with a Pandas dataframe with the position data,
         the teams information dictionary, and
@@ -394,15 +1222,10 @@ def get_df_from_files(match_info_file, match_pos_file, trace = True):
     """
     import footballpy.fs.loader.papi as papi
 
-    mip = MatchInformationParser()
-    mip.run(match_info_file)
-    teams, match = mip.getTeamInformation()
-
-    mpp = MatchPositionParser(match, teams)
-    mpp.run(match_pos_file, trace = trace)
-    pos_data, ball_data, timestamps = mpp.getPositionInformation()
+    pos_data, ball_data, timestamps, match, teams = run(match_info_file,
+            match_pos_file, trace, engine, cache)
     pos_df = papi.pos_data_to_df(pos_data, ball_data)
-    timestamps_concatenated = timestamps[0] + timestamps[1]
+    timestamps_concatenated = timestamps[0].append(timestamps[1])
     assert(len(timestamps_concatenated) == pos_df.shape[0])
     pos_df['time'] = timestamps_concatenated
     return pos_df, teams, match
@@ -417,7 +1240,8 @@ def get_match_info(match_info_file):
     """
     from lxml import etree
 
-    root = etree.parse(match_info_file).getroot()
+    with compression.open_source(match_info_file) as fid:
+        root = etree.parse(fid).getroot()
     match = dict()
     general_element = root.xpath('//MatchInformation/General')[0]
     match['game_name'] = general_element.get('GameTitle')
@@ -459,7 +1283,8 @@ def get_team_info(match_info_file):
         player['position'] = player_items['PlayingPosition'] if 'PlayingPosition' in player_items else ''
         return player
 
-    root = etree.parse(match_info_file).getroot()
+    with compression.open_source(match_info_file) as fid:
+        root = etree.parse(fid).getroot()
     team = dict()
     team['home'] = [process_player(player) for player in root.xpath('//Teams/Team[@Role="home"]/Players/Player')]
     team['away'] = [process_player(player) for player in root.xpath('//Teams/Team[@Role="guest"]/Players/Player')]
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+flood_array: Growing row buffers for data arriving in pieces.
+
+FloodColumns stores rows of several typed columns, e.g. an int frame
+counter together with float32 positions, each column in its own
+contiguous array:
+
+    buf = FloodColumns([('frame', np.int32), ('xy', np.float32, (23, 2))])
+    buf.push(10000, xy)
+    buf.extend(frames, positions)
+    frames, positions = buf.column('frame'), buf.column('xy')
+
+The capacity grows geometrically such that appending n rows one at a time
+costs amortized O(n) copies. A grown buffer is reallocated and never
+resized in place, therefore the read-only views handed out by column and
+data stay valid and only change where rows are overwritten with update.
+discard drops the oldest rows for a rolling window, their space is
+reclaimed on the next growth.
+
+FloodArray is the single column float matrix of the former
+single_frame_parser.FloodArray.
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+import numpy as np
+
+
+class FloodColumns(object):
+    """Stores consecutive rows of typed columns.
+
+    Attributes:
+        names: column names in order.
+        dtype: structured numpy dtype describing one row.
+
+    Args:
+        columns: list of (name, dtype) or (name, dtype, shape) tuples
+            like for a structured numpy dtype.
+        max_rows: initial number of rows { default: 1024 }
+        expand_step: minimum number of rows added when the buffer
+            grows. { default: 1024 }
+        growth: factor the capacity is multiplied with when the buffer
+            grows. { default: 2.0 }
+    """
+
+    def __init__(self, columns, max_rows = 1024, expand_step = 1024, growth = 2.0):
+        if growth <= 1.0:
+            raise ValueError('growth has to be larger than 1.')
+        self.dtype = np.dtype(list(columns))
+        self.names = self.dtype.names
+        self.expand = max(expand_step, 1)
+        self.growth = growth
+        self._initial_rows = max_rows
+        self._start = 0
+        self._length = 0
+        self._arrays = self._allocate(max_rows)
+
+    def _allocate(self, no_rows):
+        """New, empty arrays for all columns with no_rows rows."""
+        arrays = []
+        for name in self.names:
+            field = self.dtype.fields[name][0]
+            arrays.append(np.empty((no_rows,) + field.shape, field.base))
+        return arrays
+
+    def __len__(self):
+        return self._length - self._start
+
+    @property
+    def capacity(self):
+        """Number of rows which fit without growing."""
+        return self._arrays[0].shape[0]
+
+    def reserve(self, no_rows):
+        """Grows the buffer such that it holds at least no_rows rows.
+
+        Args:
+            no_rows: total number of rows.
+        Returns:
+            Nothing
+        """
+        capacity = self.capacity
+        if self._start + no_rows <= capacity:
+            return
+        if no_rows > capacity:
+            capacity = max(no_rows, int(capacity * self.growth), capacity + self.expand)
+        else:
+            # discarded rows block the end, keep room for further rows
+            capacity = max(capacity, int(no_rows * self.growth))
+        arrays = self._allocate(capacity)
+        for new, old in zip(arrays, self._arrays):
+            new[:len(self)] = old[self._start:self._length]
+        self._arrays = arrays
+        self._length = len(self)
+        self._start = 0
+
+    def push(self, *values):
+        """Appends one row.
+
+        Args:
+            values: one value per column in column order.
+        Returns:
+            Nothing
+        """
+        if len(values) != len(self._arrays):
+            raise ValueError('Expected %d columns, got %d.' % (len(self._arrays),
+                len(values)))
+        if self._length == self._arrays[0].shape[0]:
+            self.reserve(len(self) + 1)
+        for array, value in zip(self._arrays, values):
+            array[self._length] = value
+        self._length += 1
+
+    def extend(self, *columns):
+        """Appends many rows at once.
+
+        Args:
+            columns: one array per column in column order, all with the
+                same number of rows.
+        Returns:
+            Nothing
+        """
+        if len(columns) != len(self._arrays):
+            raise ValueError('Expected %d columns, got %d.' % (len(self._arrays),
+                len(columns)))
+        columns = [np.asarray(c) for c in columns]
+        no_rows = len(columns[0])
+        if any(len(c) != no_rows for c in columns):
+            raise ValueError('All columns need the same number of rows.')
+        self.reserve(len(self) + no_rows)
+        for array, values in zip(self._arrays, columns):
+            array[self._length:self._length + no_rows] = values
+        self._length += no_rows
+
+    def update(self, rows, name, values):
+        """Overwrites rows of a column in place.
+
+        The views handed out before show the new values as long as the
+        buffer did not grow since.
+
+        Args:
+            rows: row index or indices, counted from the oldest row.
+            name: column name.
+            values: new values.
+        Returns:
+            Nothing
+        """
+        rows = np.asarray(rows)
+        if np.any((rows < 0) | (rows >= len(self))):
+            raise IndexError('Row out of range.')
+        self._arrays[self.names.index(name)][self._start + rows] = values
+
+    def column(self, name):
+        """Read-only view on the rows of a column.
+
+        Args:
+            name: column name.
+        Returns:
+            A numpy array without copying the data.
+        """
+        view = self._arrays[self.names.index(name)][self._start:self._length]
+        view.flags.writeable = False
+        return view
+
+    def data(self):
+        """Read-only views on all columns.
+
+        Returns:
+            A dictionary from column name to the view of the column.
+        """
+        return dict((name, self.column(name)) for name in self.names)
+
+    def discard(self, no_rows):
+        """Removes the oldest rows.
+
+        Args:
+            no_rows: number of rows to remove from the begin.
+        Returns:
+            Nothing
+        """
+        self._start = min(self._start + max(no_rows, 0), self._length)
+
+    def clear(self):
+        """Removes all rows, views handed out before keep their data."""
+        self._start = 0
+        self._length = 0
+        self._arrays = self._allocate(self._initial_rows)
+
+
+class FloodArray(FloodColumns):
+    """Stores consecutive vectors into a matrix.
+
+    Just a thin wrapper to a numpy array useful when
+    it is not clear how many points are needed but all points
+    should be stored consecutively.
+    Attributes:
+        max_rows: current maximum number of rows in matrix.
+        no_cols: number of cols.
+        array: underlying numpy array
+        current_row: running counter storing current position
+    """
+
+    def __init__(self, max_rows=10000, no_cols=4, expand_step=1000,
+            dtype=np.float64):
+        """ Constructor method.
+
+        Args:
+            max_rows: initial number of rows { default: 10000 }
+            no_cols: number of columns { default: 4}
+            expand_step: minimum number of rows the matrix is expanded
+                      when maximum row size is reached. { default: 1000 }
+            dtype: type of the entries { default: float64 }
+        Returns:
+            Nothing
+        """
+        FloodColumns.__init__(self, [('data', dtype, (no_cols,))],
+                max_rows, expand_step)
+        self.no_cols = no_cols
+
+    @property
+    def max_rows(self):
+        return self.capacity
+
+    @property
+    def array(self):
+        return self._arrays[0]
+
+    @property
+    def current_row(self):
+        return len(self)
+
+    def push(self, data):
+        """Pushes a new vector onto the matrix.
+
+        Args:
+            data: a new vector.
+        Returns:
+            Nothing
+        """
+        array = self._arrays[0]
+        if self._length == array.shape[0]:
+            self.reserve(len(self) + 1)
+            array = self._arrays[0]
+        array[self._length] = data
+        self._length += 1
+
+    def extend(self, rows):
+        """Pushes many vectors at once.
+
+        Args:
+            rows: matrix with one vector per row.
+        Returns:
+            Nothing
+        """
+        FloodColumns.extend(self, rows)
+
+    def data(self):
+        """Returns the current data.
+        Args:
+            Nothing
+        Returns:
+            A read-only numpy matrix view containing the data.
+        """
+        return self.column('data')
@@ -5,19 +5,25 @@ impire_parser : Module which provides parsing function for Soccer
             position data based on the impire format.
         Individual parsers are provided for
             general match information data, match event data,
-            and match position data.
+            and match position data. All files can be passed as path
+            or file object and gzip, bz2 or xz compressed.
 
 @author: rein
 @license: MIT
 @version 0.1
 """
 
+import io
 import os
+import functools
+import itertools
 from xml.sax import make_parser, ContentHandler
 from xml.sax.handler import feature_external_ges
 import numpy as np
 import dateutil.parser as dup
 from lxml import etree
+import footballpy.fs.instrument as instrument
+import footballpy.fs.loader.compression as compression
 # import pdb
 
 class MatchInformationParser(ContentHandler):
@@ -143,13 +149,13 @@ class MatchInformationParser(ContentHandler):
 
     def run(self, fname):
         """Runs the parse on fname."""
-        print('Start reading in match information')
         parser = make_parser()
         parser.setContentHandler(self)
         # prevent external DTD load
         parser.setFeature(feature_external_ges, False)
-        parser.parse(fname)
-        print('finished parsing match information')
+        with compression.open_source(fname) as fid, \
+                instrument.stage('match information'):
+            parser.parse(fid)
 
 class MatchEventParser(ContentHandler):
     """XML parser for the event(action) impire data.
@@ -193,7 +199,8 @@ class MatchEventParser(ContentHandler):
         parser = make_parser()
         parser.setContentHandler(self)
         parser.setFeature(feature_external_ges, False)
-        parser.parse(match_event_file)
+        with compression.open_source(match_event_file) as fid:
+            parser.parse(fid)
 
     def getEvents(self):
         """Returns the parsed data."""
@@ -201,10 +208,338 @@ class MatchEventParser(ContentHandler):
 
 
 
-def read_in_position_data(fname):
+# MAGIC NUMBERS
+_MISSING_ = -10000.0
+NO_PLAYER = 11
+NO_REFEREE = 3
+NO_DIM = 3      # FRAME, X, Y
+# NO_DIM_BALL = 6     # FRAME, X, Y, Z, POSSESSION, STATUS
+
+# delimiters of a .pos line, sections are separated by '#':
+# 0: Frame, 1: Home, 2: Guest, 3: Referee, 4: Ball, 5: Stadium (first line)
+_NEWLINE, _SECTION, _ITEM, _FIELD, _CR = 1, 2, 3, 4, 5
+_DELIMITERS = np.zeros(256, np.int8)
+for _c, _kind in ((b'\n', _NEWLINE), (b'#', _SECTION), (b';', _ITEM),
+        (b',', _FIELD), (b'\r', _CR)):
+    _DELIMITERS[ord(_c)] = _kind
+_TO_SPACE = bytes.maketrans(b'\n#;,\r', b'     ')
+_TO_FIELD = bytes.maketrans(b';', b',')
+# ball fields x, y, z, speed, status, possession to ball columns
+_BALL_COLUMNS = np.array([1, 2, 3, -1, 5, 4])
+
+
+def _segment_index(counter, reset):
+    """Counter relative to its value at the last reset position."""
+    return counter - np.maximum.accumulate(np.where(reset, counter, 0))
+
+
+def tokenize_lines(buf):
+    """Converts complete lines of a pos file into numbers.
+
+        Every number is located by its line, the '#' section within the
+        line, the ';' item within the section and the ',' field within
+        the item.
+        Args:
+            buf: bytes starting at a line start.
+        Returns:
+            A tuple of numpy arrays (values, line, section, item, field)
+            with one entry per number.
+    """
+    arr = np.frombuffer(buf, np.uint8)
+    delim = np.flatnonzero(_DELIMITERS[arr])
+    # a virtual newline precedes buf, numbers lie between two delimiters
+    kind = np.concatenate(([_NEWLINE], _DELIMITERS[arr[delim]]))
+    start = np.concatenate(([-1], delim))
+    is_token = np.diff(np.append(start, len(arr))) > 1
+    line = np.cumsum(kind == _NEWLINE) - 1
+    section = _segment_index(np.cumsum(kind == _SECTION), kind == _NEWLINE)
+    item = _segment_index(np.cumsum(kind == _ITEM),
+            (kind == _NEWLINE) | (kind == _SECTION))
+    field = _segment_index(np.cumsum(kind == _FIELD),
+            (kind >= _NEWLINE) & (kind <= _ITEM))
+    values = np.array(bytes(buf).translate(_TO_SPACE).split(), dtype = float)
+    if len(values) != np.count_nonzero(is_token):
+        raise ValueError('Malformed position data.')
+    return (values, line[is_token], section[is_token], item[is_token],
+            field[is_token])
+
+
+def _used_tokens(section, item, field, referees = False):
+    """Mask of the tokens which end up in the position arrays."""
+    used = (((section == 0) & (item == 0) & ((field == 0) | (field == 2)))
+            | (((section == 1) | (section == 2)) & (item < NO_PLAYER)
+                & (field < NO_DIM))
+            | ((section == 4) & (field < len(_BALL_COLUMNS))
+                & (_BALL_COLUMNS[np.minimum(field, len(_BALL_COLUMNS) - 1)] >= 0)))
+    if referees:
+        used |= (section == 3) & (item < NO_REFEREE) & (field < NO_DIM - 1)
+    return used
+
+
+def read_regular_lines(buf, no_lines, referees = False):
+    """Reads lines which all share the layout of the first line.
+
+        The numbers of such lines are converted by the C parser of
+        numpy.loadtxt, only for the columns which are used.
+        Args:
+            buf: bytes with complete lines.
+            no_lines: number of lines in buf.
+            referees: flag whether the referee columns are used.
+        Returns:
+            A tuple (values, section, item, field) with values of shape
+            (no_lines, columns) and the location of every column in the
+            line, or None if the lines differ in their layout.
+    """
+    if not buf.endswith(b'#\n'):
+        return None
+    arr = np.frombuffer(buf, np.uint8)
+    hashes = np.flatnonzero(arr == ord('#'))
+    if (len(hashes) != 5 * no_lines or
+            np.any(arr[hashes[4::5] + 1] != ord('\n'))):
+        return None
+    # number of players, referees ... in every section of every line
+    semicolons = np.flatnonzero(arr == ord(';'))
+    items = np.diff(np.searchsorted(semicolons, hashes), prepend = 0)
+    items.shape = (no_lines, 5)
+    if np.any(items != items[0]):
+        return None
+    _, _, section, item, field = tokenize_lines(buf[:buf.index(b'\n') + 1])
+    used = _used_tokens(section, item, field, referees)
+    text = buf.translate(_TO_FIELD, b'#').replace(b',\n', b'\n')
+    try:
+        values = np.loadtxt(io.BytesIO(text), delimiter = ',',
+                usecols = np.flatnonzero(used), ndmin = 2)
+    except ValueError:
+        # the number of fields differs between lines
+        return None
+    return values, section[used], item[used], field[used]
+
+
+def convert_lines(buf, referees = False):
+    """Converts complete lines of a pos file into the position arrays.
+
+        Args:
+            buf: bytes starting at a line start.
+            referees: flag whether the referee section is converted,
+                it is skipped at no cost otherwise.
+        Returns:
+            tuple with six entries:
+            [0] = data for home team
+            [1] = data for guest team
+            [2] = data for ball
+            [3] = half time index
+            [4] = stadium dictionary or None if the first line of buf
+                  carries no stadium specification
+            [5] = data for referees, shaped like the team data with the
+                  referee number 1, 2, 3 in place of the trikot, or None
+    """
+    no_lines = buf.count(b'\n') + (0 if buf.endswith(b'\n') else 1)
+    regular = read_regular_lines(buf, no_lines, referees)
+    if regular is not None:
+        values, section, item, field = regular
+        line = None
+    else:
+        values, line, section, item, field = tokenize_lines(buf)
+
+    def pick(mask):
+        """Lines and values of the tokens in mask."""
+        if line is None:
+            return slice(None), values[:, mask]
+        return line[mask], values[mask]
+
+    home_team = np.full((no_lines, NO_PLAYER, NO_DIM), _MISSING_)
+    guest_team = home_team.copy()
+    ball = np.full((no_lines, 6), _MISSING_)
+    half_time_id = np.full(no_lines, _MISSING_)
+    # frame index and half time index
+    sel = (section == 0) & (item == 0)
+    for col, target in ((0, ball[:, 0]), (2, half_time_id)):
+        rows, vals = pick(sel & (field == col))
+        target[rows] = vals.reshape(-1)
+    # players: id, x, y
+    for role, team in ((1, home_team), (2, guest_team)):
+        idx = (section == role) & (item < NO_PLAYER) & (field < NO_DIM)
+        rows, vals = pick(idx)
+        team[rows, item[idx], field[idx]] = vals
+    # ball: frame, x, y, z, possession, status
+    idx = (section == 4) & (field < len(_BALL_COLUMNS))
+    idx[idx] = _BALL_COLUMNS[field[idx]] >= 0
+    rows, vals = pick(idx)
+    ball[rows, _BALL_COLUMNS[field[idx]]] = vals
+    # referees: number, x, y
+    referee = None
+    if referees:
+        referee = np.full((no_lines, NO_REFEREE, NO_DIM), _MISSING_)
+        idx = (section == 3) & (item < NO_REFEREE) & (field < NO_DIM - 1)
+        rows, vals = pick(idx)
+        referee[rows, item[idx], field[idx] + 1] = vals
+        numbers = np.arange(1.0, NO_REFEREE + 1)
+        referee[:, :, 0] = np.where(referee[:, :, 1] != _MISSING_, numbers, _MISSING_)
+    # length and width of the pitch
+    stadium = None
+    if line is not None:
+        idx = (section == 5) & (line == 0)
+        specs = dict(zip(field[idx], values[idx]))
+        if 1 in specs and 2 in specs:
+            stadium = dict(length = float(specs[1]), width = float(specs[2]))
+    return home_team, guest_team, ball, half_time_id, stadium, referee
+
+
+def iter_line_blocks(fid, chunk_size = 2**24):
+    """Cuts a file into blocks of complete lines.
+
+    Args:
+        fid: file object opened in binary mode.
+        chunk_size: number of bytes read at once.
+    Returns:
+        A generator with bytes blocks ending at a line end, only the last
+        block may miss the final newline.
+    """
+    rest = b''
+    while True:
+        chunk = fid.read(chunk_size)
+        if not chunk:
+            break
+        end = chunk.rfind(b'\n') + 1
+        if end == 0:
+            rest += chunk
+            continue
+        block = rest + chunk[:end]
+        rest = chunk[end:]
+        yield block
+    if rest.strip():
+        yield rest
+
+
+def split_line_ranges(fname, start, stop, max_bytes):
+    """Splits a byte range of a file into ranges at line starts.
+
+    Args:
+        fname: filepath of the position file.
+        start: byte position of a line start.
+        stop: byte position of a line start or the file end.
+        max_bytes: approximate maximum size of a range.
+    Returns:
+        A list of (start, stop) tuples covering the range.
+    """
+    ranges = []
+    with open(fname, 'rb') as fid:
+        while stop - start > max_bytes:
+            fid.seek(start + max_bytes)
+            line = fid.readline()
+            cut = start + max_bytes + len(line)
+            if cut >= stop:
+                break
+            ranges.append((start, cut))
+            start = cut
+    ranges.append((start, stop))
+    return ranges
+
+
+def convert_line_range(task):
+    """Converts the lines in a byte range of a position file.
+
+    Worker function of iter_converted_blocks.
+
+    Args:
+        task: tuple with (filepath, start, stop, convert).
+    Returns:
+        A tuple with the number of lines and the result of convert for
+        the lines of the range.
+    """
+    fname, start, stop, convert = task
+    with open(fname, 'rb') as fid:
+        fid.seek(start)
+        buf = fid.read(stop - start)
+    return buf.count(b'\n'), convert(buf)
+
+
+def iter_converted_blocks(fname, convert = convert_lines, chunk_size = 2**24,
+        processes = 1):
+    """Converts a pos file block by block.
+
+    The first line, which carries the stadium specification, is a block
+    of its own. With several processes a plain file is cut into byte
+    ranges at line ends which are converted in a process pool,
+    compressed files and file objects are always read sequentially.
+    Args:
+        fname: path or file object of the position data file.
+        convert: picklable function converting bytes of complete
+            lines, e.g. convert_lines.
+        chunk_size: maximum number of bytes converted at once.
+        processes: number of worker processes, None uses all cpus.
+    Returns:
+        A generator with the converted blocks in file order.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    processes = processes or os.cpu_count()
+    if processes > 1 and compression.is_plain_file(fname):
+        size = os.path.getsize(fname)
+        with open(fname, 'rb') as fid:
+            first = len(fid.readline())
+        # about four ranges per process to balance the load
+        max_bytes = min(chunk_size, max((size - first) // (4 * processes), 2**16))
+        ranges = [(0, first)] + split_line_ranges(fname, first, size, max_bytes)
+        tasks = [(fname, start, stop, convert) for start, stop in ranges
+                if stop > start]
+        with ProcessPoolExecutor(processes) as pool:
+            for task, (no_lines, block) in zip(tasks,
+                    pool.map(convert_line_range, tasks)):
+                instrument.progress(no_lines, task[2] - task[1])
+                yield block
+        return
+    with compression.open_source(fname) as fid:
+        blocks = itertools.chain([fid.readline()],
+                iter_line_blocks(fid, chunk_size))
+        for block in blocks:
+            if block.strip():
+                instrument.progress(block.count(b'\n'), len(block))
+                yield convert(block)
+
+
+def parse_position_file(fname, chunk_size = 2**24, processes = 1,
+        referees = False):
+    """Reads in a pos file in one pass including the stadium header.
+
+    The file is converted in blocks of complete lines, each block with a
+    few vectorized passes over all its numbers, see
+    iter_converted_blocks.
+    Args:
+        fname: path or file object of the position data file.
+        chunk_size: number of bytes converted at once.
+        processes: number of worker processes, None uses all cpus.
+        referees: flag whether the referee data is converted.
+    Returns:
+        tuple with six entries:
+        [0] = data for home team
+        [1] = data for guest team
+        [2] = data for ball
+        [3] = half time index
+        [4] = stadium dictionary with length and width entries
+        [5] = data for referees, see convert_lines, or None
+    """
+    convert = functools.partial(convert_lines, referees = referees)
+    with instrument.stage('position data', compression.source_size(fname)):
+        parts = [p for p in iter_converted_blocks(fname, convert,
+            chunk_size, processes) if p[3].shape[0]]
+    if not parts:
+        raise ValueError('No position data in file.')
+    if len(parts) == 1:
+        return parts[0]
+    res = [np.concatenate(arrays) for arrays in zip(*[p[:4] for p in parts])]
+    res.append(parts[0][4])
+    res.append(np.concatenate([p[5] for p in parts]) if referees else None)
+    return tuple(res)
+
+
+def read_in_position_data(fname, chunk_size = 2**24, processes = 1):
     """Reads in a pos file and extract the ball/player data
+
     Args:
-		fname: name of the position data file.
+		fname: path or file object of the position data file.
+		chunk_size: number of bytes converted at once.
+		processes: number of worker processes, None uses all cpus.
     Returns:
 		tuple with four entries:
 		[0] = data for home team
@@ -212,62 +547,339 @@ def read_in_position_data(fname):
 		[2] = data for ball
 		[3] = half time index
     """
+    return parse_position_file(fname, chunk_size, processes)[:4]
 
-    print('Start reading in position data...')
 
-    # MAGIC NUMBERS
-    _MISSING_ = -10000.0
-    NO_PLAYER = 11
-    NO_DIM = 3      # FRAME, X, Y
-    # NO_DIM_BALL = 6     # FRAME, X, Y, Z, POSSESSION, STATUS
+def half_time_ranges(half_time_id):
+    """Index ranges of the game halves.
 
-    no_frames = sum([1 for f in open(fname)])
+    Args:
+        half_time_id: half time index as from read_in_position_data.
+    Returns:
+        A dictionary from half time id to a (start, stop) tuple.
+    """
+    halves = {}
+    if len(half_time_id) == 0:
+        return halves
+    bounds = np.flatnonzero(np.diff(half_time_id)) + 1
+    starts = np.concatenate(([0], bounds))
+    stops = np.concatenate((bounds, [len(half_time_id)]))
+    for start, stop in zip(starts, stops):
+        half = int(half_time_id[start])
+        if half in halves:
+            raise ValueError('Frames of half %d are not contiguous.' % half)
+        halves[half] = (int(start), int(stop))
+    return halves
+
+
+class CompactPositions(object):
+    """Compact position data of an impire match.
+
+    Every player has one column with float32 coordinates, NaN while he
+    is not on the pitch, and his shirt number is stored once per
+    column. The game halves are index ranges into the frames. Referees
+    are an optional third role with the referee numbers as trikots.
+
+    Attributes:
+        frames: int32 array with the frame number of every frame.
+        halves: dictionary from half time id to a (start, stop) range.
+        trikots: dictionary with 'home', 'guest' and optionally
+            'referee' int16 arrays with the shirt number of every column.
+        xy: dictionary with the same keys and float32 arrays of shape
+            (frames, columns, 2).
+        ball: float32 array with x, y, z, possession, status per frame.
+        stadium: stadium dictionary or None.
+    """
+    roles = ('home', 'guest')
 
-    home_team = np.ones((no_frames,NO_PLAYER, NO_DIM)) * _MISSING_
-    guest_team = home_team.copy()
-    ball = np.ones((no_frames, 6)) * _MISSING_
-    half_time_id = np.ones(no_frames) * _MISSING_
+    def __init__(self, frames, halves, trikots, xy, ball, stadium = None):
+        self.frames = frames
+        self.halves = halves
+        self.trikots = trikots
+        self.xy = xy
+        self.ball = ball
+        self.stadium = stadium
 
-    def process_player(player):
-        """Extracts information from player-pos string.
+    @classmethod
+    def from_arrays(cls, home, guest, ball, half_time_id, stadium = None,
+            referee = None):
+        """Converts the arrays of read_in_position_data.
 
-            Simple routines to just split up the string.
-            Args:
-                player: String from pos file.
-            Returns:
-                Tuple with player id, x and y position.
+        Args:
+            home, guest, ball, half_time_id: as from read_in_position_data.
+            stadium: stadium dictionary.
+            referee: referee data as from convert_lines or None.
+        Returns:
+            A CompactPositions instance.
+        """
+        trikots, xy = {}, {}
+        teams = [(role, team) for role, team in zip(cls.roles + ('referee',),
+            (home, guest, referee)) if team is not None]
+        for role, team in teams:
+            present = team[:, :, 0] != _MISSING_
+            rows = np.nonzero(present)[0]
+            trikots[role], cols = np.unique(team[:, :, 0][present].astype(np.int16),
+                    return_inverse = True)
+            xy[role] = np.full((team.shape[0], len(trikots[role]), 2), np.nan,
+                    np.float32)
+            xy[role][rows, cols] = team[:, :, 1:][present]
+        return cls(ball[:, 0].astype(np.int32), half_time_ranges(half_time_id),
+                trikots, xy, ball[:, 1:].astype(np.float32), stadium)
+
+    @classmethod
+    def concatenate(cls, parts):
+        """Joins consecutive parts of a match.
+
+        Args:
+            parts: list of CompactPositions in frame order.
+        Returns:
+            A CompactPositions instance, the stadium is taken from the
+            first part.
+        """
+        if len(parts) == 1:
+            return parts[0]
+        offsets = np.cumsum([0] + [len(p) for p in parts])
+        halves = {}
+        for part, offset in zip(parts, offsets):
+            for half, (start, stop) in sorted(part.halves.items(),
+                    key = lambda h: h[1]):
+                if half in halves and halves[half][1] != offset + start:
+                    raise ValueError('Frames of half %d are not contiguous.' % half)
+                halves[half] = (halves.get(half, (offset + start,))[0],
+                        offset + stop)
+        trikots, xy = {}, {}
+        for role in parts[0].xy:
+            trikots[role] = np.unique(np.concatenate([p.trikots[role] for p in parts]))
+            xy[role] = np.full((offsets[-1], len(trikots[role]), 2), np.nan,
+                    np.float32)
+            for part, offset in zip(parts, offsets):
+                cols = np.searchsorted(trikots[role], part.trikots[role])
+                xy[role][offset:offset + len(part)][:, cols] = part.xy[role]
+        return cls(np.concatenate([p.frames for p in parts]), halves, trikots,
+                xy, np.concatenate([p.ball for p in parts]), parts[0].stadium)
+
+    def __len__(self):
+        return self.frames.shape[0]
+
+    @property
+    def nbytes(self):
+        """Memory used by the arrays in bytes."""
+        return (self.frames.nbytes + self.ball.nbytes +
+                sum(a.nbytes for a in self.xy.values()) +
+                sum(a.nbytes for a in self.trikots.values()))
+
+    def missing(self, role):
+        """Boolean (frames, columns) mask, True while a player is off the pitch."""
+        return np.isnan(self.xy[role][:, :, 0])
+
+    def half(self, half_time_id):
+        """Slice of the frames of a game half, empty if it is missing."""
+        return slice(*self.halves.get(half_time_id, (0, 0)))
+
+    def player_positions(self, role, half_time_id):
+        """Position data per player in a game half.
+
+        Args:
+            role: 'home' or 'guest'.
+            half_time_id: 1 or 2.
+        Returns:
+            A list with a (trikot, array) tuple for every player on the
+            pitch in this half, ordered by trikot. The float32 array has
+            the frame, x and y columns for every frame he is present,
+            all arrays are slices of one contiguous block.
+        """
+        sel = self.half(half_time_id)
+        xy = self.xy[role][sel]
+        # column major such that the rows are grouped by player
+        cols, rows = np.nonzero(~np.isnan(xy[:, :, 0].T))
+        data = np.empty((len(rows), 3), np.float32)
+        data[:, 0] = self.frames[sel][rows]
+        data[:, 1:] = xy[rows, cols]
+        counts = np.bincount(cols, minlength = xy.shape[1])
+        players = np.flatnonzero(counts)
+        blocks = np.split(data, np.cumsum(counts[players])[:-1])
+        return [(int(self.trikots[role][col]), block)
+                for col, block in zip(players, blocks)]
+
+    def ball_positions(self, half_time_id):
+        """Float32 ball array with frame, x, y, z, possession and status."""
+        sel = self.half(half_time_id)
+        return np.column_stack((self.frames[sel], self.ball[sel])).astype(np.float32)
+
+
+def convert_lines_compact(buf, referees = False):
+    """Converts complete lines of a pos file into CompactPositions."""
+    return CompactPositions.from_arrays(*convert_lines(buf, referees))
+
+
+def read_compact_position_data(fname, chunk_size = 2**24, processes = 1,
+        referees = False):
+    """Reads in a pos file into CompactPositions.
+
+    Every block is compacted right after it is converted, such that the
+    full float64 arrays of read_in_position_data never exist at once.
+    Args:
+        fname: path or file object of the position data file.
+        chunk_size: number of bytes converted at once.
+        processes: number of worker processes, None uses all cpus.
+        referees: flag whether the referees are included as third role.
+    Returns:
+        A CompactPositions instance including the stadium dictionary.
+    """
+    convert = functools.partial(convert_lines_compact, referees = referees)
+    with instrument.stage('position data', compression.source_size(fname)):
+        parts = [p for p in iter_converted_blocks(fname, convert,
+            chunk_size, processes) if len(p)]
+    if not parts:
+        raise ValueError('No position data in file.')
+    return CompactPositions.concatenate(parts)
+
+
+class PositionFollower(object):
+    """Follows a pos file which is still written during a live match.
+
+    Every poll converts only the complete lines appended since the last
+    poll. All frames are kept in buffers which double when they are full
+    and the frames of the last window seconds additionally in a ring
+    buffer, such that the latest state is available without copying the
+    whole match.
+
+        follower = PositionFollower('123456.pos', window = 60.0)
+        while live:
+            follower.poll()
+            home, guest, ball, half_time_id = follower.latest(10.0)
+
+    Args:
+        fname: path of the uncompressed position file.
+        window: length of the ring buffer in seconds.
+        frame_rate: frames per second of the position data.
+        no_frames: initial number of rows of the match buffers.
+    """
+
+    def __init__(self, fname, window = 60.0, frame_rate = 25, no_frames = 2**14):
+        self.fname = fname
+        self.frame_rate = frame_rate
+        self.capacity = max(int(round(window * frame_rate)), 1)
+        self.no_frames = no_frames
+        self.reset()
+
+    def reset(self):
+        """Forgets all frames, the next poll starts at the file begin."""
+        self.offset = 0
+        self.frames = 0
+        self.stadium = None
+        self.head = None
+        self.inode = None
+        self.mtime = None
+        self._buffers = self._allocate(self.no_frames)
+        self._ring = self._allocate(self.capacity)
+
+    @staticmethod
+    def _allocate(no_frames):
+        """Home, guest, ball and half time buffers for no_frames."""
+        home_team = np.full((no_frames, NO_PLAYER, NO_DIM), _MISSING_)
+        return (home_team, home_team.copy(), np.full((no_frames, 6), _MISSING_),
+                np.full(no_frames, _MISSING_))
+
+    def poll(self):
+        """Converts the lines appended since the last poll.
+
+        A truncated or replaced file is read again from its begin. A file
+        counts as replaced when its inode or its first line changed, or
+        when it was modified without growing.
+        Returns:
+            The number of new frames.
         """
-        data = player.split(',')
-        pid = int(data[0])      # player identifier
-        x = float(data[1])      # x-position
-        y = float(data[2])      # y-position
-        return (pid,x,y)
-
-    for i,frame in enumerate(open(fname)):
-        #0: Frame, 1: Home, 2: Guest, 3: Referee, 4: Ball
-        hash_split = frame.split('#')
-        frame_specs = hash_split[0][:-1].split(',')
-        # get frame index
-        frame = int(frame_specs[0])
-        # half time index
-        half_time_id[i] = int(frame_specs[2])
-        # process home team
-        for j, player in enumerate(hash_split[1][:-1].split(';')):
-            home_team[i,j,:] = process_player(player)
-        # process guest team
-        for j,player in enumerate(hash_split[2][:-1].split(';')):
-            guest_team[i,j,:] = process_player(player)
-        # ball: frame, x, y, z, possession, status
-        ball_data = hash_split[4][:-1].split(',')
-        x = float(ball_data[0])
-        y = float(ball_data[1])
-        z = float(ball_data[2])
-        poss = float(ball_data[5])
-        status = float(ball_data[4])
-        ball[i,:] = [frame,x,y,z,poss,status]
-
-    print('finished.')
-    return home_team, guest_team, ball, half_time_id
+        with open(self.fname, 'rb') as fid:
+            stat = os.fstat(fid.fileno())
+            size = stat.st_size
+            if self.offset and self._replaced(fid, stat):
+                self.reset()
+            fid.seek(self.offset)
+            buf = fid.read(size - self.offset)
+            self.inode = stat.st_ino
+            self.mtime = stat.st_mtime_ns
+        end = buf.rfind(b'\n') + 1
+        if end == 0:
+            return 0
+        old_frames = self.frames
+        if self.offset == 0:
+            if compression.detect_compression(self.fname) is not None:
+                raise ValueError('Compressed files can not be followed.')
+            # the first line carries the stadium specification
+            first = buf.index(b'\n') + 1
+            part = convert_lines(buf[:first])
+            self.stadium = part[4]
+            self.head = buf[:first]
+            self._append(part[:4])
+            self.offset = first
+            buf = buf[first:end]
+            end -= first
+        if end:
+            self._append(convert_lines(buf[:end])[:4])
+            self.offset += end
+        return self.frames - old_frames
+
+    def _replaced(self, fid, stat):
+        """True when fid is not the file read by the previous polls."""
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            return True
+        if stat.st_size == self.offset and stat.st_mtime_ns != self.mtime:
+            return True
+        fid.seek(0)
+        return fid.read(len(self.head)) != self.head
+
+    def _append(self, arrays):
+        """Adds converted frames to the match and ring buffers."""
+        no_new = arrays[3].shape[0]
+        stop = self.frames + no_new
+        if stop > self._buffers[3].shape[0]:
+            size = max(stop, 2 * self._buffers[3].shape[0])
+            grown = self._allocate(size)
+            for new, old in zip(grown, self._buffers):
+                new[:self.frames] = old[:self.frames]
+            self._buffers = grown
+        for buf, arr in zip(self._buffers, arrays):
+            buf[self.frames:stop] = arr
+        # only the last capacity frames can end up in the ring
+        keep = min(no_new, self.capacity)
+        idx = np.arange(stop - keep, stop) % self.capacity
+        for ring, arr in zip(self._ring, arrays):
+            ring[idx] = arr[no_new - keep:]
+        self.frames = stop
+
+    def data(self):
+        """All frames read so far.
+
+        Returns:
+            tuple with read-only views, like read_in_position_data:
+            [0] = data for home team
+            [1] = data for guest team
+            [2] = data for ball
+            [3] = half time index
+        """
+        res = []
+        for buf in self._buffers:
+            view = buf[:self.frames]
+            view.flags.writeable = False
+            res.append(view)
+        return tuple(res)
+
+    def latest(self, seconds = None):
+        """The frames of the last seconds, at most the ring buffer window.
+
+        Args:
+            seconds: length of the period, None for the whole window.
+        Returns:
+            tuple with home, guest, ball and half time arrays in frame
+            order, like read_in_position_data.
+        """
+        no_frames = min(self.frames, self.capacity)
+        if seconds is not None:
+            no_frames = min(no_frames, int(round(seconds * self.frame_rate)))
+        idx = np.arange(self.frames - no_frames, self.frames) % self.capacity
+        return tuple(ring[idx] for ring in self._ring)
+
 
 def split_positions_into_game_halves(pos,ht,ball):
     """ splits the data frames into first and second halves.
@@ -293,103 +905,169 @@ def split_positions_into_game_halves(pos,ht,ball):
 def sort_position_data(pos,id=1):
     """Sorts the position data according to player and period.
 
+        The rows of all players are sorted once by a stable argsort on
+        the trikot, such that every player is a contiguous slice in
+        frame order.
         Args:
             pos: The position data as obtained from read_in_position
+            id: column with the trikot number.
         Returns:
-            A list with position data from each player.
+            A list with position data from each player, ordered by trikot.
     """
-    unique_player = np.unique(pos[:,:,id])
-    res = []
-    for pid in unique_player:
-        res.append(pos[pos[:,:,id]==pid])
-    return res
+    flat = pos.reshape(-1, pos.shape[-1])
+    if flat.shape[0] == 0:
+        return []
+    keys = flat[:,id]
+    # trikots are small integers which allow the faster radix sort
+    with np.errstate(invalid = 'ignore'):
+        small = keys.astype(np.int16)
+    if np.array_equal(small, keys):
+        keys = small
+    flat = np.take(flat, np.argsort(keys, kind = 'stable'), axis = 0)
+    bounds = np.flatnonzero(np.diff(flat[:,id])) + 1
+    return np.split(flat, bounds)
 
 def read_stadium_dimensions_from_pos(fname):
     """Gets the stadium specifications from the pos file.
 
         Args:
-            fname: name of position file including path.
+            fname: path or file object of the position file, the
+                position of a file object is restored.
         Returns:
             A dictionary with width and length entries.
     """
-    fid = open(fname,'r')
-    line = fid.readline()
-    fid.close()
-    specs_string = line.split('#')[5].rstrip()[:-1].split(',')
-    length = float(specs_string[1])
-    width = float(specs_string[2])
-    return dict(length=length ,width=width)
+    pos = fname.tell() if compression.is_file_like(fname) else None
+    with compression.open_source(fname) as fid:
+        line = fid.readline()
+    if pos is not None:
+        fname.seek(pos)
+    stadium = convert_lines(line)[4]
+    if stadium is None:
+        raise ValueError('No stadium specification in position file.')
+    return stadium
+
+def trikot_lookup(team):
+    """Lookup arrays from trikot to player id and role.
+
+        Args:
+            team: Team specifications as obtained from MatchInformationParser.
+        Returns:
+            A tuple with the object arrays pids and roles indexed by the
+            trikot, None for unknown trikots.
+    """
+    size = max([player['trikot'] for player in team] + [0]) + 1
+    pids = np.full(size, None, dtype = object)
+    roles = np.full(size, None, dtype = object)
+    for player in team:
+        pids[player['trikot']] = player['id']
+        roles[player['trikot']] = player['position']
+    return pids, roles
 
-def combine_position_with_role(pos, team):
+
+def combine_position_with_role(pos, team, lookup = None):
     """Combines the position data with the players role and pid data.
 
         Args:
             pos: Position data as obtained thorugh the
                  read_in_position_data_chain.
             team: Team specifications as obtained from MatchInformationParser.
+            lookup: trikot_lookup of team, built when not given.
         Returns:
+            A list with a (pid, frame/x/y array, role) tuple per player.
     """
-    # build simple dictionary from trikot to role
-    trikot_to_role = {}
-    trikot_to_pid = {}
-    for player in team:
-        trikot_to_role[player['trikot']] = player['position']
-        trikot_to_pid[player['trikot']] = player['id']
-    res = []
-    for player in pos:
-        trikot = int(player[1,1])
-        res.append((trikot_to_pid[trikot],
-                    player[:,(0,2,3)],
-                    trikot_to_role[trikot]))
-    return res
+    lookup = lookup if lookup is not None else trikot_lookup(team)
+    trikots = [int(player[0,1]) for player in pos]
+    pids, roles = resolve_trikots(trikots, lookup)
+    return list(zip(pids, [player[:,(0,2,3)] for player in pos], roles))
 
-def run(match_info_file, match_pos_file):
+def resolve_trikots(trikots, lookup):
+    """Player ids and roles of trikots.
+
+        Args:
+            trikots: sequence of trikot numbers.
+            lookup: trikot_lookup of the team.
+        Returns:
+            A tuple with the object arrays of the pids and roles.
+        Raises:
+            KeyError: for the first trikot which is not in the team.
+    """
+    pids, roles = lookup
+    trikots = np.asarray(trikots, dtype = int)
+    unknown = (trikots < 0) | (trikots >= len(pids))
+    unknown[~unknown] = pids[trikots[~unknown]] == None
+    if np.any(unknown):
+        raise KeyError(int(trikots[unknown][0]))
+    return pids[trikots], roles[trikots]
+
+def run(match_info_file, match_pos_file, cache = None, processes = 1,
+        referees = False):
     """Driver function to run data loading of impire data.
 
         Args:
-            match_info_file: matchfacts file
-            match_pos_file: position data file.
+            match_info_file: matchfacts file, path or file object.
+            match_pos_file: position data file, path or file object.
+            cache: optional cache.MatchCache, a cached result is returned
+                without parsing the files.
+            processes: number of worker processes converting the position
+                file, None uses all cpus.
+            referees: flag whether pos_data contains the referees.
         Returns:
-          pos_data: position data struct with keys ['home','guest']
+          pos_data: position data struct with keys ['home','guest'] and
+                    ['referee'] if requested
                     with sub struct ['1st','2nd'] for game halves
                     containing list with player entries.
                     [0]: player id
-                    [1]: numpy array with frame, x, y data
-                    [1]: player role.
+                    [1]: float32 numpy array with frame, x, y data
+                    [2]: player role.
                     Position data is not scaled according to pitch dimensions!!!
           ball: numpy array containing the ball data
           match: match information dictionary
           teams: team information dictionary
     """
     from os import path
+    import footballpy.fs.loader.cache as fcache
 
     # sanity check wheter match info and pos file match up
-    fname_1 = path.split(match_info_file)[-1].split('-')[2].split('.')[0]
-    fname_2 = path.split(match_pos_file)[-1].split('.')[0]
-    if fname_1 != fname_2:
-        raise ValueError('fname_specs and fname_pos refer to different games.')
-
-    match, teams = get_impire_match_information(match_info_file, match_pos_file)
-    home, guest, ball, half_time_id = read_in_position_data(match_pos_file)
-
-    def process_teams(team,type):
-        """Just to work through the team data."""
-        periods = split_positions_into_game_halves(team,half_time_id,ball)
-        periods_sorted = [sort_position_data(p) for p in periods]
-        position_arr = [combine_position_with_role(ps,teams[type])
-                            for ps in periods_sorted]
-        return position_arr
-
-    home_data = process_teams(home,'home')
-    guest_data = process_teams(guest,'guest')
-    ball_1 = ball[half_time_id==1,:]
-    ball_2 = ball[half_time_id==2,:]
+    info_name = compression.source_name(match_info_file)
+    pos_name = compression.source_name(match_pos_file)
+    if info_name is not None and pos_name is not None:
+        fname_1 = path.split(info_name)[-1].split('-')[2].split('.')[0]
+        fname_2 = path.split(pos_name)[-1].split('.')[0]
+        if fname_1 != fname_2:
+            raise ValueError('fname_specs and fname_pos refer to different games.')
+    with instrument.stage('impire match'):
+        return fcache.cached(cache, 'impire-referees' if referees else 'impire',
+                [match_info_file, match_pos_file], load_match, match_info_file,
+                match_pos_file, processes, referees)
+
+
+def load_match(match_info_file, match_pos_file, processes = 1, referees = False):
+    """Parses impire match information and position data, see run."""
+    mip = MatchInformationParser()
+    mip.run(match_info_file)
+    teams, match = mip.getTeamInformation()
+    data = read_compact_position_data(match_pos_file, processes = processes,
+            referees = referees)
+    match['stadium'] = data.stadium
+
+    lookups = {role: trikot_lookup(teams[role]) for role in CompactPositions.roles}
+
+    def process_team(role, half_time_id):
+        """Combines the players of a half with pid and role."""
+        players = data.player_positions(role, half_time_id)
+        pids, roles = resolve_trikots([trikot for trikot, _ in players],
+                lookups[role])
+        return [(pid, player, player_role) for pid, (_, player), player_role
+                in zip(pids, players, roles)]
 
     # Normalize to same dataformat like DFL
-    pos_data = dict(
-            home = {'1st' : home_data[0], '2nd' : home_data[1]},
-            guest = {'1st' : guest_data[0], '2nd' : guest_data[1]})
-    ball = [ball_1, ball_2]
+    pos_data = {role: {'1st': process_team(role, 1), '2nd': process_team(role, 2)}
+            for role in CompactPositions.roles}
+    if referees:
+        pos_data['referee'] = {key: [('referee_%d' % number, referee, 'referee')
+                for number, referee in data.player_positions('referee', half)]
+            for key, half in (('1st', 1), ('2nd', 2))}
+    ball = [data.ball_positions(1), data.ball_positions(2)]
     return pos_data, ball, match, teams
 
 
@@ -465,7 +1143,84 @@ def increase_frame_counter(position_data, ball_data, fh_frame_start = 10000, sh_
 
     return position_data_nf, ball_data_nf
 
-def get_df_from_files(match_info_file, match_pos_file):
+def _player_block(players, copy):
+    """Contiguous block holding the arrays of players.
+
+        Args:
+            players: list of (pid, array, role) tuples.
+            copy: flag whether the arrays are copied into a new block.
+        Returns:
+            A tuple with the block, or None if the arrays are separate
+            and not copied, and the list of players, which refers to the
+            new block when copied.
+    """
+    arrays = [player[1] for player in players]
+    if not arrays:
+        return None, players
+    if copy:
+        block = np.concatenate(arrays)
+        views = np.split(block, np.cumsum([len(a) for a in arrays])[:-1])
+        return block, [(player[0], view, player[2])
+                for player, view in zip(players, views)]
+    base = arrays[0].base
+    if (base is not None and base.ndim == 2 and base.flags.c_contiguous and
+            base.shape[1] == arrays[0].shape[1] and
+            all(a.base is base for a in arrays) and
+            sum(a.shape[0] for a in arrays) == base.shape[0]):
+        return base, players
+    return None, players
+
+
+def normalize_positions(position_data, ball_data, length, width,
+        fh_frame_start = 10000, sh_frame_start = 100000, copy = False):
+    """Rescales to the pitch dimensions and increases the frame counters.
+
+        Does the same as rescale_xy_positions followed by
+        increase_frame_counter with one in place update per column and
+        without intermediate copies. The players of a team half are updated at
+        once when they are slices of one contiguous block, like the
+        output of load_match.
+        Args:
+            position_data: player position data dictionary
+            ball_data: ball data list with first [0] and second half [1]
+            length: length of pitch
+            width: width of pitch
+            fh_frame_start: first half frame counter start
+            sh_frame_start: second half frame counter start
+            copy: False updates the arrays in place, True leaves them
+                untouched and returns new arrays, one block per team half.
+        Returns:
+            The normalized position data dictionary and ball data list.
+    """
+    starts = {'1st': fh_frame_start, '2nd': sh_frame_start}
+
+    def normalize(arr, half):
+        """Frame, x, y columns of arr in place."""
+        # scalars of the array dtype avoid casting the columns
+        to_dtype = arr.dtype.type
+        arr[:, 0] += to_dtype(starts[half])
+        arr[:, 1] *= to_dtype(length / 2.0)
+        arr[:, 2] *= to_dtype(width / 2.0)
+
+    position_data_nf = {}
+    for key_t, team_pos_data in position_data.items():
+        position_data_nf[key_t] = {}
+        for key_h, half in team_pos_data.items():
+            block, half = _player_block(half, copy)
+            if block is not None:
+                normalize(block, key_h)
+            else:
+                for player in half:
+                    normalize(player[1], key_h)
+            position_data_nf[key_t][key_h] = half
+    ball_data_nf = [ball.copy() if copy else ball for ball in ball_data]
+    for key_h, ball in zip(('1st', '2nd'), ball_data_nf):
+        normalize(ball, key_h)
+    return position_data_nf, ball_data_nf
+
+
+def get_df_from_files(match_info_file, match_pos_file, cache = None,
+        processes = 1, referees = False):
     """Wrapper function to get a pandas dataframe from impire position data. 
 
     This function is meant as an outside API to load position data from
@@ -474,6 +1229,10 @@ def get_df_from_files(match_info_file, match_pos_file):
     Args:
         match_info_file: full path to the MatchInformation file.
         match_pos_file: full path to the PositionData file.
+        cache: optional cache.MatchCache for the parsed files.
+        processes: number of worker processes, None uses all cpus.
+        referees: flag whether the referees are added as referee_1 to
+            referee_3 columns after the players.
     Returns:
         A tuple with a Pandas dataframe with the position data,
         the teams information dictionary, and
@@ -482,11 +1241,11 @@ def get_df_from_files(match_info_file, match_pos_file):
     import footballpy.fs.loader.papi as papi
 
     # read in position data
-    pos_data, ball_data, match, teams = run(match_info_file, match_pos_file)
-    # rescale to actual meters
-    pos_data_sc, ball_data_sc = rescale_xy_positions(pos_data, ball_data, **match['stadium'])
-    # add frame counters
-    pos_data_reindex, ball_data_reindex = increase_frame_counter(pos_data_sc, ball_data_sc)
+    pos_data, ball_data, match, teams = run(match_info_file, match_pos_file,
+            cache, processes, referees)
+    # rescale to actual meters and add frame counters
+    pos_data_reindex, ball_data_reindex = normalize_positions(pos_data,
+            ball_data, **match['stadium'])
     # transform to pandas dataframe
     pos_df = papi.pos_data_to_df(pos_data_reindex, ball_data_reindex)
     return pos_df, teams, match
@@ -529,7 +1288,8 @@ def get_match_events(match_event_file):
         return { 'whistle_on_first': whistle_on_first, 'whistle_off_first': whistle_off_first,
                 'whistle_on_second': whistle_on_second, 'whistle_off_second': whistle_off_second }
 
-    root = etree.parse(match_event_file).getroot()
+    with compression.open_source(match_event_file) as fid:
+        root = etree.parse(fid).getroot()
     result = dict()
 
     result['timezone'] = dup.parse(root.xpath('//sports-event/event-metadata/@start-date-time')[0]).tzinfo
@@ -571,7 +1331,8 @@ def get_match_info(match_info_file, match_pos_file = ''):
         return result
 
 
-    root = etree.parse(match_info_file).getroot()
+    with compression.open_source(match_info_file) as fid:
+        root = etree.parse(fid).getroot()
 
     match = dict()
     match['match_day'] = root.xpath('//tournament-round/@round-number')[0]
@@ -635,7 +1396,8 @@ def get_team_info(match_info_file):
                 else player_items['position-regular'])
         return player
 
-    root = etree.parse(match_info_file).getroot()
+    with compression.open_source(match_info_file) as fid:
+        root = etree.parse(fid).getroot()
 
     teams = dict()
     teams['home'] = process_team(root, 'home')
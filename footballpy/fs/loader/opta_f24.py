@@ -1,7 +1,47 @@
 # -*- encoding: utf-8 -*-
+"""
+opta_f24: Loader for Opta F24 event files.
 
+read_event_table walks a file once and returns an EventTable with one
+row per Event and a sparse qualifier index, from which the parse_*
+dictionaries are derived with EventTable.records:
+
+    table = read_event_table('f24-22-2016-861478-eventdetails.xml')
+    passes = table.records('pass')
+    crosses = table.of_type(1) & table.has_qualifier(2)
+
+The element based functions get_events and parse_* are kept for single
+elements. A season of files is parsed in parallel into an on-disk
+EventStore with ingest_f24_files and filtered without parsing again.
+The EventFollower reads only the new and changed events of a file which
+is delivered again during a live match.
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+import os
+import re
+import numpy as np
 from lxml import etree
 import pandas as pd
+import footballpy.fs.loader.compression as compression
+from footballpy.fs.loader.flood_array import FloodColumns
+
+
+def read_f24(fname):
+    """Parses an Opta F24 file.
+
+        Args:
+            fname: path or file object of the F24 file, gzip, bz2 or
+                xz compressed files are decompressed while reading.
+        Returns:
+            The root element of the xml tree.
+    """
+    with compression.open_source(fname) as fid:
+        return etree.parse(fid).getroot()
+
 
 def parse_pass(el):
     """ Parsing passe element from F24
@@ -116,14 +156,19 @@ def parse_goal(el):
 
 
 def get_q_value(el, id):
+    """Value of the qualifier id of an event element.
+
+        Raises IndexError when the qualifier is missing.
     """
-    """
-    return el.xpath('./Q[@qualifier_id="{0}"]'.format(id))[0].get('value')
+    q = el.find('Q[@qualifier_id="{0}"]'.format(id))
+    if q is None:
+        raise IndexError('No qualifier %s' % id)
+    return q.get('value')
 
 def check_q_element_present(el, id):
+    """True when the event element has the qualifier id.
     """
-    """
-    return len(el.xpath('./Q[@qualifier_id="{0}"]'.format(id))) > 0
+    return el.find('Q[@qualifier_id="{0}"]'.format(id)) is not None
 
 def get_basic_info(el):
     """
@@ -144,10 +189,538 @@ def get_basic_info(el):
             }
 
 
+# type id, float attributes, float qualifiers, qualifier flags and whether
+# evt_type is part of the result, for each of the parse_* functions
+event_specs = {
+    'pass': (1, (('x0', 'x'), ('y0', 'y')), (('x1', 140), ('y1', 141)),
+        (('cross', 2), ('free_kick', 5), ('corner', 6)), True),
+    'miss': (13, (('x', 'x'), ('y', 'y')), (), (), False),
+    'post': (14, (('x', 'x'), ('y', 'y')), (), (), False),
+    'attempt': (15, (('x', 'x'), ('y', 'y')), (), (('header', 15),), False),
+    'goal': (16, (('x', 'x'), ('y', 'y')), (),
+        (('open_play', 22), ('set_play', 24), ('penalty', 9),
+            ('own_goal', 28), ('header', 15)), True),
+}
+
+
+class EventTable(object):
+    """All events of an F24 file in columns with a sparse qualifier index.
+
+    Attributes:
+        game: dictionary with the attributes of the Game element.
+        events: pandas DataFrame with one row per Event in file order
+            and the columns id, event_id, type_id, period, minute,
+            second, team, player, x, y, outcome (-1 when missing),
+            timestamp, last_modified and version.
+        qualifiers: pandas DataFrame with one row per qualifier, ordered
+            by event, with the columns event (row in events),
+            qualifier_id and value (missing for flags without value).
+    """
+
+    def __init__(self, game, events, qualifiers):
+        self.game = game
+        self.events = events
+        self.qualifiers = qualifiers
+        self._by_id = None
+
+    def __len__(self):
+        return len(self.events)
+
+    def of_type(self, type_id):
+        """Boolean mask of the events with type_id."""
+        return self.events['type_id'].to_numpy() == type_id
+
+    def qualifier(self, qualifier_id):
+        """Events with a qualifier and its values.
+
+        Args:
+            qualifier_id: Opta qualifier id.
+        Returns:
+            A 2-tuple with the event rows and the values, None for flags
+            without value, both in event order.
+        """
+        if self._by_id is None:
+            ids = self.qualifiers['qualifier_id'].to_numpy()
+            order = np.argsort(ids, kind = 'stable')
+            self._by_id = (ids[order], self.qualifiers['event'].to_numpy()[order],
+                    self.qualifiers['value'].to_numpy(object, na_value = None)[order])
+        ids, events, values = self._by_id
+        sel = slice(np.searchsorted(ids, qualifier_id),
+                np.searchsorted(ids, qualifier_id, 'right'))
+        return events[sel], values[sel]
+
+    def has_qualifier(self, qualifier_id):
+        """Boolean mask of the events with the qualifier."""
+        mask = np.zeros(len(self.events), bool)
+        mask[self.qualifier(qualifier_id)[0]] = True
+        return mask
+
+    def qualifier_values(self, qualifier_id, default = None):
+        """Value of the qualifier for every event, default when missing."""
+        res = np.full(len(self.events), default, dtype = object)
+        rows, values = self.qualifier(qualifier_id)
+        res[rows] = values
+        return res
+
+    def records(self, evt_type):
+        """The events of a type as the parse_* functions return them.
+
+        Args:
+            evt_type: key of event_specs, e.g. 'pass'.
+        Returns:
+            A list of dictionaries, the same as parse_<evt_type> applied
+            to the events of the type in file order. Missing qualifier
+            values are NaN.
+        """
+        type_id, attrs, values, flags, with_type = event_specs[evt_type]
+        rows = np.nonzero(self.of_type(type_id))[0]
+        ev = self.events.iloc[rows]
+        columns = [('period', ev['period'].astype(int).tolist()),
+                ('minute', ev['minute'].astype(int).tolist()),
+                ('second', ev['second'].astype(int).tolist()),
+                ('player_id', _object_list(ev['player'])),
+                ('team_id', _object_list(ev['team'])),
+                ('timestamp', ev['timestamp'].tolist()),
+                ('outcome', [str(o) if o >= 0 else None for o in ev['outcome']])]
+        columns.extend((name, ev[attr].tolist()) for name, attr in attrs)
+        for name, qid in values:
+            found = self.qualifier_values(qid, np.nan)[rows]
+            columns.append((name, [float(v) for v in found]))
+        for name, qid in flags:
+            columns.append((name, self.has_qualifier(qid)[rows].tolist()))
+        if with_type:
+            columns.append(('evt_type', [evt_type] * len(rows)))
+        names = [c[0] for c in columns]
+        return [dict(zip(names, row)) for row in zip(*[c[1] for c in columns])]
+
+
+def _object_list(column):
+    """Values of a categorical column with None for missing."""
+    return [None if v is np.nan or v is None else v
+            for v in column.astype(object).tolist()]
+
+
+def _int_or(value, default):
+    return default if value is None else int(value)
+
+
+def _float_or_nan(value):
+    return np.nan if value is None else float(value)
+
+
+# columns of EventTable.events with their types
+event_columns = (('id', np.int64), ('event_id', np.int32), ('type_id', np.int16),
+        ('period', np.int8), ('minute', np.int16), ('second', np.int8),
+        ('team', object), ('player', object), ('x', np.float64),
+        ('y', np.float64), ('outcome', np.int8), ('timestamp', object),
+        ('last_modified', object), ('version', np.int64))
+
+
+def _event_values(el):
+    """Values of an Event element in the order of event_columns."""
+    get = el.get
+    return (int(get('id')), _int_or(get('event_id'), -1), int(get('type_id')),
+            _int_or(get('period_id'), -1), _int_or(get('min'), -1),
+            _int_or(get('sec'), -1), get('team_id'), get('player_id'),
+            _float_or_nan(get('x')), _float_or_nan(get('y')),
+            _int_or(get('outcome'), -1), get('timestamp'),
+            get('last_modified'), _int_or(get('version'), -1))
+
+
+def _qualifier_values(el):
+    """(qualifier_id, value) of the qualifiers of an Event element."""
+    return [(int(q.get('qualifier_id')), q.get('value'))
+            for q in el.iterchildren('Q')]
+
+
+def read_event_table(fname):
+    """Walks an F24 file once and collects all events and qualifiers.
+
+    Every Event element is released after it was read, such that the
+    whole tree is never held in memory.
+
+    Args:
+        fname: path or file object of the F24 file, gzip, bz2 or
+            xz compressed files are decompressed while reading.
+    Returns:
+        An EventTable.
+    """
+    game = {}
+    rows, q_event, qualifiers = [], [], []
+    with compression.open_source(fname) as fid:
+        for _, el in etree.iterparse(fid, events = ('end',), tag = 'Event'):
+            if not game:
+                game = dict(el.getparent().attrib)
+            found = _qualifier_values(el)
+            q_event.extend([len(rows)] * len(found))
+            qualifiers.extend(found)
+            rows.append(_event_values(el))
+            # release the finished events
+            el.clear()
+            while el.getprevious() is not None:
+                del el.getparent()[0]
+    columns = list(zip(*rows)) or [()] * len(event_columns)
+    q_ids, q_values = list(zip(*qualifiers)) or ((), ())
+    return EventTable(game, _event_frame(dict((name, values) for (name, _), values
+        in zip(event_columns, columns))), _qualifier_frame(q_event, q_ids, q_values))
+
+
+def _event_frame(cols):
+    """DataFrame of event columns named as in event_columns."""
+    return pd.DataFrame(dict((name, pd.Categorical(cols[name]))
+        if name in ('team', 'player') else (name, np.asarray(cols[name], dtype))
+        for name, dtype in event_columns))
+
+
+def _qualifier_frame(events, ids, values):
+    """DataFrame of the qualifier index of an EventTable."""
+    return pd.DataFrame({'event': np.asarray(events, np.int32),
+        'qualifier_id': np.asarray(ids, np.int16),
+        'value': np.asarray(values, dtype = object)})
+
+
+# Game and Event start tags, for scanning the raw bytes
+_GAME_TAG = re.compile(rb'<Game\b[^>]*>')
+_EVENT_TAG = re.compile(rb'<Event\b([^>]*)>')
+
+
+class EventFollower(object):
+    """Follows an F24 file which is delivered again and again during a match.
+
+    Every refresh scans the raw bytes of the file for the start tags of
+    the Event elements. When the file still starts with the bytes up to
+    the last complete event of the previous refresh, only the rest is
+    scanned. Otherwise a start tag seen before byte for byte is skipped
+    with a set lookup, a corrected event has at least a new version and
+    last_modified. Only the new and corrected events are parsed with lxml.
+    New events are appended to the columns, changed events are updated
+    in place and their qualifiers replaced. A trailing event which is not
+    completely written yet is read on the next refresh.
+
+        follower = EventFollower('f24-22-2016-861478-eventdetails.xml')
+        while live:
+            new, changed = follower.refresh()
+            table = follower.table()
+
+    Events which are missing in a later delivery are kept.
+
+    Args:
+        fname: path or file object of the F24 file.
+        no_events: initial number of rows of the event columns.
+    """
+
+    def __init__(self, fname, no_events = 4096):
+        self.fname = fname
+        self.game = {}
+        # event id -> row and the start tags read so far
+        self.seen = {}
+        self.tags = set()
+        # the file up to the end of the last complete event
+        self._prefix = b''
+        self.events = FloodColumns(event_columns + (('q_start', np.int64),
+            ('q_stop', np.int64)), no_events)
+        self.qualifiers = FloodColumns((('event', np.int32),
+            ('qualifier_id', np.int16), ('value', object)), 8 * no_events)
+
+    def __len__(self):
+        return len(self.events)
+
+    def refresh(self):
+        """Reads the new and changed events of the current file.
+
+        Returns:
+            A 2-tuple with the rows of the new and of the changed
+            events.
+        """
+        with compression.open_source(self.fname) as fid:
+            content = fid.read()
+        if not self.game:
+            tag = _GAME_TAG.search(content)
+            if tag is not None:
+                self.game = dict(etree.fromstring(tag.group(0) + b'</Game>').attrib)
+        new, changed = [], []
+        offset = len(self._prefix) if content.startswith(self._prefix) else 0
+        for match in _EVENT_TAG.finditer(content, offset):
+            attrs = match.group(1)
+            if attrs.endswith(b'/'):
+                end = match.end()
+            else:
+                end = content.find(b'</Event>', match.end())
+                if end < 0:
+                    # still written, read on the next refresh
+                    break
+                end += 8
+            offset = end
+            if attrs in self.tags:
+                continue
+            el = etree.fromstring(content[match.start():end])
+            self.tags.add(attrs)
+            event_id = el.get('id')
+            row = self.seen.get(event_id)
+            values = _event_values(el)
+            qualifiers = _qualifier_values(el)
+            if row is None:
+                row = len(self.events)
+                new.append(row)
+                self.events.push(*(values + (0, 0)))
+            else:
+                changed.append(row)
+                for (name, _), value in zip(event_columns, values):
+                    self.events.update(row, name, value)
+                start, stop = self.events.column('q_start')[row], \
+                        self.events.column('q_stop')[row]
+                self.qualifiers.update(np.arange(start, stop), 'event', -1)
+            start = len(self.qualifiers)
+            for qualifier_id, value in qualifiers:
+                self.qualifiers.push(row, qualifier_id, value)
+            self.events.update(row, 'q_start', start)
+            self.events.update(row, 'q_stop', len(self.qualifiers))
+            self.seen[event_id] = row
+        self._prefix = content[:offset]
+        return np.array(new, np.intp), np.array(changed, np.intp)
+
+    def table(self):
+        """The events read so far.
+
+        Returns:
+            An EventTable with the events in the order they were first
+            seen.
+        """
+        qualifiers = self.qualifiers.data()
+        live = np.nonzero(qualifiers['event'] >= 0)[0]
+        order = live[np.argsort(qualifiers['event'][live], kind = 'stable')]
+        return EventTable(self.game, _event_frame(self.events.data()),
+                _qualifier_frame(qualifiers['event'][order],
+                    qualifiers['qualifier_id'][order], qualifiers['value'][order]))
+
+
+def read_event_tables(sources, processes = 1):
+    """Reads several F24 files with read_event_table.
+
+    Args:
+        sources: list of paths.
+        processes: number of worker processes, None uses all cpus.
+    Returns:
+        A list with an EventTable per file.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    processes = processes or os.cpu_count()
+    if processes > 1 and len(sources) > 1:
+        with ProcessPoolExecutor(processes) as pool:
+            return list(pool.map(read_event_table, sources))
+    return [read_event_table(f) for f in sources]
+
+
+def _factorize(values):
+    """Integer codes and unicode categories, -1 for missing values."""
+    codes, categories = pd.factorize(np.asarray(values, dtype = object))
+    return codes.astype(np.int32), np.asarray(categories, dtype = str)
+
+
+class EventStore(object):
+    """Columnar on-disk store of the events of many F24 files.
+
+    A store is a folder with one .npy file per column which are memory
+    mapped when the store is opened, such that filtering a season reads
+    only the columns involved. Teams, players and qualifier values are
+    stored as int32 codes into category arrays, the type ids as int8.
+    The qualifiers are ordered by qualifier id, such that the events
+    with a qualifier are one slice.
+
+        store = ingest_f24_files(season_folder, '/data/f24-2016', processes = None)
+        rows = store.select(type_id = 1, team = '100', qualifier = 2)
+        passes = store.frame(rows)
+
+    Args:
+        directory: folder of a store written by ingest_f24_files.
+    """
+
+    # columns of the events, the qualifiers and the games
+    event_columns = ('game', 'id', 'event_id', 'type_id', 'period', 'minute',
+            'second', 'team', 'player', 'x', 'y', 'outcome', 'timestamp',
+            'version')
+    qualifier_columns = ('event', 'qualifier_id', 'value')
+    game_columns = ('id', 'home_team_id', 'away_team_id', 'game_date')
+    # categorical columns stored as codes
+    categorical = ('team', 'player', 'value')
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.events = self._load('events', self.event_columns)
+        self.qualifiers = self._load('qualifiers', self.qualifier_columns)
+        self.games = self._load('games', self.game_columns)
+        self.categories = self._load('categories', self.categorical)
+
+    def _load(self, table, columns):
+        return dict((name, np.load(self._path(self.directory, table, name),
+            mmap_mode = 'r')) for name in columns)
+
+    @staticmethod
+    def _path(directory, table, name):
+        return os.path.join(directory, '%s_%s.npy' % (table, name))
+
+    @classmethod
+    def write(cls, directory, tables):
+        """Writes EventTables into a new store.
+
+        Args:
+            directory: target folder, created when missing.
+            tables: list of EventTables, e.g. from read_event_tables.
+        Returns:
+            The opened EventStore.
+        """
+        os.makedirs(directory, exist_ok = True)
+        events = pd.concat([t.events for t in tables], ignore_index = True)
+        no_events = np.cumsum([0] + [len(t) for t in tables])
+        if len(events) and (events['type_id'].min() < 0 or
+                events['type_id'].max() > np.iinfo(np.int8).max):
+            raise ValueError('Type ids do not fit into int8.')
+        columns = {'events': {
+            'game': np.repeat(np.arange(len(tables), dtype = np.int32),
+                np.diff(no_events)),
+            'id': events['id'].to_numpy(np.int64),
+            'event_id': events['event_id'].to_numpy(np.int32),
+            'type_id': events['type_id'].to_numpy(np.int8),
+            'period': events['period'].to_numpy(np.int8),
+            'minute': events['minute'].to_numpy(np.int16),
+            'second': events['second'].to_numpy(np.int8),
+            'x': events['x'].to_numpy(np.float32),
+            'y': events['y'].to_numpy(np.float32),
+            'outcome': events['outcome'].to_numpy(np.int8),
+            'timestamp': events['timestamp'].to_numpy(object).astype('datetime64[ms]'),
+            'version': events['version'].to_numpy(np.int64)}}
+        categories = {}
+        for name in ('team', 'player'):
+            columns['events'][name], categories[name] = _factorize(
+                    events[name].to_numpy(object, na_value = None))
+        qualifiers = pd.concat([t.qualifiers for t in tables], ignore_index = True)
+        event = qualifiers['event'].to_numpy(np.int32) + np.repeat(
+                no_events[:-1], [len(t.qualifiers) for t in tables]).astype(np.int32)
+        ids = qualifiers['qualifier_id'].to_numpy(np.int16)
+        order = np.lexsort((event, ids))
+        values, categories['value'] = _factorize(
+                qualifiers['value'].to_numpy(object, na_value = None))
+        columns['qualifiers'] = {'event': event[order], 'qualifier_id': ids[order],
+                'value': values[order]}
+        columns['games'] = dict((name, np.array([t.game.get(name, '')
+            for t in tables], dtype = str)) for name in cls.game_columns)
+        columns['categories'] = categories
+        for table, arrays in columns.items():
+            for name, array in arrays.items():
+                np.save(cls._path(directory, table, name), array)
+        return cls(directory)
+
+    def __len__(self):
+        return len(self.events['id'])
+
+    def codes(self, name, values):
+        """Codes of category values, unknown values are left out."""
+        categories = self.categories[name]
+        lookup = dict((v, i) for i, v in enumerate(categories.tolist()))
+        return np.array([lookup[v] for v in np.atleast_1d(values).tolist()
+            if v in lookup], np.int32)
+
+    def qualifier(self, qualifier_id):
+        """Event rows with a qualifier and the value codes of the qualifier."""
+        ids = self.qualifiers['qualifier_id']
+        sel = slice(np.searchsorted(ids, qualifier_id),
+                np.searchsorted(ids, qualifier_id, 'right'))
+        return self.qualifiers['event'][sel], self.qualifiers['value'][sel]
+
+    def has_qualifier(self, qualifier_id):
+        """Boolean mask of the events with the qualifier."""
+        mask = np.zeros(len(self), bool)
+        mask[self.qualifier(qualifier_id)[0]] = True
+        return mask
+
+    def qualifier_values(self, qualifier_id, rows = None):
+        """Values of a qualifier, None where an event does not have it.
+
+        Args:
+            qualifier_id: Opta qualifier id.
+            rows: event rows, None for all events.
+        Returns:
+            An object array with the values of the rows.
+        """
+        events, codes = self.qualifier(qualifier_id)
+        res = np.full(len(self), None, dtype = object)
+        res[events] = np.where(codes >= 0,
+                self.categories['value'][np.maximum(codes, 0)].astype(object), None)
+        return res if rows is None else res[rows]
+
+    def select(self, type_id = None, team = None, player = None, game = None,
+            period = None, qualifier = None):
+        """Rows of the events matching all given filters.
+
+        Args:
+            type_id: type id or list of type ids.
+            team: team id or list of team ids.
+            player: player id or list of player ids.
+            game: Game id or list of Game ids.
+            period: period id or list of period ids.
+            qualifier: qualifier id or list of qualifier ids which an
+                event has all to have.
+        Returns:
+            The sorted event rows.
+        """
+        mask = np.ones(len(self), bool)
+        for name, values, codes in (
+                ('type_id', type_id, None), ('period', period, None),
+                ('team', team, lambda v: self.codes('team', v)),
+                ('player', player, lambda v: self.codes('player', v)),
+                ('game', game, lambda v: np.nonzero(np.isin(self.games['id'],
+                    np.atleast_1d(v).astype(str)))[0])):
+            if values is not None:
+                values = np.atleast_1d(values) if codes is None else codes(values)
+                mask &= np.isin(self.events[name], values)
+        if qualifier is not None:
+            for qualifier_id in np.atleast_1d(qualifier):
+                mask &= self.has_qualifier(qualifier_id)
+        return np.nonzero(mask)[0]
+
+    def frame(self, rows = None):
+        """The events as pandas DataFrame.
+
+        Args:
+            rows: event rows, e.g. from select, None for all events.
+        Returns:
+            A DataFrame with the event columns, the Game id in game
+            and team and player as categoricals.
+        """
+        if rows is None:
+            rows = slice(None)
+        res = {}
+        for name in self.event_columns:
+            values = self.events[name][rows]
+            if name == 'game':
+                values = self.games['id'][values]
+            elif name in self.categorical:
+                values = pd.Categorical.from_codes(values, self.categories[name])
+            res[name] = values
+        return pd.DataFrame(res)
+
+
+def ingest_f24_files(sources, directory, processes = 1):
+    """Parses F24 files into an EventStore.
+
+    Args:
+        sources: list of paths or a folder, of which all
+            f24-*-eventdetails.xml files are read.
+        directory: target folder of the store.
+        processes: number of worker processes, None uses all cpus.
+    Returns:
+        The EventStore.
+    """
+    if isinstance(sources, str):
+        sources = sorted(os.path.join(sources, f) for f in os.listdir(sources)
+                if f.startswith('f24-') and 'eventdetails' in f)
+    return EventStore.write(directory, read_event_tables(sources, processes))
+
+
 if __name__ == '__main__':
     fname = 'f24-22-2016-861478-eventdetails.xml'
-    tree = etree.parse(fname)
-    root = tree.getroot()
+    root = read_f24(fname)
     whistle_on = get_events(root, 32)
     passes = get_events(root, 1) 
     passes_parsed = [parse_pass(ev) for ev in passes]
@@ -4,6 +4,10 @@
 papi: Module which provides a pandas functions to convert
       player and ball position data into a pandas data frame.
 
+The frame index of both halves is computed once, all player and ball
+coordinates are scattered into a single float block which the DataFrame
+wraps without copying.
+
 @author: rein
 @license: MIT
 @version 0.1
@@ -12,71 +16,167 @@ import numpy as np
 import pandas as pd
 
 
-def collect_pos_data_into_dataframe(pos_data, half_tresh = 100000):
-    """Writes the position data from the players into a pandas dataframe for later processing.
+def _teams(pos_data):
+    """Keys of the teams in pos_data, the referees last when present."""
+    return [team for team in ('home', 'guest', 'referee') if team in pos_data]
+
+
+def _frame_index(pos_data, ball_data = None):
+    """Sorted frame numbers of every half and the row of every frame.
+
+        Frame numbers are consecutive counters, the union of a half is
+        marked in a mask over its frame range instead of sorted.
+
+        Args:
+            pos_data: position data structure
+            ball_data: optional ball position data list
+        Returns:
+            A 2-tuple with the int64 frame numbers of both halves and a
+            function returning the rows of an array of frame numbers
+            of a half, 0 for the 1st and 1 for the 2nd half.
+    """
+    halves = []
+    lookups = []
+    offset = 0
+    for i, half in enumerate(('1st', '2nd')):
+        frames = [player[1][:, 0] for team in _teams(pos_data)
+                for player in pos_data[team][half]]
+        if ball_data is not None:
+            frames.append(ball_data[i][:, 0])
+        frames = [f for f in frames if len(f)]
+        first = int(min(f.min() for f in frames)) if frames else 0
+        last = int(max(f.max() for f in frames)) if frames else -1
+        mask = np.zeros(last - first + 1, bool)
+        for f in frames:
+            mask[f.astype(np.int64) - first] = True
+        halves.append(first + np.flatnonzero(mask))
+        lookups.append((first, offset + np.cumsum(mask) - 1))
+        offset += len(halves[-1])
+
+    def rows(frames, half):
+        first, lookup = lookups[half]
+        return lookup[frames.astype(np.int64) - first]
+    return np.concatenate(halves), rows
+
+
+def _player_columns(pos_data, team):
+    """Player ids of a team in the column order of the 1st and 2nd half."""
+    ids = []
+    for half in ('1st', '2nd'):
+        for player in pos_data[team][half]:
+            if player[0] not in ids:
+                ids.append(player[0])
+    return ids
+
+
+def _scatter(block, rows, col, values):
+    """Writes the columns of values into block starting at column col."""
+    if (len(rows) and rows[-1] - rows[0] + 1 == len(rows) and
+            (np.diff(rows) == 1).all()):
+        # the usual case, a player present in every frame of a stretch
+        rows = slice(rows[0], rows[-1] + 1)
+    for j in range(values.shape[1]):
+        block[rows, col + j] = values[:, j]
+
+
+def _position_block(pos_data, ball_data, half_tresh, dtype):
+    """Scatters the player and ball coordinates into one block.
 
         Args:
             pos_data: position data structure
+            ball_data: ball position data list or None
+            half_tresh: first frame of the second half.
+            dtype: float type of the block, None for the common type of
+                the position arrays.
+        Returns:
+            A 2-tuple with the dataframe of the player coordinates, the
+            half column and, when ball_data is given, the ball
+            coordinates, and the rows of the ball frames of both halves
+            or None.
+    """
+    index, frame_rows = _frame_index(pos_data, ball_data)
+    arrays = [player[1] for team in _teams(pos_data)
+            for half in ('1st', '2nd') for player in pos_data[team][half]]
+    if dtype is None:
+        dtype = np.result_type(*(arrays + list(ball_data or [])))
+    columns = []
+    slots = {}
+    for team in _teams(pos_data):
+        for pid in _player_columns(pos_data, team):
+            slots[team, pid] = len(columns)
+            columns.extend([pid + '_x', pid + '_y'])
+    if ball_data is not None:
+        columns.extend(['ball_x', 'ball_y'])
+    # column major, the layout pandas keeps its blocks in
+    block = np.full((len(index), len(columns)), np.nan, dtype, order = 'F')
+    for team in _teams(pos_data):
+        for i, half in enumerate(('1st', '2nd')):
+            for player in pos_data[team][half]:
+                data = player[1]
+                _scatter(block, frame_rows(data[:, 0], i), slots[team, player[0]],
+                        data[:, 1:3])
+    ball_rows = None
+    if ball_data is not None:
+        ball_rows = [frame_rows(ball[:, 0], i) for i, ball in enumerate(ball_data)]
+        for rows, ball in zip(ball_rows, ball_data):
+            _scatter(block, rows, len(columns) - 2, ball[:, 1:3])
+    df = pd.DataFrame(block, index = index, columns = columns, copy = False)
+    no_players = len(columns) - (0 if ball_data is None else 2)
+    df.insert(no_players, 'half', (index >= half_tresh) + 1)
+    return df, ball_rows
+
+
+def collect_pos_data_into_dataframe(pos_data, half_tresh = 100000, dtype = None):
+    """Writes the position data from the players into a pandas dataframe for later processing.
+
+        Args:
+            pos_data: position data structure, the 'referee' entry of
+                impire data is added after the players when present.
+            half_tresh: first frame of the second half.
+            dtype: float type of the coordinates, None for the common
+                type of the position arrays, float32 for the dfl and
+                impire loaders.
         Returns:
             A dataframe with frameindex and x- and y-positions per player prefixed by ids.
             First half frames usually start with 10000, second half frames start from 100000 but
             can be changed using the half_tresh for the second half.
     """
-    def util_1(dataset):
-        """Processes team by half position data. """
-        dummy_ = []
-        for player in dataset:
-            dummy_.append(
-                    pd.DataFrame(
-                    player[1][:,1:],
-                    index = (player[1][:,0]).astype(np.int),
-                    columns = [player[0]+ '_x',
-                        player[0] + '_y']))
-        return pd.concat(dummy_, axis=1)
-
-    def util_2(pos_data, team):
-        """Concatenate 1st and 2nd halves."""
-        data_1st = util_1(pos_data[team]['1st'])
-        data_2nd = util_1(pos_data[team]['2nd'])
-        return pd.concat([data_1st, data_2nd], sort=False)
-    
-    home_df = util_2(pos_data, 'home')
-    guest_df = util_2(pos_data, 'guest')
-    assert(home_df.shape[0] == guest_df.shape[0])
-    # add index for half_time
-    guest_df['half'] = (guest_df.index >= half_tresh) + 1
-    return pd.concat([home_df, guest_df], axis=1)
+    return _position_block(pos_data, None, half_tresh, dtype)[0]
 
 def collect_ball_data_into_dataframe(ball_data):
     """ Generates a pandas dataframe from the ball position data.
 
     Args:
+        ball_data: A ball position data list
     Returns:
+        A dataframe with ball_x, ball_y, possession and game_state
+        indexed by the frames of both halves.
     """
-    def util_(ball):
-        ball_df = pd.DataFrame(
-                ball[:,[1,2,4,5]],
-                columns = ['ball_x','ball_y','possession','game_state'],
-                index = ball[:,0].astype(np.int))
-        ball_df['possession'] = ball_df['possession'].astype(np.int)
-        ball_df['game_state'] = ball_df['game_state'].astype(np.int)
-        return ball_df
-    ball_1st = util_(ball_data[0])
-    ball_2nd = util_(ball_data[1])
-    return pd.concat([ball_1st, ball_2nd])
-
-def pos_data_to_df(pos_data, ball_data):
+    ball = np.concatenate(ball_data)
+    ball_df = pd.DataFrame(ball[:, [1, 2]], columns = ['ball_x', 'ball_y'],
+            index = ball[:, 0].astype(np.int64))
+    ball_df['possession'] = ball[:, 4].astype(np.int64)
+    ball_df['game_state'] = ball[:, 5].astype(np.int64)
+    return ball_df
+
+def pos_data_to_df(pos_data, ball_data, half_tresh = 100000, dtype = None):
     """Wrapper function to convert the player and ball position into pandas dataframe.
 
     Args:
         pos_data: A player position data list
         ball_data: A ball position data list
-        
+        half_tresh: first frame of the second half.
+        dtype: float type of the coordinates, None for the common type
+            of the position arrays.
+
     Returns:
         a pandas data frame containing the position data.
     """
-    player_df = collect_pos_data_into_dataframe(pos_data)
-    ball_df = collect_ball_data_into_dataframe(ball_data)
-    assert(player_df.shape[0] == ball_df.shape[0])
-    return pd.concat([player_df, ball_df], axis=1)
-
+    df, ball_rows = _position_block(pos_data, ball_data, half_tresh, dtype)
+    rows = np.concatenate(ball_rows)
+    ball = np.concatenate(ball_data)
+    for name, col in (('possession', 4), ('game_state', 5)):
+        values = np.zeros(len(df), np.int64)
+        values[rows] = ball[:, col]
+        df[name] = values
+    return df
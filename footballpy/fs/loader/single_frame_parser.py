@@ -3,13 +3,34 @@
 single_frame_parser: Loads the raw position data and game data using
                      a different format.
 
+A folder of PutPositionalDataRequest files, each holding one second of
+position data, is loaded with load_folder:
+
+    pos_data, ball, frames, teams, match = load_folder(folder, stats_file)
+
+A folder which receives the files during a live match is followed with
+a FolderWatcher, which keeps a rolling window of the last minutes.
+
 @author: rein
 @license: MIT
 @version: 0.1
 """
+import os
+import time
+import warnings
+import functools
+import itertools
 import numpy as np
 from xml.sax import make_parser, ContentHandler
-import os
+import footballpy.fs.instrument as instrument
+import footballpy.fs.loader.compression as compression
+# FloodArray moved into flood_array, kept here for existing imports
+from footballpy.fs.loader.flood_array import FloodArray, FloodColumns
+
+class IncompleteFileError(ValueError):
+    """A position file without the closing Positions tag, e.g. while it
+    is still written."""
+
 
 def get_data_files(folder):
     """Determines the position data files.
@@ -73,115 +94,370 @@ class GameStatsParser(ContentHandler):
     def getTeamInformation(self):
         return self.teams, self.match
 
-    def run(self, name):
+    def run(self, fname):
         parser = make_parser()
         parser.setContentHandler(self)
-        parser.parse(fname)
+        with compression.open_source(fname) as fid:
+            parser.parse(fid)
 
 
 class PositionFileParser(ContentHandler):
     """A XML Parser for a PutPositionalDataRequest file.
 
-    Parses out the position data.
+    Parses out the position data. The text of the Positions element
+    can arrive in several characters calls and is processed as a whole
+    when the element ends.
     """
 
     def __init__(self):
         self.inPosition = False
-        self.counter = 0
-        self.line = ''
+        self.buffer = []
+        self.positions = []
 
     def startElement(self, name, attrs):
         if name == "Positions":
             self.inPosition = True
-    
+            self.buffer = []
+
     def characters(self, data):
         if self.inPosition:
-            if not data or (data == "\n") or (data == ']'):
-                return
-            # cut out CDATA part
-            if data.startswith('CDATA'):
-                data = data[6:]
-            # if remaining parts starts with
-            # -1 than game is not running yet.
-            if data.startswith('-1'):
-                return
-            # TODO store data in structure
-            process_line(data)
+            self.buffer.append(data)
 
     def endElement(self, name):
         if name == "Positions":
             self.inPosition = False
+            for line in split_position_lines(''.join(self.buffer)):
+                self.positions.append(process_line(line))
+
+    def getPositionInformation(self):
+        """Returns the result of process_line for every running frame."""
+        return self.positions
 
     def run(self, fname):
         parser = make_parser()
         parser.setContentHandler(self)
-        parser.parse(fname)
-
-class FloodArray:
-    """Stores consecutive vectors into a matrix.
-
-    Just a thin wrapper to a numpy array useful when
-    it is not clear how many points are needed but all points
-    should be stored consecutively.
-    Attributes:
-        max_rows: maximum number of possible rows in matrix.
-        no_cols: number of cols.
-        array: underlying numpy array
-        current_row: running counter storing current position
+        with compression.open_source(fname) as fid:
+            parser.parse(fid)
+
+
+def split_position_lines(text):
+    """Splits the content of a Positions element into frame lines.
+
+    Args:
+        text: text of the Positions element, wrapped in CDATA[...].
+    Returns:
+        A list with the lines of the frames. Lines starting with -1,
+        sent before the game is running, are left out.
     """
+    text = text.strip()
+    if text.startswith('CDATA['):
+        text = text[6:]
+    if text.endswith(']'):
+        text = text[:-1]
+    return [line for line in text.split('\n')
+            if line.strip() and not line.startswith('-1')]
 
-    def __init__(self, max_rows=10000, no_cols=4, expand_step=1000):
-        """ Constructor method.
 
-        Args:
-            max_rows: number of rows { default: 10000 }
-            no_cols: number of columns { default: 4}
-            expand_step: number of rows the matrix is expanded when maximum
-                      row size is reached. { default: 1000 }
-        Returns:
-            Nothing
+def player_columns(teams):
+    """Maps the player ids of the position files to team columns.
+
+    Args:
+        teams: teams dictionary from GameStatsParser.
+    Returns:
+        A dictionary from player id, with and without the 'p' prefix
+        of the position files, to the column of the player. Home
+        players come first, followed by the guest players, both in
+        lineup order.
+    """
+    columns = {}
+    for col, player in enumerate(teams['home'] + teams['guest']):
+        pid = player['id']
+        columns[pid] = col
+        columns['p' + pid] = col
+    return columns
+
+
+def read_position_request(fname, columns, no_players):
+    """Converts a PutPositionalDataRequest file into frame arrays.
+
+    The Positions text is cut out of the file directly instead of
+    running the sax parser and all entries of a file are converted at
+    once. Entries which are not in columns, like the officials, are
+    skipped.
+
+    Args:
+        fname: path or file object of the position file.
+        columns: player column mapping from player_columns.
+        no_players: number of columns.
+    Returns:
+        A 3-tuple with the frame numbers (N,) int64, the positions
+        (N,no_players,2) float32 with NaN for missing players and the
+        ball (N,5) float32 with x, y, z, possession and status.
+    Raises:
+        IncompleteFileError: if the closing Positions tag is missing.
+        ValueError: if a player entry has not exactly four fields.
+    """
+    with compression.open_source(fname) as fid:
+        content = fid.read().decode('utf-8')
+    stop = content.find('</Positions>')
+    if stop < 0:
+        raise IncompleteFileError('No closing Positions tag in %s.'
+                % compression.source_name(fname))
+    start = content.find('>', content.index('<Positions')) + 1
+    lines = [line.split('#') for line in split_position_lines(content[start:stop])]
+    no_frames = len(lines)
+    frames = np.array([line[0][:line[0].index(',')] for line in lines], np.int64)
+    positions = np.full((no_frames, no_players, 2), np.nan, np.float32)
+    if not no_frames:
+        return frames, positions, np.empty((0, 5), np.float32)
+    ball = np.array(','.join(line[2].rstrip(';') for line in lines).split(','),
+            np.float32).reshape(no_frames, -1)[:, [0, 1, 2, 5, 4]]
+    # every entry is 'id,x,y,speed;', only x and y are converted
+    entries = ''.join(line[1] for line in lines)
+    tokens = entries.replace(';', ',').split(',')
+    no_entries = entries.count(';')
+    # the ; of the last entry leaves one empty token at the end
+    if len(tokens) != 4 * no_entries + 1:
+        raise ValueError('Player entries without four fields in %s.'
+                % compression.source_name(fname))
+    rows = np.repeat(np.arange(no_frames), [line[1].count(';') for line in lines])
+    cols = np.fromiter(map(columns.get, tokens[0:4*no_entries:4],
+        itertools.repeat(-1)), np.intp, no_entries)
+    known = cols >= 0
+    for dim in (0, 1):
+        values = np.array(tokens[1+dim:4*no_entries:4], np.float32)
+        positions[rows[known], cols[known], dim] = values[known]
+    return frames, positions, ball
+
+
+def load_folder(folder, game_stats_file, processes = 1):
+    """Loads a folder of PutPositionalDataRequest files.
+
+    The files are converted independently, in a process pool when
+    processes > 1, and assembled into contiguous arrays in frame
+    order. Frames contained in several files are kept once.
+
+    Args:
+        folder: folder containing the position data files.
+        game_stats_file: game stats file with the lineups.
+        processes: number of worker processes, None uses all cpus.
+    Returns:
+        A 5-tuple with pos_data, ball, frames, teams and match.
+        pos_data holds the positions (N,P,2) float32 of the 'home' and
+        'guest' players, NaN where a player is missing, with the columns
+        in the order of teams. ball (N,5) float32 holds x, y, z,
+        possession and status, frames (N,) the frame numbers.
+        teams and match are the results of GameStatsParser.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    gsp = GameStatsParser()
+    gsp.run(game_stats_file)
+    teams, match = gsp.getTeamInformation()
+    no_home = len(teams['home'])
+    no_players = no_home + len(teams['guest'])
+    fnames = [os.path.join(folder, f) for f in get_data_files(folder)[0]]
+    convert = functools.partial(read_position_request,
+            columns = player_columns(teams), no_players = no_players)
+    processes = processes or os.cpu_count()
+    with instrument.stage('single frame files'):
+        if processes > 1 and len(fnames) > 1:
+            with ProcessPoolExecutor(processes) as pool:
+                parts = []
+                for fname, part in zip(fnames, pool.map(convert, fnames,
+                        chunksize = max(len(fnames) // (4 * processes), 1))):
+                    instrument.progress(len(part[0]), item = fname)
+                    parts.append(part)
+        else:
+            parts = []
+            for fname in fnames:
+                parts.append(convert(fname))
+                instrument.progress(len(parts[-1][0]), item = fname)
+    frames = np.concatenate([p[0] for p in parts] + [np.empty(0, np.int64)])
+    order = None
+    if np.any(np.diff(frames) <= 0):
+        frames, order = np.unique(frames, return_index = True)
+
+    def assemble(arrays):
+        res = np.concatenate(arrays)
+        return res if order is None else np.take(res, order, axis = 0)
+    empty = np.empty((0, no_players, 2), np.float32)
+    pos_data = {'home': assemble([p[1][:, :no_home] for p in parts] + [empty[:, :no_home]]),
+            'guest': assemble([p[1][:, no_home:] for p in parts] + [empty[:, no_home:]])}
+    ball = assemble([p[2] for p in parts] + [np.empty((0, 5), np.float32)])
+    return pos_data, ball, frames, teams, match
+
+
+class FolderWatcher(object):
+    """Follows a folder which receives PutPositionalDataRequest files live.
+
+    Every poll converts the files which arrived since the last poll, each
+    file once, and appends them to a rolling window of the last window
+    seconds. Files which are still written, i.e. without the closing
+    Positions tag, are tried again on the next poll. Complete files
+    which can not be converted are skipped with a warning and kept in
+    errors. Subscribers are called with the watcher, the file name and
+    its frame numbers after the window was updated with a file.
+
+        watcher = FolderWatcher(folder, game_stats_file, window = 600.0)
+        watcher.subscribe(lambda w, fname, frames: print(fname))
+        while live:
+            watcher.poll()
+            time.sleep(0.2)
+
+    or within asyncio:
+
+        stop = asyncio.Event()
+        await watcher.watch(interval = 0.2, stop = stop)
+
+    Args:
+        folder: folder receiving the position data files.
+        game_stats_file: game stats file with the lineups.
+        window: length of the rolling window in seconds.
+        frame_rate: frames per second of the position data.
+    """
+
+    # files created within this many seconds may not change the folder mtime
+    mtime_resolution = 0.1
+
+    def __init__(self, folder, game_stats_file, window = 600.0, frame_rate = 25):
+        self.folder = folder
+        self.frame_rate = frame_rate
+        self.window_frames = max(int(round(window * frame_rate)), 1)
+        gsp = GameStatsParser()
+        gsp.run(game_stats_file)
+        self.teams, self.match = gsp.getTeamInformation()
+        self.no_home = len(self.teams['home'])
+        self.no_players = self.no_home + len(self.teams['guest'])
+        self.columns = player_columns(self.teams)
+        self.subscribers = []
+        self.seen = set()
+        self.pending = []
+        self.errors = {}
+        self._listed = None
+        self.state = FloodColumns([('frame', np.int64),
+            ('home', np.float32, (self.no_home, 2)),
+            ('guest', np.float32, (self.no_players - self.no_home, 2)),
+            ('ball', np.float32, (5,))], max_rows = 2 * self.window_frames)
+
+    def subscribe(self, callback):
+        """Registers callback(watcher, fname, frames) for new files."""
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """Removes a callback registered with subscribe."""
+        self.subscribers.remove(callback)
+
+    def new_files(self):
+        """Names of the position files not converted yet in file order.
+
+        The folder is only listed again when its mtime changed, or is
+        too recent to tell, such that idle polls of a full match folder
+        stay cheap. Files which could not be read are always returned.
         """
-        self.max_rows = max_rows
-        self.expand = expand_step 
-        self.no_cols = no_cols
-        self.array = -13 * np.ones((max_rows, no_cols))
-        self.current_row = 0
+        mtime = os.stat(self.folder).st_mtime_ns
+        if self._listed is not None and mtime == self._listed[0] and \
+                mtime < self._listed[1] - 1e9 * self.mtime_resolution:
+            names = self.pending
+        else:
+            listed = time.time_ns()
+            names = [f for f in os.listdir(self.folder)
+                    if f.startswith('Put') and f not in self.seen]
+            self._listed = (mtime, listed)
+        return sorted(names)
 
-    def push(self, data):
-        """Pushes a new vector onto the matrix.
+    def poll(self):
+        """Converts the files which arrived since the last poll.
 
-        Args:
-            data: a new vector.
         Returns:
-            Nothing
+            The number of converted files.
         """
-        if self.current_row + 2 == self.max_rows:
-            no_rows, no_cols = self.array.shape
-            self.array.resize((no_rows + self.expand, no_cols), refcheck=False)
-        self.array[self.current_row,:] = data
-        self.current_row += 1
+        no_files = 0
+        names, self.pending = self.new_files(), []
+        for name in names:
+            fname = os.path.join(self.folder, name)
+            try:
+                frames, positions, ball = read_position_request(fname,
+                        self.columns, self.no_players)
+            except FileNotFoundError:
+                self.seen.add(name)
+                continue
+            except IncompleteFileError:
+                # not completely written yet
+                self.pending.append(name)
+                continue
+            except ValueError as err:
+                self.seen.add(name)
+                self.errors[name] = err
+                warnings.warn('Skipped %s: %s' % (name, err), RuntimeWarning)
+                continue
+            self.seen.add(name)
+            self._insert(frames, positions, ball)
+            no_files += 1
+            for callback in list(self.subscribers):
+                callback(self, fname, frames)
+        return no_files
+
+    def _insert(self, frames, positions, ball):
+        """Adds the frames of a file and drops those out of the window."""
+        if not len(frames):
+            return
+        home, guest = positions[:, :self.no_home], positions[:, self.no_home:]
+        known = self.state.column('frame')
+        if (len(known) and frames[0] <= known[-1]) or np.any(np.diff(frames) <= 0):
+            # late file, merge in frame order
+            old = [self.state.column(name) for name in self.state.names]
+            merged = [np.concatenate((o, n)) for o, n in
+                    zip(old, (frames, home, guest, ball))]
+            _, order = np.unique(merged[0], return_index = True)
+            self.state.clear()
+            self.state.extend(*[m[order] for m in merged])
+        else:
+            self.state.extend(frames, home, guest, ball)
+        frames = self.state.column('frame')
+        self.state.discard(np.searchsorted(frames,
+            frames[-1] - self.window_frames, 'right'))
 
     def data(self):
-        """Returns the current data.
-        Args:
-            Nothing
+        """The frames of the rolling window.
+
         Returns:
-            A numpy matrix containing the data.
+            A 3-tuple with pos_data, ball and frames like load_folder,
+            as read-only views.
         """
-        return self.array[:self.current_row,:].copy()
+        views = self.state.data()
+        return ({'home': views['home'], 'guest': views['guest']},
+                views['ball'], views['frame'])
+
+    async def watch(self, interval = 0.2, stop = None):
+        """Polls the folder every interval seconds within asyncio.
+
+        Args:
+            interval: seconds between two polls.
+            stop: asyncio.Event ending the watch, None to run until
+                the task is cancelled.
+        """
+        import asyncio
+
+        while stop is None or not stop.is_set():
+            self.poll()
+            if stop is None:
+                await asyncio.sleep(interval)
+            else:
+                try:
+                    await asyncio.wait_for(stop.wait(), interval)
+                except asyncio.TimeoutError:
+                    pass
 
 
 def process_line(line):
     """ Processes a single line from a put file.
-        Broken, relies on global variables. No-no!!!!
         Args:
             line: A string containing the one line of data. CDATA is
                   already cleaned out.
         Returns:
-            Tuples with player_res is a dictionary containing a mapping
-            from player ids to (x,y)-position tuples. Ball data is return
-            in the second column as a numpy array containing:
-
+            A dictionary mapping the player ids and 'ball' to
+            (frame, x, y) tuples.
     """
     # result dictionary
     pos_data = {}
@@ -198,12 +474,6 @@ def process_line(line):
         x = float(xs)
         y = float(ys)
         pos_data[pid] = (frame, x,y)
-        """
-        if pid in guest_col_id.keys():
-            guest_res[guest_col_id[pid]].push(np.array([frame,x,y,0.0]))
-        else:
-            home_res[home_col_id[pid]].push(np.array([frame,x,y,0.0]))
-        """
     # processing ball
     xs,ys,zs = ball.split(',')[:3]
     x = float(xs)
@@ -10,6 +10,7 @@ Created on Thu Jun 18 23:54:17 2015
 from __future__ import print_function
 import numpy as np
 import footballpy.processing.ragged_array as ra
+import footballpy.fs.instrument as instrument
 
 """ Ranking dictionary necessary to determine the column number
     of each player.
@@ -190,34 +191,31 @@ def run(pos_data,ball_data,match,ranking_type='A'):
     # switch for l2r switching mode
     l2r_section = 0
 
-    # processing player position data first    
-    for sec in sections:
-        home_direction = 'r2l'
-        for role in roles:
-            print('Processing: %s-%s...' % (role,sec))
-            sorted_pos_data = sort_position_data(pos_data[role][sec], ranking_type)
-            stitched_data = stitch_position_data(sorted_pos_data,ball_data[sec!='1st'])
-            if role == 'home':
-                home_direction = determine_playing_direction(stitched_data[:,0:2])
-            if home_direction == 'l2r':
-                switch_playing_direction(stitched_data)
-                l2r_section = 0 if sec=='1st' else 1
-            rescale_playing_coords(stitched_data,match['stadium'])
-            result[role][0 if sec=='1st' else 1] = stitched_data
-            print('done')
+    with instrument.stage('processing'):
+        # processing player position data first    
+        for sec in sections:
+            home_direction = 'r2l'
+            for role in roles:
+                sorted_pos_data = sort_position_data(pos_data[role][sec], ranking_type)
+                stitched_data = stitch_position_data(sorted_pos_data,ball_data[sec!='1st'])
+                if role == 'home':
+                    home_direction = determine_playing_direction(stitched_data[:,0:2])
+                if home_direction == 'l2r':
+                    switch_playing_direction(stitched_data)
+                    l2r_section = 0 if sec=='1st' else 1
+                rescale_playing_coords(stitched_data,match['stadium'])
+                result[role][0 if sec=='1st' else 1] = stitched_data
+                instrument.progress(stitched_data.shape[0], item = '%s-%s' % (role,sec))
     
-    # processing ball data
-    print('Processing ball...')
-    switch_playing_direction(ball_data[l2r_section][:,1:3])
-    for i in [0,1]:
-        rescale_playing_coords(ball_data[i][:,1:3],match['stadium'])
-    result['ball'][0] = ball_data[0][:,1:3]
-    result['ball'][1] = ball_data[1][:,1:3]
-
-    #correct value ranges.
-    print('clamping values.')
-    clamp_values(result)
-    print('done.')
+        # processing ball data
+        switch_playing_direction(ball_data[l2r_section][:,1:3])
+        for i in [0,1]:
+            rescale_playing_coords(ball_data[i][:,1:3],match['stadium'])
+        result['ball'][0] = ball_data[0][:,1:3]
+        result['ball'][1] = ball_data[1][:,1:3]
+
+        #correct value ranges.
+        clamp_values(result)
     return result
             
     
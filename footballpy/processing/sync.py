@@ -0,0 +1,226 @@
+# -*- encoding: utf-8 -*-
+"""
+sync: Maps event data to the frames of the position data.
+
+Events are synchronised with the tracking frames in bulk, either by
+their wall-clock time, e.g. the DFL EventTime against the frame time
+stamps, or by their game clock, e.g. the Opta period, min and sec against
+the first frame of every half. Time stamps of providers without frame
+times, e.g. the impire shot time, are counted from the kickoff whistle of
+their period:
+
+    rows = sync_by_time(events['time'], frame_times, tolerance = 0.04)
+    frames = sync_by_clock(periods, seconds, {1: 10000, 2: 100000})
+    frames = sync_by_kickoff(shot_times, periods, kickoffs, half_starts)
+    synced = sync_opta_events(table.events, frames, half_starts, stadium)
+
+Both come down to one searchsorted over the sorted frame arrays such
+that a season of events is aligned in about a second.
+
+@author: rein
+@license: MIT
+@version: 0.1
+"""
+
+import numpy as np
+
+# game clock in seconds at the begin of the Opta periods, 1st and 2nd
+# half and the two halves of extra time
+OPTA_PERIOD_OFFSETS = {1: 0, 2: 45*60, 3: 90*60, 4: 105*60}
+
+
+def as_nanoseconds(times):
+    """Time stamps as int64 nanoseconds.
+
+    Args:
+        times: sequence of datetimes, numpy datetime64 values, ISO
+            strings, a pandas DatetimeIndex or Series. Timezone aware
+            stamps are converted to utc, naive ones are taken as they are.
+    Returns:
+        An int64 numpy array, NaT becomes the int64 minimum.
+    """
+    import pandas as pd
+
+    if pd.api.types.is_datetime64_any_dtype(getattr(times, 'dtype', None)):
+        times = pd.DatetimeIndex(times)
+    else:
+        times = pd.DatetimeIndex(pd.to_datetime(times, utc = True, cache = False))
+    values = np.asarray(times.asi8)
+    if times.unit != 'ns':
+        # cheaper than as_unit with its overflow checks
+        scale = {'s': 10**9, 'ms': 10**6, 'us': 10**3}[times.unit]
+        values = np.where(values == np.iinfo(np.int64).min, values, values * scale)
+    return values
+
+
+def nearest_rows(values, sorted_values, tolerance = None):
+    """Row of the nearest sorted value for every value.
+
+    Args:
+        values: array of values.
+        sorted_values: ascending array.
+        tolerance: largest allowed distance, None for any.
+    Returns:
+        An intp array with the rows into sorted_values, on ties the
+        earlier row, -1 when sorted_values is empty or the distance
+        exceeds tolerance.
+    """
+    values = np.asarray(values)
+    sorted_values = np.asarray(sorted_values)
+    if len(sorted_values) == 0:
+        return np.full(values.shape, -1, np.intp)
+    rows = np.clip(np.searchsorted(sorted_values, values), 1,
+            max(len(sorted_values) - 1, 1))
+    if len(sorted_values) == 1:
+        rows[:] = 0
+        distance = np.abs(values - sorted_values[0])
+    else:
+        left = values - sorted_values[rows - 1]
+        right = sorted_values[rows] - values
+        use_left = left <= right
+        rows -= use_left
+        distance = np.abs(np.where(use_left, left, right))
+    if tolerance is not None:
+        rows[distance > tolerance] = -1
+    return rows
+
+
+def sync_by_time(event_times, frame_times, tolerance = None):
+    """Frame rows for events with wall-clock times.
+
+    Args:
+        event_times: time stamps of the events.
+        frame_times: ascending time stamps of the frames, e.g. the
+            timestamps of both halves concatenated.
+        tolerance: largest allowed distance in seconds, None for any.
+    Returns:
+        An intp array with the row of the nearest frame per event, -1
+        for events outside tolerance.
+    """
+    return nearest_rows(as_nanoseconds(event_times), as_nanoseconds(frame_times),
+            None if tolerance is None else int(tolerance * 1e9))
+
+
+def sync_by_clock(periods, seconds, half_starts, frame_rate = 25.0,
+        period_offsets = OPTA_PERIOD_OFFSETS):
+    """Frame numbers for events with game clock times.
+
+    Args:
+        periods: period of every event.
+        seconds: game clock of every event in seconds, e.g. 60 * min + sec
+            for Opta events, counting on over the halves.
+        half_starts: dictionary from period to the frame number of its
+            kickoff.
+        frame_rate: frames per second of the position data.
+        period_offsets: dictionary from period to the game clock at its
+            kickoff in seconds.
+    Returns:
+        An int64 array with the frame number per event, -1 for periods
+        without kickoff frame.
+    """
+    periods = np.asarray(periods, np.int64)
+    seconds = np.asarray(seconds, np.float64)
+    size = max(list(half_starts) + [int(periods.max()) if periods.size else 0]) + 1
+    starts = np.full(size, -1, np.int64)
+    offsets = np.zeros(size)
+    for period, frame in half_starts.items():
+        starts[period] = frame
+        offsets[period] = period_offsets.get(period, 0)
+    valid = (periods >= 0) & (starts[np.maximum(periods, 0)] >= 0)
+    periods = np.where(valid, periods, 0)
+    frames = starts[periods] + np.rint((seconds - offsets[periods]) *
+            frame_rate).astype(np.int64)
+    return np.where(valid, frames, -1)
+
+
+def sync_by_kickoff(event_times, periods, kickoffs, half_starts,
+        frame_rate = 25.0):
+    """Frame numbers for events with wall-clock times and known kickoffs.
+
+    Args:
+        event_times: time stamps of the events.
+        periods: period of every event.
+        kickoffs: dictionary from period to the time stamp of its kickoff
+            whistle.
+        half_starts: dictionary from period to the frame number of its
+            kickoff.
+        frame_rate: frames per second of the position data.
+    Returns:
+        An int64 array with the frame number per event, -1 for periods
+        without kickoff.
+    """
+    periods = np.asarray(periods, np.int64)
+    times = as_nanoseconds(event_times)
+    size = max(list(kickoffs) + [int(periods.max()) if periods.size else 0]) + 1
+    starts = np.zeros(size, np.int64)
+    known = np.zeros(size, bool)
+    for period, stamp in kickoffs.items():
+        starts[period] = as_nanoseconds([stamp])[0]
+        known[period] = True
+    clipped = np.clip(periods, 0, size - 1)
+    seconds = (times - starts[clipped]) / 1e9
+    half_starts = dict((p, f) for p, f in half_starts.items()
+            if p < size and known[p])
+    return sync_by_clock(periods, seconds, half_starts, frame_rate, {})
+
+
+def opta_to_pitch(x, y, length, width, flip = None):
+    """Converts Opta 0-100 coordinates to the tracking coordinate system.
+
+    Opta coordinates are relative to the pitch with every team attacking
+    towards x = 100. The tracking coordinates are meters with the origin
+    in the centre spot and the home team playing towards positive x in
+    the first half.
+
+    Args:
+        x, y: Opta coordinates.
+        length, width: pitch dimensions in meters.
+        flip: boolean per event, True where the team of the event
+            attacks towards negative x.
+    Returns:
+        A 2-tuple with the x and y coordinates in meters.
+    """
+    px = (np.asarray(x, np.float64) / 100.0 - 0.5) * length
+    py = (np.asarray(y, np.float64) / 100.0 - 0.5) * width
+    if flip is not None:
+        sign = np.where(flip, -1.0, 1.0)
+        px *= sign
+        py *= sign
+    return px, py
+
+
+def sync_opta_events(events, frames, half_starts, stadium, frame_rate = 25.0,
+        attacks_left = ()):
+    """Synchronises Opta events with position data.
+
+    Args:
+        events: DataFrame with the columns period, minute, second, team, x
+            and y, e.g. EventTable.events or EventStore.frame.
+        frames: ascending frame numbers of the position data.
+        half_starts: dictionary from period to the frame number of its
+            kickoff.
+        stadium: dictionary with the pitch 'length' and 'width'.
+        frame_rate: frames per second of the position data.
+        attacks_left: (team, period) pairs of teams attacking towards
+            negative x in the tracking coordinates.
+    Returns:
+        A DataFrame with the index of events and the columns frame (frame
+        number), row (row in frames, -1 without frame) and x, y in
+        tracking coordinates.
+    """
+    import pandas as pd
+
+    periods = events['period'].to_numpy(np.int64)
+    frame = sync_by_clock(periods, 60 * events['minute'].to_numpy(np.int64) +
+            events['second'].to_numpy(np.int64), half_starts, frame_rate)
+    frames = np.asarray(frames)
+    rows = nearest_rows(frame, frames, 0)
+    rows[frame < 0] = -1
+    flip = np.zeros(len(events), bool)
+    teams = events['team'].to_numpy(object)
+    for team, period in attacks_left:
+        flip |= (teams == team) & (periods == period)
+    x, y = opta_to_pitch(events['x'], events['y'], stadium['length'],
+            stadium['width'], flip)
+    return pd.DataFrame({'frame': frame, 'row': rows, 'x': x, 'y': y},
+            index = events.index)
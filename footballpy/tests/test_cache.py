@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+test_cache: unittests for the on-disk match cache.
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+import os
+import pickle
+import time
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import footballpy.fs.loader.cache as fcache
+import footballpy.fs.loader.dfl as dfl
+import footballpy.fs.loader.impire as impire
+
+
+def path_to_tstfile(folder, fname):
+    """Full path to a file in the testfiles folder."""
+    return os.path.abspath(os.path.join(__file__, '../../testfiles/', folder, fname))
+
+
+def assert_same_structure(test, a, b):
+    """Compares nested dicts, lists and tuples with numpy arrays."""
+    if isinstance(a, np.ndarray):
+        np.testing.assert_array_equal(a, b)
+        test.assertEqual(a.dtype, b.dtype)
+    elif isinstance(a, dict):
+        test.assertEqual(sorted(a), sorted(b))
+        for k in a:
+            assert_same_structure(test, a[k], b[k])
+    elif isinstance(a, (list, tuple)):
+        test.assertEqual(type(a), type(b))
+        test.assertEqual(len(a), len(b))
+        for x, y in zip(a, b):
+            assert_same_structure(test, x, y)
+    else:
+        test.assertTrue(a.equals(b) if hasattr(a, 'equals') else a == b)
+
+
+class TestMatchCache(unittest.TestCase):
+    """Unit test class for the MatchCache."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = fcache.MatchCache(os.path.join(self.tmp_dir, 'cache'))
+        self.src = os.path.join(self.tmp_dir, 'source.txt')
+        with open(self.src, 'w') as fid:
+            fid.write('abc')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_roundtrip(self):
+        result = ({'home': {'1st': [('p1', np.arange(6, dtype=np.float32).reshape(2,3), 'TW')]}},
+                  [np.zeros((2, 6)), 0], {'stadium': {'length': 105.0}})
+        key = self.cache.key('test', self.src)
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, result)
+        assert_same_structure(self, result, self.cache.get(key))
+
+    def test_corrupt_entries(self):
+        key = self.cache.key('test', self.src)
+        self.cache.put(key, [np.zeros(10), {'a': 1}])
+        with open(self.cache.path(key), 'rb') as fid:
+            data = fid.read()
+        skeleton = pickle.dumps([fcache._ArrayRef(0), {'a': 1}])
+        stale = {'a0': np.zeros(10), 'skeleton': np.frombuffer(
+            skeleton.replace(b'_ArrayRef', b'_Missing_'), np.uint8)}
+        moved = {'a0': np.zeros(10), 'skeleton': np.frombuffer(skeleton.replace(
+            b'\x1afootballpy.fs.loader.cache', b'\x1afootballpy.fs.loader.gone_'),
+            np.uint8)}
+        truncated = {'a0': np.zeros(10), 'skeleton': np.frombuffer(
+            skeleton[:2], np.uint8)}
+        for members in (None, stale, moved, truncated):
+            with open(self.cache.path(key), 'wb') as fid:
+                if members is None:
+                    fid.write(data[:len(data) // 2])
+                else:
+                    np.savez(fid, **members)
+            self.assertIsNone(self.cache.get(key))
+            self.assertFalse(os.path.exists(self.cache.path(key)))
+
+    def test_key_changes_with_source(self):
+        key = self.cache.key('test', self.src)
+        self.assertEqual(key, self.cache.key('test', self.src))
+        self.assertNotEqual(key, self.cache.key('other', self.src))
+        with open(self.src, 'w') as fid:
+            fid.write('abcd')
+        self.assertNotEqual(key, self.cache.key('test', self.src))
+
+    def test_lru_eviction(self):
+        data = np.zeros(2**14)
+        self.cache.put('a', [data])
+        size = self.cache.size()
+        self.cache.max_bytes = 2 * size
+        self.cache.put('b', [data])
+        # a was used more recently than b
+        time.sleep(0.01)
+        self.assertIsNotNone(self.cache.get('a'))
+        self.cache.put('c', [data])
+        self.assertIsNone(self.cache.get('b'))
+        self.assertIsNotNone(self.cache.get('a'))
+        self.assertIsNotNone(self.cache.get('c'))
+        self.assertLessEqual(self.cache.size(), 2 * size)
+
+    def test_dfl_run(self):
+        info = path_to_tstfile('dfl', 'MatchInformation/test.xml')
+        pos = path_to_tstfile('dfl', 'ObservedPositionalData/test.xml')
+        cold = dfl.run(info, pos, trace = False, cache = self.cache)
+        self.assertEqual(len(self.cache.entries()), 1)
+        warm = dfl.run(info, pos, trace = False, cache = self.cache)
+        assert_same_structure(self, cold, warm)
+        assert_same_structure(self, dfl.run(info, pos, trace = False), warm)
+
+    def test_impire_run(self):
+        info = path_to_tstfile('impire', 'vistrack-matchfacts-123456.xml')
+        pos = path_to_tstfile('impire', '123456.pos')
+        cold = impire.run(info, pos, cache = self.cache)
+        warm = impire.run(info, pos, cache = self.cache)
+        assert_same_structure(self, cold, warm)
+
+
+if __name__ == '__main__':
+    unittest.main()
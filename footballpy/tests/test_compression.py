@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+test_compression: unittests for reading compressed input files.
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+import io
+import os
+import bz2
+import gzip
+import lzma
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import footballpy.fs.loader.compression as compression
+import footballpy.fs.loader.dfl as dfl
+import footballpy.fs.loader.impire as impire
+
+compressors = {'gz': gzip.compress, 'bz2': bz2.compress, 'xz': lzma.compress}
+
+
+def path_to_tstfile(folder, fname):
+    """Full path to a file in the testfiles folder."""
+    return os.path.abspath(os.path.join(__file__, '../../testfiles/', folder, fname))
+
+
+def compress_copy(fname, tmp_dir, suffix):
+    """Writes a compressed copy of fname to tmp_dir."""
+    target = os.path.join(tmp_dir, os.path.basename(fname) + '.' + suffix)
+    with open(fname, 'rb') as fid:
+        data = compressors[suffix](fid.read())
+    with open(target, 'wb') as fid:
+        fid.write(data)
+    return target
+
+
+class NonSeekable(io.RawIOBase):
+    """Binary stream without seek and peek, like a pipe."""
+
+    def __init__(self, data):
+        self.data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buf):
+        data = self.data.read(len(buf))
+        buf[:len(data)] = data
+        return len(data)
+
+
+class TestOpenSource(unittest.TestCase):
+    """Unit test class for open_source."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data = b'<a>\n' + b'line\n' * 1000 + b'</a>\n'
+        self.fname = os.path.join(self.tmp_dir, 'plain.xml')
+        with open(self.fname, 'wb') as fid:
+            fid.write(self.data)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_paths(self):
+        self.assertIsNone(compression.detect_compression(self.fname))
+        self.assertTrue(compression.is_plain_file(self.fname))
+        for suffix, name in (('gz', 'gzip'), ('bz2', 'bz2'), ('xz', 'xz')):
+            target = compress_copy(self.fname, self.tmp_dir, suffix)
+            self.assertEqual(compression.detect_compression(target), name)
+            self.assertFalse(compression.is_plain_file(target))
+            self.assertIsNone(compression.source_size(target))
+            with compression.open_source(target) as fid:
+                self.assertEqual(fid.read(), self.data)
+            with compression.open_source(target, 'rt') as fid:
+                self.assertEqual(len(fid.readlines()), 1002)
+
+    def test_file_objects(self):
+        for data in (self.data, gzip.compress(self.data), lzma.compress(self.data)):
+            source = io.BytesIO(data)
+            with compression.open_source(source) as fid:
+                self.assertEqual(fid.read(), self.data)
+            self.assertFalse(source.closed)
+            with compression.open_source(NonSeekable(data)) as fid:
+                self.assertEqual(fid.read(), self.data)
+        with compression.open_source(io.StringIO('abc'), 'rt') as fid:
+            self.assertEqual(fid.read(), 'abc')
+        with self.assertRaises(TypeError):
+            with compression.open_source(io.StringIO('abc')) as fid:
+                pass
+
+
+class TestCompressedLoaders(unittest.TestCase):
+    """Compressed files load the same data as the plain files."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._tmp_dir = tempfile.mkdtemp()
+        cls._info = path_to_tstfile('dfl', 'MatchInformation/test.xml')
+        cls._pos = path_to_tstfile('dfl', 'ObservedPositionalData/test.xml')
+        mip = dfl.MatchInformationParser()
+        mip.run(compress_copy(cls._info, cls._tmp_dir, 'gz'))
+        cls._teams, cls._match = mip.getTeamInformation()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls._tmp_dir)
+
+    def load(self, engine, fname):
+        mpp = dfl.position_engines[engine](self._match, self._teams)
+        mpp.run(fname, trace = False)
+        return mpp.getPositionInformation()
+
+    def assertSamePositions(self, a, b):
+        for role in ('home', 'guest'):
+            for half in ('1st', '2nd'):
+                for p, q in zip(a[0][role][half], b[0][role][half]):
+                    self.assertEqual(p[0], q[0])
+                    np.testing.assert_array_equal(p[1], q[1])
+        for i in (0, 1):
+            np.testing.assert_array_equal(a[1][i], b[1][i])
+            self.assertEqual(list(a[2][i]), list(b[2][i]))
+
+    def test_dfl_engines(self):
+        plain = self.load('sax', self._pos)
+        for suffix in sorted(compressors):
+            fname = compress_copy(self._pos, self._tmp_dir, suffix)
+            for engine in sorted(dfl.position_engines):
+                self.assertSamePositions(plain, self.load(engine, fname))
+        with open(fname, 'rb') as fid:
+            self.assertSamePositions(plain, self.load('parallel', fid))
+
+    def test_dfl_selection(self):
+        fname = compress_copy(self._pos, self._tmp_dir, 'xz')
+        kwargs = dict(team_role = 'home', game_section = 'secondHalf',
+                frames = (100002, 100004))
+        plain = dfl.get_position_selection(self._pos, self._match,
+                self._teams, **kwargs)
+        self.assertSamePositions(plain, dfl.get_position_selection(fname,
+            self._match, self._teams, **kwargs))
+
+    def test_dfl_events(self):
+        events = path_to_tstfile('dfl', 'EventData/test.xml')
+        fname = compress_copy(events, self._tmp_dir, 'bz2')
+        self.assertTrue(dfl.get_event_table(fname).equals(
+            dfl.get_event_table(events)))
+        mep = dfl.MatchEventParser()
+        mep.run(fname)
+        self.assertEqual(len(mep.getEventInformation()[1]), 2)
+
+    def test_impire(self):
+        info = path_to_tstfile('impire', 'vistrack-matchfacts-123456.xml')
+        pos = path_to_tstfile('impire', '123456.pos')
+        plain = impire.run(info, pos)
+        for packed in (impire.run(compress_copy(info, self._tmp_dir, 'gz'),
+                compress_copy(pos, self._tmp_dir, 'xz')),
+                impire.run(info, io.BytesIO(gzip.compress(open(pos, 'rb').read())))):
+            self.assertEqual(plain[2]['stadium'], packed[2]['stadium'])
+            for a, b in zip(plain[0]['home']['1st'], packed[0]['home']['1st']):
+                np.testing.assert_array_equal(a[1], b[1])
+            np.testing.assert_array_equal(plain[1][1], packed[1][1])
+
+    def test_impire_chunks(self):
+        pos = path_to_tstfile('impire', '123456.pos')
+        small = impire.read_in_position_data(pos, chunk_size = 100)
+        large = impire.read_in_position_data(pos)
+        for a, b in zip(small, large):
+            self.assertEqual(a.shape[0], 7)
+            np.testing.assert_array_equal(a, b)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,7 +10,11 @@ versions of original files.
 @version 0.1
 """
 
+import io
 import os
+import re
+import shutil
+import tempfile
 import unittest
 import footballpy.fs.loader.dfl as dfl_parser
 from datetime import datetime
@@ -87,6 +91,110 @@ class TestMatchEvent(unittest.TestCase):
         self.assertEqual(play_time['firstHalf'][1],
                dup.parse('2015-05-16T15:30:40.640+02:00'))
 
+class TestEventTable(unittest.TestCase):
+    """Unit test class for the columnar event table.
+    """
+    events = """<PutDataRequest>
+    <Event EventTime="2015-05-16T15:31:00.000+02:00" EventId="12" InternalMatchId="DFL-MAT-1234AB" X-Position="10.5" Y-Position="-3.0">
+        <ShotAtGoal Team="DFL-ABC-12345A" Player="DFL-OBJ-a00001" TypeOfShot="head">
+            <SavedShot Player="DFL-OBJ-b00001"/>
+        </ShotAtGoal>
+    </Event>
+    <Event EventTime="2015-05-16T15:30:50.000+02:00" EventId="11" InternalMatchId="DFL-MAT-1234AB">
+        <Play Team="DFL-ABC-12345B" Player="DFL-OBJ-b00002" Recipient="DFL-OBJ-b00003"><Pass/></Play>
+    </Event>
+</PutDataRequest>
+"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._tmp_dir = tempfile.mkdtemp()
+        cls._fname = os.path.join(cls._tmp_dir, 'events.xml')
+        with open(cls._fname, 'w') as fid:
+            fid.write(cls.events)
+        cls._subs = path_to_tstfile('EventData', 'test.xml')
+        cls._table = dfl_parser.get_event_table([cls._subs, cls._fname])
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls._tmp_dir)
+
+    def test_rows(self):
+        table = TestEventTable._table
+        self.assertEqual(table.shape[0], 8)
+        self.assertEqual(list(table['type'][:6]), ['KickoffWhistle', 'FinalWhistle',
+            'KickoffWhistle', 'Substitution', 'Substitution', 'FinalWhistle'])
+        # sorted by time within each file
+        self.assertEqual(list(table['event_id'][6:]), [11, 12])
+        self.assertEqual(table['time'][0], dup.parse('2015-05-16T15:30:40.320+02:00'))
+        self.assertEqual(str(table['time'].dtype), 'datetime64[ns, tzoffset(None, 7200)]')
+
+    def test_players(self):
+        table = TestEventTable._table
+        subs = table[table['type'] == 'Substitution']
+        self.assertEqual(list(subs['player']), ['DFL-OBJ-a00006', 'DFL-OBJ-a00004'])
+        self.assertEqual(list(subs['player_2']), ['DFL-OBJ-a00002', 'DFL-OBJ-a00003'])
+        self.assertEqual(list(table['team'][6:]), ['DFL-ABC-12345B', 'DFL-ABC-12345A'])
+        self.assertEqual(table['subtype'][6], 'Pass')
+        self.assertEqual(table['subtype'][7], 'SavedShot')
+
+    def test_qualifiers(self):
+        table = TestEventTable._table
+        self.assertEqual(str(table['X-Position'].dtype), 'Sparse[float64, nan]')
+        self.assertEqual(table['X-Position'][7], 10.5)
+        self.assertTrue(np.isnan(table['X-Position'][6]))
+        self.assertEqual(table['SavedShot:Player'][7], 'DFL-OBJ-b00001')
+        self.assertEqual(list(table['PlayingPosition'].dropna()), ['RV', 'OLM'])
+        self.assertNotIn('Team', table.columns)
+
+    def test_processes(self):
+        table = dfl_parser.get_event_table([self._subs, self._fname], processes = 2)
+        self.assertTrue(table.equals(TestEventTable._table))
+
+class TestConvertTimeStamps(unittest.TestCase):
+    """Unit test class for the vectorized timestamp conversion.
+    """
+    def setUp(self):
+        self.stamps = ['2015-05-16T15:30:40.320+02:00',
+                '2015-05-16T15:30:40.360+02:00',
+                '2015-05-16T15:30:41.000+02:00']
+
+    def test_same_offset(self):
+        times = dfl_parser.convert_time_stamps(self.stamps)
+        self.assertEqual(str(times.dtype), 'datetime64[ns, tzoffset(None, 7200)]')
+        self.assertEqual(list(times), [dup.parse(t) for t in self.stamps])
+
+    def test_bytes(self):
+        times = dfl_parser.convert_time_stamps([t.encode() for t in self.stamps])
+        self.assertEqual(list(times), [dup.parse(t) for t in self.stamps])
+
+    def test_mixed_offsets(self):
+        stamps = self.stamps + ['2015-05-16T14:30:42.000+01:00']
+        times = dfl_parser.convert_time_stamps(stamps)
+        self.assertEqual(times.dtype.unit, 'ns')
+        self.assertEqual(list(times), [dup.parse(t) for t in stamps])
+        self.assertEqual(times[-1].hour, 15)
+
+    def test_missing_half(self):
+        self.assertEqual(str(dfl_parser.convert_time_stamps([]).dtype),
+                'datetime64[ns, UTC]')
+        with open(path_to_tstfile('ObservedPositionalData', 'test.xml'), 'rb') as fid:
+            data = fid.read()
+        # drop the ball of the 2nd half
+        data = re.sub(br'<FrameSet GameSection="secondHalf"[^>]*TeamId="BALL".*?</FrameSet>',
+                b'', data, flags = re.S | re.I)
+        mip = dfl_parser.MatchInformationParser()
+        mip.run(path_to_tstfile('MatchInformation', 'test.xml'))
+        teams, match = mip.getTeamInformation()
+        for engine in ['sax', 'scan']:
+            mpp = dfl_parser.position_engines[engine](match, teams)
+            mpp.run(io.BytesIO(data), trace = False)
+            timestamps = mpp.getPositionInformation()[2]
+            self.assertEqual(len(timestamps[1]), 0)
+            both = timestamps[0].append(timestamps[1])
+            self.assertEqual(len(both), 9)
+            self.assertEqual(both[0].hour, 15)
+
 class TestMatchPosition(unittest.TestCase):
     """Unit test class for the MatchPositionParser.
     """
@@ -125,6 +233,198 @@ class TestMatchPosition(unittest.TestCase):
         self.assertEqual(home_2nd[pid_2][1].shape,(4,3))
         self.assertTrue(np.all(home_2nd[pid_2][1][2,:2]==(100007.0,57.0)))
 
+class TestMatchPositionScanner(unittest.TestCase):
+    """Unit test class for the MatchPositionScanner.
+    """
+    @classmethod
+    def setUpClass(cls, fname=path_to_tstfile('ObservedPositionalData', 'test.xml')):
+        mip = dfl_parser.MatchInformationParser()
+        mip.run(path_to_tstfile('MatchInformation', 'test.xml'))
+        teams, match = mip.getTeamInformation()
+        results = []
+        for engine in ['sax', 'scan']:
+            mpp = dfl_parser.position_engines[engine](match, teams)
+            mpp.run(fname, trace = False)
+            results.append(mpp.getPositionInformation())
+        cls._sax, cls._scan = results
+
+    def test_position_data(self):
+        sax_pos, scan_pos = self._sax[0], self._scan[0]
+        for team in ['home', 'guest']:
+            for section in ['1st', '2nd']:
+                self.assertEqual(len(sax_pos[team][section]),
+                        len(scan_pos[team][section]))
+                for p_sax, p_scan in zip(sax_pos[team][section],
+                        scan_pos[team][section]):
+                    self.assertEqual(p_sax[0], p_scan[0])
+                    self.assertEqual(p_sax[2], p_scan[2])
+                    self.assertEqual(p_scan[1].dtype, np.float32)
+                    self.assertTrue(np.array_equal(p_sax[1], p_scan[1]))
+
+    def test_ball_data(self):
+        for half in [0, 1]:
+            self.assertEqual(self._scan[1][half].shape, (9,6))
+            self.assertTrue(np.array_equal(self._sax[1][half], self._scan[1][half]))
+            self.assertTrue(self._sax[2][half].equals(self._scan[2][half]))
+
+    def test_quote_styles(self):
+        with open(path_to_tstfile('ObservedPositionalData', 'test.xml'), 'rb') as fid:
+            data = fid.read()
+        # single quotes and line breaks between the attributes are valid xml
+        data = re.sub(br'\s(\w+)="([^"]*)"', br"\n\t\1 = '\2'", data)
+        mip = dfl_parser.MatchInformationParser()
+        mip.run(path_to_tstfile('MatchInformation', 'test.xml'))
+        teams, match = mip.getTeamInformation()
+        mpp = dfl_parser.position_engines['scan'](match, teams)
+        mpp.run(io.BytesIO(data), trace = False)
+        res = mpp.getPositionInformation()
+        for half in [0, 1]:
+            self.assertTrue(np.array_equal(self._sax[1][half], res[1][half]))
+            self.assertTrue(self._sax[2][half].equals(res[2][half]))
+
+    def test_missing_attribute(self):
+        body = b'<Frame N="1" X="0" Y="1"/><Frame N="2" X="0"/>'
+        with self.assertRaisesRegex(ValueError, 'sax engine'):
+            dfl_parser.frame_set_to_array(body, ['N', 'X', 'Y'])
+
+class TestMatchPositionParallelParser(unittest.TestCase):
+    """Unit test class for the MatchPositionParallelParser.
+    """
+    @classmethod
+    def setUpClass(cls, fname=path_to_tstfile('ObservedPositionalData', 'test.xml')):
+        mip = dfl_parser.MatchInformationParser()
+        mip.run(path_to_tstfile('MatchInformation', 'test.xml'))
+        teams, match = mip.getTeamInformation()
+        mpp = dfl_parser.MatchPositionParser(match, teams)
+        mpp.run(fname, trace = False)
+        cls._sax = mpp.getPositionInformation()
+        mpp = dfl_parser.MatchPositionParallelParser(match, teams, processes = 2)
+        mpp.run(fname, trace = False)
+        cls._parallel = mpp.getPositionInformation()
+        cls._fname = fname
+
+    def test_index(self):
+        index = dfl_parser.index_frame_sets(self._fname)
+        self.assertEqual(len(index), 17)
+        self.assertEqual(index[-1][2]['TeamId'], 'Ball')
+        self.assertEqual(index[-1][2]['GameSection'], 'secondHalf')
+        with open(self._fname, 'rb') as fid:
+            self.assertEqual(dfl_parser.index_frame_sets(io.BytesIO(fid.read())),
+                    index)
+
+    def test_same_result(self):
+        for team in ['home', 'guest']:
+            for section in ['1st', '2nd']:
+                for p_sax, p_par in zip(self._sax[0][team][section],
+                        self._parallel[0][team][section]):
+                    self.assertEqual(p_sax[0], p_par[0])
+                    self.assertTrue(np.array_equal(p_sax[1], p_par[1]))
+        for half in [0, 1]:
+            self.assertTrue(np.array_equal(self._sax[1][half], self._parallel[1][half]))
+            self.assertTrue(self._sax[2][half].equals(self._parallel[2][half]))
+
+    def test_split_range(self):
+        start, stop, attrs = dfl_parser.index_frame_sets(self._fname)[-1]
+        ranges = dfl_parser.split_frame_set_range(self._fname, start, stop, 300)
+        self.assertTrue(len(ranges) > 1)
+        parts = [dfl_parser.parse_frame_set_range((0, self._fname, a, b, True))
+                for a, b in ranges]
+        data = np.concatenate([part[0] for part in parts])
+        self.assertTrue(np.array_equal(data, self._sax[1][1]))
+
+class TestPositionSelection(unittest.TestCase):
+    """Unit test class for the selective loading of position data.
+    """
+    @classmethod
+    def setUpClass(cls, fname=path_to_tstfile('ObservedPositionalData', 'test.xml')):
+        mip = dfl_parser.MatchInformationParser()
+        mip.run(path_to_tstfile('MatchInformation', 'test.xml'))
+        cls._teams, cls._match = mip.getTeamInformation()
+        mpp = dfl_parser.MatchPositionParser(cls._match, cls._teams)
+        mpp.run(fname, trace = False)
+        cls._all = mpp.getPositionInformation()
+        cls._fname = fname
+
+    def select(self, **kwargs):
+        return dfl_parser.get_position_selection(self._fname, self._match,
+                self._teams, **kwargs)
+
+    def test_team_and_section(self):
+        pos_data, ball, timestamps = self.select(team_role = 'guest',
+                game_section = 'secondHalf', ball = False)
+        self.assertEqual(len(pos_data['guest']['2nd']), 4)
+        self.assertEqual(len(pos_data['guest']['1st']), 0)
+        self.assertEqual(len(pos_data['home']['2nd']), 0)
+        self.assertEqual(ball, [0, 0])
+
+    def test_person_ids(self):
+        pos_data, ball, timestamps = self.select(
+                person_ids = ['DFL-OBJ-a00004', 'DFL-OBJ-b00002'])
+        self.assertEqual([p[0] for p in pos_data['home']['2nd']], ['DFL-OBJ-a00004'])
+        self.assertEqual([p[0] for p in pos_data['guest']['1st']], ['DFL-OBJ-b00002'])
+        self.assertTrue(np.array_equal(ball[0], self._all[1][0]))
+
+    def test_frames(self):
+        pos_data, ball, timestamps = self.select(frames = (100002, 100005))
+        self.assertTrue(np.all(ball[1][:,0] == np.arange(100002, 100006)))
+        self.assertTrue(timestamps[1].equals(self._all[2][1][2:6]))
+        self.assertEqual(ball[0].shape, (0,6))
+        for selected, full in zip(pos_data['home']['2nd'], self._all[0]['home']['2nd']):
+            frames = full[1][:,0]
+            in_window = full[1][(frames >= 100002) & (frames <= 100005)]
+            self.assertTrue(np.array_equal(selected[1], in_window))
+
+class TestIterFrameSets(unittest.TestCase):
+    """Unit test class for the FrameSet generator.
+    """
+    @classmethod
+    def setUpClass(cls, fname=path_to_tstfile('ObservedPositionalData', 'test.xml')):
+        mip = dfl_parser.MatchInformationParser()
+        mip.run(path_to_tstfile('MatchInformation', 'test.xml'))
+        teams, match = mip.getTeamInformation()
+        mpp = dfl_parser.MatchPositionParser(match, teams)
+        mpp.run(fname, trace = False)
+        cls._all = mpp.getPositionInformation()
+        cls._frame_sets = list(dfl_parser.iter_frame_sets(fname, match, teams))
+
+    def test_number_of_frame_sets(self):
+        self.assertEqual(len(self._frame_sets), 17)
+        self.assertEqual(len([f for f in self._frame_sets if f[1] == 'ball']), 2)
+
+    def test_player_entry(self):
+        person_id, team_role, section, frames, position = self._frame_sets[0]
+        self.assertEqual((person_id, team_role, section, position),
+                ('DFL-OBJ-a00001', 'home', '1st', 'RV'))
+        self.assertTrue(np.array_equal(frames, self._all[0]['home']['1st'][0][1]))
+
+    def test_ball_entry(self):
+        person_id, team_role, section, frames, timestamps = self._frame_sets[-1]
+        self.assertEqual((team_role, section), ('ball', '2nd'))
+        self.assertTrue(np.array_equal(frames, self._all[1][1]))
+        self.assertTrue(timestamps.equals(self._all[2][1]))
+
+class TestMatchPositionBuffer(unittest.TestCase):
+    """Unit test class for the growing MatchPositionParser buffers.
+    """
+    def test_small_buffer(self):
+        mip = dfl_parser.MatchInformationParser()
+        mip.run(path_to_tstfile('MatchInformation', 'test.xml'))
+        teams, match = mip.getTeamInformation()
+        results = []
+        for no_frames in [1, 2**14]:
+            mpp = dfl_parser.MatchPositionParser(match, teams, no_frames)
+            mpp.run(path_to_tstfile('ObservedPositionalData', 'test.xml'), False)
+            results.append(mpp.getPositionInformation())
+        small, large = results
+        for a, b in zip(small[0]['guest']['2nd'], large[0]['guest']['2nd']):
+            self.assertEqual(a[1].shape, b[1].shape)
+            self.assertTrue(np.array_equal(a[1], b[1]))
+            # never views on a larger buffer
+            self.assertTrue(a[1].flags['OWNDATA'])
+            self.assertTrue(b[1].flags['OWNDATA'])
+        self.assertEqual(small[1][1].shape, (9,6))
+        self.assertTrue(np.array_equal(small[1][1], large[1][1]))
+
 class TestSanity(unittest.TestCase):
     """Unit test for more general checks.
     """
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+test_flood_array: unittests for the growing row buffers.
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+import unittest
+import numpy as np
+import footballpy.fs.loader.flood_array as fa
+
+
+class TestFloodColumns(unittest.TestCase):
+    """Unit tests for the FloodColumns class."""
+
+    def setUp(self):
+        self.buf = fa.FloodColumns([('frame', np.int32),
+            ('xy', np.float32, (3, 2))], max_rows = 4, expand_step = 1)
+
+    def test_push_and_extend(self):
+        self.buf.push(1, np.ones((3, 2)))
+        self.buf.extend(np.arange(2, 12), np.zeros((10, 3, 2)))
+        self.assertEqual(len(self.buf), 11)
+        frames = self.buf.column('frame')
+        self.assertEqual(frames.dtype, np.int32)
+        np.testing.assert_array_equal(frames, np.arange(1, 12))
+        xy = self.buf.data()['xy']
+        self.assertEqual(xy.dtype, np.float32)
+        self.assertEqual(xy.shape, (11, 3, 2))
+        self.assertEqual(xy.sum(), 6.0)
+        with self.assertRaises(ValueError):
+            self.buf.extend(np.arange(2), np.zeros((3, 3, 2)))
+        with self.assertRaises(ValueError):
+            self.buf.push(1)
+
+    def test_geometric_growth(self):
+        capacities = set()
+        for i in range(1000):
+            self.buf.push(i, 0.0)
+            capacities.add(self.buf.capacity)
+        self.assertEqual(sorted(capacities), [4 * 2**k for k in range(9)])
+
+    def test_views(self):
+        self.buf.extend(np.arange(3), np.zeros((3, 3, 2)))
+        frames = self.buf.column('frame')
+        with self.assertRaises(ValueError):
+            frames[0] = 5
+        self.buf.extend(np.arange(3, 100), np.zeros((97, 3, 2)))
+        self.buf.clear()
+        self.buf.push(7, 1.0)
+        np.testing.assert_array_equal(frames, np.arange(3))
+        self.assertEqual(list(self.buf.column('frame')), [7])
+
+    def test_update(self):
+        self.buf.extend(np.arange(6), np.zeros((6, 3, 2)))
+        self.buf.discard(2)
+        frames = self.buf.column('frame')
+        self.buf.update([0, 3], 'frame', -1)
+        np.testing.assert_array_equal(frames, (-1, 3, 4, -1))
+        with self.assertRaises(IndexError):
+            self.buf.update(4, 'frame', 0)
+
+    def test_discard(self):
+        for i in range(1000):
+            self.buf.push(i, float(i))
+            self.buf.discard(len(self.buf) - 10)
+        self.assertEqual(len(self.buf), 10)
+        self.assertLessEqual(self.buf.capacity, 32)
+        np.testing.assert_array_equal(self.buf.column('frame'), np.arange(990, 1000))
+        self.assertEqual(self.buf.column('xy')[0, 0, 0], 990.0)
+        self.buf.discard(20)
+        self.assertEqual(len(self.buf), 0)
+
+
+class TestFloodArray(unittest.TestCase):
+    """Unit tests for the single column FloodArray."""
+
+    def test_matrix(self):
+        arr = fa.FloodArray(2, 3, 1, dtype = np.float32)
+        arr.push((1.0, 2.0, 3.0))
+        arr.extend(np.ones((4, 3)))
+        self.assertEqual(arr.current_row, 5)
+        self.assertGreaterEqual(arr.max_rows, 5)
+        self.assertEqual(arr.data().dtype, np.float32)
+        np.testing.assert_array_equal(arr.data()[0], (1.0, 2.0, 3.0))
+        self.assertFalse(arr.data().flags.writeable)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -11,6 +11,8 @@ versions of original files.
 """
 
 import os
+import shutil
+import tempfile
 import unittest
 import numpy as np
 import footballpy.fs.loader.impire as impire_parser
@@ -98,11 +100,131 @@ class TestMatchPosition(unittest.TestCase):
         self.assertTrue(np.all(test_data[:,1] == 2.0))
         self.assertTrue(test_data[0,2] == -11.9269)
 
+    def test_referees(self):
+        """Referees are read in the same pass when requested."""
+        pos_file = TestMatchPosition.pos_file
+        self.assertIsNone(impire_parser.parse_position_file(pos_file)[5])
+        data = impire_parser.parse_position_file(pos_file, referees = True)
+        referee = data[5]
+        self.assertEqual(referee.shape, (7,3,3))
+        np.testing.assert_array_equal(referee[0], [[1,0.0117,-0.5970],
+            [2,0.4086,-1.0192], [3,-0.3592,1.0192]])
+        # block by block through the general tokenizer
+        lines = impire_parser.parse_position_file(pos_file, chunk_size = 1,
+                referees = True)
+        np.testing.assert_array_equal(lines[5], referee)
+        for a, b in zip(data[:4], impire_parser.read_in_position_data(pos_file)):
+            np.testing.assert_array_equal(a, b)
+        pos_data = impire_parser.run(TestMatchPosition.match_file, pos_file,
+                referees = True)[0]
+        self.assertEqual([r[0] for r in pos_data['referee']['2nd']],
+                ['referee_1', 'referee_2', 'referee_3'])
+        np.testing.assert_allclose(pos_data['referee']['2nd'][2][1][:,1:],
+                referee[4:,2,1:], rtol = 1e-6)
+        self.assertNotIn('referee', impire_parser.run(TestMatchPosition.match_file,
+            pos_file)[0])
+        df = impire_parser.get_df_from_files(TestMatchPosition.match_file,
+                pos_file, referees = True)[0]
+        self.assertEqual(list(df.columns[-7:-4]), ['referee_3_x', 'referee_3_y',
+            'half'])
+        self.assertNotIn('referee_1_x', impire_parser.get_df_from_files(
+            TestMatchPosition.match_file, pos_file)[0].columns)
+
+    def test_sort_grouping(self):
+        """Players are contiguous slices of one block in frame order."""
+        home = impire_parser.read_in_position_data(TestMatchPosition.pos_file)[0]
+        home_s = impire_parser.sort_position_data(home,0)
+        self.assertEqual([p[0,0] for p in home_s], sorted(np.unique(home[:,:,0])))
+        self.assertTrue(all(p.base is home_s[0].base for p in home_s))
+        self.assertEqual(sum(p.shape[0] for p in home_s), 7 * 11)
+        self.assertEqual(impire_parser.sort_position_data(home[:0],0), [])
+
+    def test_trikot_lookup(self):
+        """Unknown trikots are reported like missing dictionary keys."""
+        mip = impire_parser.MatchInformationParser()
+        mip.run(TestMatchPosition.match_file)
+        teams, match = mip.getTeamInformation()
+        pids, roles = impire_parser.trikot_lookup(teams['home'])
+        self.assertEqual(pids[24], '10005')
+        home = np.zeros((2, 1, 4))
+        home[:,:,1] = 99
+        with self.assertRaises(KeyError):
+            impire_parser.combine_position_with_role(
+                    impire_parser.sort_position_data(home), teams['home'],
+                    (pids, roles))
+        # load_match resolves the trikots of the compact data the same way
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            pos_file = os.path.join(tmp_dir, '123456.pos')
+            with open(TestMatchPosition.pos_file, 'rb') as fid:
+                data = fid.read()
+            with open(pos_file, 'wb') as fid:
+                fid.write(data.replace(b';#2,', b';#99,', 1))
+            with self.assertRaises(KeyError):
+                impire_parser.load_match(TestMatchPosition.match_file, pos_file)
+        finally:
+            shutil.rmtree(tmp_dir)
+
     def test_stadium_specs(self):
         """Tests whether the stadium specs load function works"""
         stadium = impire_parser.read_stadium_dimensions_from_pos(TestMatchPosition.pos_file)
         self.assertEqual(stadium, {'length':105.0, 'width':68.0})
 
+    def test_parse_position_file(self):
+        """Position data and stadium specs are read in one pass."""
+        data = impire_parser.parse_position_file(TestMatchPosition.pos_file)
+        self.assertEqual(data[4], {'length':105.0, 'width':68.0})
+        for a, b in zip(data, impire_parser.read_in_position_data(
+                TestMatchPosition.pos_file, chunk_size = 1)):
+            np.testing.assert_array_equal(a, b)
+        self.assertTrue(np.all(data[2][:,0] == [0,1,2,3,37042,37043,37044]))
+
+    def test_irregular_lines(self):
+        """Lines with missing players are converted line by line."""
+        with open(TestMatchPosition.pos_file, 'rb') as fid:
+            lines = fid.read().split(b'\n')
+        sections = lines[2].split(b'#')
+        # remove the first home player
+        sections[1] = sections[1].split(b';', 1)[1]
+        lines[2] = b'#'.join(sections)
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            fname = os.path.join(tmp_dir, '123456.pos')
+            with open(fname, 'wb') as fid:
+                fid.write(b'\n'.join(lines))
+            home, guest, ball, ht = impire_parser.read_in_position_data(fname)
+        finally:
+            shutil.rmtree(tmp_dir)
+        ref = impire_parser.read_in_position_data(TestMatchPosition.pos_file)
+        np.testing.assert_array_equal(home[2,:10], ref[0][2,1:])
+        self.assertTrue(np.all(home[2,10] == -10000.0))
+        np.testing.assert_array_equal(np.delete(home, 2, 0), np.delete(ref[0], 2, 0))
+        np.testing.assert_array_equal(ball, ref[2])
+
+    def test_processes(self):
+        """Byte ranges converted in a process pool give the same data."""
+        with open(TestMatchPosition.pos_file, 'rb') as fid:
+            lines = fid.read().splitlines(True)
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            fname = os.path.join(tmp_dir, '123456.pos')
+            with open(fname, 'wb') as fid:
+                fid.write(b''.join(lines[:1] + 2000 * lines[1:]))
+            size = os.path.getsize(fname)
+            ranges = impire_parser.split_line_ranges(fname, len(lines[0]),
+                    size, 5000)
+            self.assertTrue(len(ranges) > 100)
+            self.assertEqual(ranges[-1][1], size)
+            self.assertTrue(all(a[1] == b[0] for a, b in zip(ranges, ranges[1:])))
+            ref = impire_parser.parse_position_file(fname)
+            data = impire_parser.parse_position_file(fname, processes = 2)
+        finally:
+            shutil.rmtree(tmp_dir)
+        self.assertEqual(data[0].shape, (12001, 11, 3))
+        self.assertEqual(data[4], ref[4])
+        for a, b in zip(data[:4], ref[:4]):
+            np.testing.assert_array_equal(a, b)
+
     def test_pos_role_combination(self):
         """Tests whether the merging of position data and role works."""
         mip = impire_parser.MatchInformationParser()
@@ -123,6 +245,160 @@ class TestMatchPosition(unittest.TestCase):
         self.assertTrue(np.all(test_case[1][1,:] == (37043,-0.2715,0.1733)))
 
 
+class TestCompactPositions(unittest.TestCase):
+    """Unit test class for the compact position data."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pos_file = path_to_tstfile('123456.pos')
+        cls.data = impire_parser.read_compact_position_data(cls.pos_file)
+
+    def test_layout(self):
+        data = TestCompactPositions.data
+        self.assertEqual(len(data), 7)
+        self.assertEqual(data.halves, {1: (0, 4), 2: (4, 7)})
+        self.assertEqual(data.stadium, {'length':105.0, 'width':68.0})
+        self.assertEqual(data.xy['home'].dtype, np.float32)
+        self.assertEqual(data.xy['home'].shape, (7, len(data.trikots['home']), 2))
+        guest = impire_parser.read_in_position_data(self.pos_file)[1]
+        np.testing.assert_array_equal(data.trikots['guest'],
+                np.unique(guest[:,:,0]))
+        self.assertTrue(np.all(data.missing('home').sum(axis = 1) ==
+            data.xy['home'].shape[1] - 11))
+
+    def test_player_positions(self):
+        """Same players and positions as split, sort and combine."""
+        data = TestCompactPositions.data
+        home, guest, ball, ht = impire_parser.read_in_position_data(self.pos_file)
+        for half in (1, 2):
+            legacy = impire_parser.sort_position_data(
+                    impire_parser.split_positions_into_game_halves(guest, ht, ball)[half - 1])
+            compact = data.player_positions('guest', half)
+            self.assertEqual([int(p[0, 1]) for p in legacy], [c[0] for c in compact])
+            for p, c in zip(legacy, compact):
+                np.testing.assert_allclose(p[:, (0, 2, 3)], c[1], rtol = 1e-6)
+            np.testing.assert_allclose(data.ball_positions(half),
+                    ball[ht == half], rtol = 1e-6)
+
+    def test_concatenate(self):
+        """Blocks with different players are joined column by column."""
+        parts = impire_parser.read_compact_position_data(self.pos_file,
+                chunk_size = 1)
+        data = TestCompactPositions.data
+        self.assertEqual(parts.halves, data.halves)
+        for role in ('home', 'guest'):
+            np.testing.assert_array_equal(parts.trikots[role], data.trikots[role])
+            np.testing.assert_array_equal(parts.xy[role], data.xy[role])
+        np.testing.assert_array_equal(parts.frames, data.frames)
+        with self.assertRaises(ValueError):
+            impire_parser.half_time_ranges(np.array([1, 2, 1]))
+
+
+class TestNormalization(unittest.TestCase):
+    """Unit test class for normalize_positions."""
+
+    def setUp(self):
+        self.pos_data, self.ball, self.match, teams = impire_parser.run(
+                path_to_tstfile('vistrack-matchfacts-123456.xml'),
+                path_to_tstfile('123456.pos'))
+
+    def copies(self):
+        pos_data = {t: {h: [(p[0], p[1].copy(), p[2]) for p in half]
+            for h, half in team.items()} for t, team in self.pos_data.items()}
+        return pos_data, [b.copy() for b in self.ball]
+
+    def assertSameData(self, a, b):
+        for t in a[0]:
+            for h in a[0][t]:
+                self.assertEqual([p[0] for p in a[0][t][h]], [p[0] for p in b[0][t][h]])
+                for p, q in zip(a[0][t][h], b[0][t][h]):
+                    np.testing.assert_array_equal(p[1], q[1])
+        for p, q in zip(a[1], b[1]):
+            np.testing.assert_array_equal(p, q)
+
+    def test_same_as_two_stages(self):
+        pos_data, ball = self.copies()
+        ref = impire_parser.increase_frame_counter(*impire_parser.rescale_xy_positions(
+            pos_data, ball, **self.match['stadium']))
+        res = impire_parser.normalize_positions(self.pos_data, self.ball,
+                copy = True, **self.match['stadium'])
+        self.assertSameData(ref, res)
+        # the input is left untouched and the halves are new blocks
+        self.assertSameData((self.pos_data, self.ball), self.copies())
+        self.assertEqual(res[0]['home']['2nd'][0][1][0,0], 137042.0)
+        # in place, the contiguous blocks of load_match are updated at once
+        block = self.pos_data['guest']['1st'][0][1].base
+        self.assertIsNotNone(block)
+        res_inplace = impire_parser.normalize_positions(self.pos_data, self.ball,
+                **self.match['stadium'])
+        self.assertSameData(ref, res_inplace)
+        self.assertIs(res_inplace[0]['guest']['1st'][0][1].base, block)
+        self.assertIs(res_inplace[1][0], self.ball[0])
+
+
+class TestPositionFollower(unittest.TestCase):
+    """Unit test class for following a growing pos file."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.fname = os.path.join(self.tmp_dir, '123456.pos')
+        with open(path_to_tstfile('123456.pos'), 'rb') as fid:
+            self.lines = fid.read().splitlines(True)
+        self.ref = impire_parser.read_in_position_data(path_to_tstfile('123456.pos'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, data, mode = 'ab'):
+        with open(self.fname, mode) as fid:
+            fid.write(data)
+
+    def test_follow(self):
+        """Only complete lines are converted, in the order they arrive."""
+        follower = impire_parser.PositionFollower(self.fname, window = 0.12,
+                frame_rate = 25, no_frames = 2)
+        self.write(b'', 'wb')
+        self.assertEqual(follower.poll(), 0)
+        self.write(self.lines[0] + self.lines[1][:50])
+        self.assertEqual(follower.poll(), 1)
+        self.assertEqual(follower.stadium, {'length':105.0, 'width':68.0})
+        self.write(self.lines[1][50:] + b''.join(self.lines[2:5]))
+        self.assertEqual(follower.poll(), 4)
+        self.assertEqual(follower.poll(), 0)
+        self.write(b''.join(self.lines[5:]))
+        self.assertEqual(follower.poll(), 2)
+        for a, b in zip(follower.data(), self.ref):
+            np.testing.assert_array_equal(a, b)
+        latest = follower.latest()
+        self.assertEqual(latest[0].shape, (3, 11, 3))
+        for a, b in zip(latest, self.ref):
+            np.testing.assert_array_equal(a, b[-3:])
+        np.testing.assert_array_equal(follower.latest(0.04)[2], self.ref[2][-1:])
+
+    def test_truncated_file(self):
+        """A rewritten file is read again from the begin."""
+        follower = impire_parser.PositionFollower(self.fname)
+        self.write(b''.join(self.lines), 'wb')
+        self.assertEqual(follower.poll(), 7)
+        self.write(b''.join(self.lines[:2]), 'wb')
+        self.assertEqual(follower.poll(), 2)
+        self.assertEqual(follower.frames, 2)
+        self.assertFalse(follower.data()[0].flags.writeable)
+
+    def test_replaced_file(self):
+        """A file moved over the followed one is read again from the begin."""
+        follower = impire_parser.PositionFollower(self.fname)
+        self.write(b''.join(self.lines[:3]), 'wb')
+        self.assertEqual(follower.poll(), 3)
+        other = os.path.join(self.tmp_dir, 'other.pos')
+        with open(other, 'wb') as fid:
+            fid.write(b''.join(self.lines))
+        os.replace(other, self.fname)
+        self.assertEqual(follower.poll(), 7)
+        for a, b in zip(follower.data(), self.ref):
+            np.testing.assert_array_equal(a, b)
+
+
 if __name__ == '__main__':
     unittest.main()
     
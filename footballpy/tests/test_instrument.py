@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+test_instrument: unittests for the loader instrumentation.
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+import io
+import os
+import unittest
+import contextlib
+import footballpy.fs.instrument as instrument
+import footballpy.fs.loader.dfl as dfl
+import footballpy.fs.loader.impire as impire
+
+
+def path_to_tstfile(folder, fname):
+    """Full path to a file in the testfiles folder."""
+    return os.path.abspath(os.path.join(__file__, '../../testfiles/', folder, fname))
+
+
+class TestInstrument(unittest.TestCase):
+    """Unit test class for stages, progress reports and recorders."""
+
+    def test_disabled(self):
+        self.assertFalse(instrument.enabled())
+        self.assertIs(instrument.stage('a'), instrument._null_stage)
+        instrument.progress(10, 10)
+
+    def test_nested_stages(self):
+        events = []
+        with instrument.Recorder(on_progress = events.append) as rec:
+            with instrument.stage('outer', 100):
+                instrument.progress(1, 10, 'x')
+                with instrument.stage('inner'):
+                    instrument.progress(2, 20)
+        self.assertFalse(instrument.enabled())
+        self.assertEqual([r.name for r in rec.stages], ['inner', 'outer'])
+        self.assertEqual([r.depth for r in rec.stages], [1, 0])
+        self.assertEqual((rec.stages[1].frames, rec.stages[1].bytes), (3, 30))
+        self.assertEqual(events[0][:5], ('outer', 'x', 1, 10, 100))
+        self.assertEqual(events[1][:4], ('inner', None, 2, 20))
+        self.assertGreaterEqual(rec.stages[1].peak_rss_mb, 0.0)
+
+    def test_dfl_engines(self):
+        info = path_to_tstfile('dfl', 'MatchInformation/test.xml')
+        pos = path_to_tstfile('dfl', 'ObservedPositionalData/test.xml')
+        for engine in sorted(dfl.position_engines):
+            with instrument.Recorder() as rec:
+                pos_data, ball, _, _, _ = dfl.run(info, pos, trace = False,
+                        engine = engine)
+            stages = dict((r.name, r) for r in rec.stages)
+            no_frames = sum(p[1].shape[0] for team in pos_data.values()
+                    for half in team.values() for p in half)
+            no_frames += sum(b.shape[0] for b in ball)
+            self.assertEqual(stages['position data'].frames, no_frames)
+            self.assertGreater(stages['position data'].bytes, 0)
+            self.assertLessEqual(stages['position data'].bytes, os.path.getsize(pos))
+            self.assertIn('match information', stages)
+            self.assertEqual(rec.stages[-1].name, 'dfl match')
+
+    def test_trace(self):
+        info = path_to_tstfile('dfl', 'MatchInformation/test.xml')
+        pos = path_to_tstfile('dfl', 'ObservedPositionalData/test.xml')
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            dfl.run(info, pos, trace = False, engine = 'scan')
+        self.assertEqual(out.getvalue(), '')
+        with contextlib.redirect_stdout(out):
+            dfl.run(info, pos, trace = True, engine = 'scan')
+        self.assertIn('Processed', out.getvalue())
+        # a single tracer for the nested stages
+        self.assertEqual(out.getvalue().count('Start parsing position data'), 1)
+
+    def test_impire(self):
+        info = path_to_tstfile('impire', 'vistrack-matchfacts-123456.xml')
+        pos = path_to_tstfile('impire', '123456.pos')
+        with instrument.Recorder() as rec:
+            impire.run(info, pos)
+        stages = dict((r.name, r) for r in rec.stages)
+        self.assertEqual(stages['position data'].frames, 7)
+        self.assertEqual(stages['position data'].bytes, os.path.getsize(pos))
+
+
+if __name__ == '__main__':
+    unittest.main()
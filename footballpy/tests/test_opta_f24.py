@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+test_opta_f24: unittests for the Opta F24 loader.
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import footballpy.fs.loader.opta_f24 as f24
+
+
+def path_to_tstfile(fname):
+    """Full path to a file in the opta testfiles folder."""
+    return os.path.abspath(os.path.join(__file__, '../../testfiles/opta', fname))
+
+
+class TestEventTable(unittest.TestCase):
+    """Unit tests for read_event_table and the EventTable."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.fname = path_to_tstfile('f24-22-2016-123456-eventdetails.xml')
+        cls.table = f24.read_event_table(cls.fname)
+
+    def test_columns(self):
+        events = self.table.events
+        self.assertEqual(len(self.table), 12)
+        self.assertEqual(self.table.game['id'], '123456')
+        self.assertEqual(list(events['type_id'][:4]), [34, 32, 1, 1])
+        self.assertEqual(events['type_id'].dtype, np.int16)
+        self.assertEqual(list(events['team'].cat.categories), ['100', '101'])
+        self.assertTrue(events['player'].isna()[0])
+        self.assertEqual(events['player'][2], '5001')
+        self.assertEqual((events['minute'][8], events['second'][8]), (31, 45))
+        self.assertEqual(events['x'][3], 61.6)
+        self.assertEqual(len(self.table.qualifiers), 25)
+
+    def test_qualifiers(self):
+        crosses = self.table.of_type(1) & self.table.has_qualifier(2)
+        self.assertEqual(list(np.nonzero(crosses)[0]), [3, 5])
+        rows, values = self.table.qualifier(140)
+        self.assertEqual(list(rows), [2, 3, 5])
+        self.assertEqual(list(values), ['38.4', '94.0', '88.1'])
+        self.assertEqual(list(self.table.qualifier(6)[1]), [None])
+        values = self.table.qualifier_values(127)
+        self.assertEqual(values[1], 'Right to Left')
+        self.assertIsNone(values[0])
+        self.assertEqual(len(self.table.qualifier(999)[0]), 0)
+
+    def test_records(self):
+        root = f24.read_f24(self.fname)
+        parsers = {'pass': f24.parse_pass, 'miss': f24.parse_miss,
+                'post': f24.parse_post, 'attempt': f24.parse_attempt,
+                'goal': f24.parse_goal}
+        for name, parse in parsers.items():
+            expected = [parse(ev) for ev in
+                    f24.get_events(root, f24.event_specs[name][0])]
+            self.assertTrue(expected)
+            self.assertEqual(self.table.records(name), expected)
+
+    def test_element_qualifiers(self):
+        ev = f24.get_events(f24.read_f24(self.fname), 1)[1]
+        self.assertTrue(f24.check_q_element_present(ev, 2))
+        self.assertFalse(f24.check_q_element_present(ev, 5))
+        self.assertEqual(f24.get_q_value(ev, 141), '8.2')
+        with self.assertRaises(IndexError):
+            f24.get_q_value(ev, 5)
+
+
+class TestEventStore(unittest.TestCase):
+    """Unit tests for ingest_f24_files and the EventStore."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.fname = path_to_tstfile('f24-22-2016-123456-eventdetails.xml')
+        # a second match with another Game id
+        with open(self.fname) as fid:
+            data = fid.read().replace('Game id="123456"', 'Game id="654321"')
+        self.source_dir = os.path.join(self.tmp_dir, 'season')
+        os.makedirs(self.source_dir)
+        shutil.copy(self.fname, self.source_dir)
+        with open(os.path.join(self.source_dir,
+                'f24-22-2016-654321-eventdetails.xml'), 'w') as fid:
+            fid.write(data)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_store(self):
+        target = os.path.join(self.tmp_dir, 'store')
+        f24.ingest_f24_files(self.source_dir, target)
+        store = f24.EventStore(target)
+        self.assertEqual(len(store), 24)
+        self.assertEqual(store.events['type_id'].dtype, np.int8)
+        self.assertEqual(list(store.games['id']), ['123456', '654321'])
+        rows = store.select(type_id = 1, team = '101', qualifier = 2)
+        self.assertEqual(list(rows), [3, 15])
+        self.assertEqual(len(store.select(type_id = 1, qualifier = [2, 6])), 2)
+        self.assertEqual(list(store.select(game = 654321, type_id = 16)), [20, 22])
+        self.assertEqual(len(store.select(team = 'unknown')), 0)
+        frame = store.frame(rows)
+        self.assertEqual(list(frame['game']), ['123456', '654321'])
+        self.assertEqual(list(frame['player']), ['6002', '6002'])
+        self.assertEqual(str(frame['timestamp'][0]), '2016-08-26 20:30:38.002000')
+        values = store.qualifier_values(140, store.select(type_id = 1))
+        self.assertEqual(list(values[:3]), ['38.4', '94.0', '88.1'])
+        self.assertIsNone(store.qualifier_values(6)[0])
+        table = f24.read_event_table(self.fname)
+        np.testing.assert_array_equal(store.frame()['x'][:12],
+                table.events['x'].astype(np.float32))
+
+    def test_processes(self):
+        stores = [f24.ingest_f24_files(self.source_dir,
+            os.path.join(self.tmp_dir, str(p)), p) for p in (1, 2)]
+        for table in ('events', 'qualifiers'):
+            for name, values in getattr(stores[0], table).items():
+                np.testing.assert_array_equal(values,
+                        getattr(stores[1], table)[name])
+
+
+class TestEventFollower(unittest.TestCase):
+    """Unit tests for the EventFollower class."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.source = path_to_tstfile('f24-22-2016-123456-eventdetails.xml')
+        with open(self.source, 'rb') as fid:
+            data = fid.read()
+        self.events = [m.group(0) for m in re.finditer(
+            rb'    <Event\b[^>]*?(?:/>|>.*?</Event>)\n', data, re.DOTALL)]
+        self.head = data[:data.index(self.events[0])]
+        self.tail = data[data.index(self.events[-1]) + len(self.events[-1]):]
+        self.fname = os.path.join(self.tmp_dir, 'f24.xml')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def deliver(self, events):
+        with open(self.fname, 'wb') as fid:
+            fid.write(self.head + b''.join(events) + self.tail)
+
+    def test_refresh(self):
+        follower = f24.EventFollower(self.fname, no_events = 2)
+        self.deliver(self.events[:4])
+        new, changed = follower.refresh()
+        self.assertEqual((list(new), list(changed)), ([0, 1, 2, 3], []))
+        new, changed = follower.refresh()
+        self.assertEqual((len(new), len(changed)), (0, 0))
+        self.deliver(self.events)
+        self.assertEqual(list(follower.refresh()[0]), list(range(4, 12)))
+        expected = f24.read_event_table(self.source)
+        table = follower.table()
+        self.assertEqual(follower.game, expected.game)
+        self.assertTrue(table.events.equals(expected.events))
+        self.assertTrue(table.qualifiers.equals(expected.qualifiers))
+        # a correction of the fourth event drops its cross qualifier
+        events = list(self.events)
+        events[3] = events[3].replace(b'version="1472236241000"',
+                b'version="1472236299000"').replace(
+                        b'      <Q id="2000008" qualifier_id="2"/>\n', b'')
+        self.deliver(events)
+        new, changed = follower.refresh()
+        self.assertEqual((list(new), list(changed)), ([], [3]))
+        table = follower.table()
+        self.assertEqual(len(table), 12)
+        self.assertEqual(table.events['version'][3], 1472236299000)
+        self.assertEqual(list(np.nonzero(table.has_qualifier(2))[0]), [5])
+        self.assertEqual(list(table.qualifier(140)[0]), [2, 3, 5])
+        self.assertEqual(len(table.qualifiers), 24)
+
+    def test_partial_delivery(self):
+        """An event cut off at the file end is read once it is complete."""
+        follower = f24.EventFollower(self.fname)
+        # cut within the qualifiers, after the complete start tag
+        partial = self.events[5][:self.events[5].index(b'<Q') + 10]
+        with open(self.fname, 'wb') as fid:
+            fid.write(self.head + b''.join(self.events[:5]) + partial)
+        self.assertEqual(list(follower.refresh()[0]), [0, 1, 2, 3, 4])
+        self.assertEqual(follower.refresh()[0].size, 0)
+        self.deliver(self.events)
+        self.assertEqual(list(follower.refresh()[0]), list(range(5, 12)))
+        expected = f24.read_event_table(self.source)
+        self.assertTrue(follower.table().events.equals(expected.events))
+
+
+if __name__ == '__main__':
+    unittest.main()
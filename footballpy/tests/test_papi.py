@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+test_papi: unittests for the position data frames.
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+import os
+import unittest
+import numpy as np
+import pandas as pd
+import footballpy.fs.loader.dfl as dfl
+import footballpy.fs.loader.papi as papi
+
+
+def path_to_tstfile(folder, fname):
+    """Full path to a file in the testfiles folder."""
+    return os.path.abspath(os.path.join(__file__, '../../testfiles/', folder, fname))
+
+
+def player(pid, first, last, offset):
+    """Position data of a player present from frame first to last."""
+    frames = np.arange(first, last + 1, dtype = np.float32)
+    return (pid, np.column_stack([frames, frames - first + offset,
+        -(frames - first + offset)]).astype(np.float32))
+
+
+def ball(first, last):
+    """Ball data from frame first to last, possession 1 and 2 alternating."""
+    frames = np.arange(first, last + 1, dtype = np.float32)
+    poss = 1 + frames % 2
+    return np.column_stack([frames, frames - first, frames - first + 0.5,
+        np.zeros_like(frames), poss, np.ones_like(frames)]).astype(np.float32)
+
+
+class TestPosDataToDf(unittest.TestCase):
+    """Unit tests for pos_data_to_df."""
+
+    def setUp(self):
+        self.pos_data = {
+            'home': {'1st': [player('a1', 10000, 10003, 0), player('a2', 10000, 10003, 10)],
+                '2nd': [player('a1', 100000, 100001, 20), player('a3', 100001, 100002, 30)]},
+            'guest': {'1st': [player('b1', 10001, 10003, 40)],
+                '2nd': [player('b1', 100000, 100002, 50)]}}
+        self.ball_data = [ball(10000, 10003), ball(100000, 100002)]
+
+    def test_layout(self):
+        df = papi.pos_data_to_df(self.pos_data, self.ball_data)
+        self.assertEqual(list(df.index), [10000, 10001, 10002, 10003,
+            100000, 100001, 100002])
+        self.assertEqual(list(df.columns), ['a1_x', 'a1_y', 'a2_x', 'a2_y',
+            'a3_x', 'a3_y', 'b1_x', 'b1_y', 'half', 'ball_x', 'ball_y',
+            'possession', 'game_state'])
+        self.assertEqual(df['a1_x'].dtype, np.float32)
+        self.assertEqual(list(df['half']), [1, 1, 1, 1, 2, 2, 2])
+        self.assertEqual(list(df['possession']), [1, 2, 1, 2, 1, 2, 1])
+        np.testing.assert_array_equal(df['a1_x'], [0, 1, 2, 3, 20, 21, np.nan])
+        np.testing.assert_array_equal(df['a3_y'], [np.nan] * 5 + [-30, -31])
+        np.testing.assert_array_equal(df['b1_x'], [np.nan, 40, 41, 42, 50, 51, 52])
+        np.testing.assert_array_equal(df['ball_y'], [0.5, 1.5, 2.5, 3.5, 0.5, 1.5, 2.5])
+
+    def test_players_only(self):
+        df = papi.collect_pos_data_into_dataframe(self.pos_data, dtype = np.float64)
+        self.assertEqual(list(df.columns)[-1], 'half')
+        self.assertEqual(df['b1_y'].dtype, np.float64)
+        full = papi.pos_data_to_df(self.pos_data, self.ball_data)
+        pd.testing.assert_frame_equal(df, full[df.columns].astype(
+            {c: np.float64 for c in df.columns[:-1]}))
+        ball_df = papi.collect_ball_data_into_dataframe(self.ball_data)
+        pd.testing.assert_frame_equal(ball_df, full[ball_df.columns])
+
+    def test_dfl(self):
+        info = path_to_tstfile('dfl', 'MatchInformation/test.xml')
+        pos = path_to_tstfile('dfl', 'ObservedPositionalData/test.xml')
+        df = dfl.get_df_from_files(info, pos, trace = False)[0]
+        self.assertEqual(df.shape, (18, 22))
+        # two frame sets of a player within one half share his columns
+        self.assertEqual(list(df.columns).count('DFL-OBJ-a00002_x'), 1)
+        np.testing.assert_array_equal(df['DFL-OBJ-a00002_x'].iloc[9:],
+                np.arange(40, 49))
+        self.assertTrue(df['DFL-OBJ-a00004_x'].iloc[:14].isna().all())
+
+
+if __name__ == '__main__':
+    unittest.main()
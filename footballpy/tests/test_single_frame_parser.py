@@ -8,6 +8,8 @@ test_formation_quantifier: unittests for the formation_quantifier functions
 """
 
 import os
+import shutil
+import tempfile
 import unittest
 import footballpy.fs.loader.single_frame_parser as sp
 import numpy as np
@@ -61,3 +63,149 @@ class TestGetDataFiles(unittest.TestCase):
         (res_files, res_frames) = sp.get_data_files(test_folder)
         self.assertEqual(len(res_files), 2)
 
+
+test_folder = os.path.abspath(os.path.join(__file__, '../../testfiles/single/'))
+game_stats_file = os.path.join(test_folder, 'GameStats_g123456.xml')
+
+
+class TestPositionFileParser(unittest.TestCase):
+    """Unit tests for the PositionFileParser class.
+    """
+
+    def test_frames(self):
+        pfp = sp.PositionFileParser()
+        pfp.run(os.path.join(test_folder,
+            'PutPositionalDataRequest1000117_1000141.xml'))
+        res = pfp.getPositionInformation()
+        self.assertEqual(len(res), 25)
+        self.assertEqual(res[0]['p10001'], (10371, -26.85, 2.02))
+        self.assertEqual(res[-1]['ball'][0], 10395)
+
+
+class TestLoadFolder(unittest.TestCase):
+    """Unit tests for the load_folder function.
+    """
+
+    def test_team_columns(self):
+        pos_data, ball, frames, teams, match = sp.load_folder(test_folder,
+                game_stats_file)
+        np.testing.assert_array_equal(frames, np.arange(10371, 10421))
+        self.assertEqual(pos_data['home'].shape, (50, 12, 2))
+        self.assertEqual(pos_data['guest'].shape, (50, 11, 2))
+        self.assertEqual(ball.shape, (50, 5))
+        self.assertTrue(pos_data['home'].flags.c_contiguous)
+        self.assertEqual(teams['guest'][0]['id'], '10012')
+        self.assertEqual(match['home'], '501')
+        np.testing.assert_allclose(pos_data['home'][0, 0], (-26.85, 2.02))
+        np.testing.assert_allclose(pos_data['guest'][0, 0], (27.92, 2.82))
+        # the substitute in the home lineup never appears
+        self.assertTrue(np.all(np.isnan(pos_data['home'][:, 11])))
+        self.assertFalse(np.any(np.isnan(pos_data['guest'])))
+        np.testing.assert_allclose(ball[0], (-2.75, 26.22, 1.0, 2.0, 0.0))
+
+    def test_processes(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            # the later frames first and one file twice
+            for name, target in (('1000142_1000166', '1'),
+                    ('1000117_1000141', '2'), ('1000142_1000166', '3')):
+                shutil.copy(os.path.join(test_folder,
+                    'PutPositionalDataRequest%s.xml' % name),
+                    os.path.join(tmp_dir, 'PutPositionalDataRequest%s.xml' % target))
+            expected = sp.load_folder(test_folder, game_stats_file)
+            for processes in (1, 2):
+                res = sp.load_folder(tmp_dir, game_stats_file, processes)
+                np.testing.assert_array_equal(res[2], expected[2])
+                np.testing.assert_array_equal(res[1], expected[1])
+                for role in ('home', 'guest'):
+                    np.testing.assert_array_equal(res[0][role], expected[0][role])
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_malformed_entries(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            fname = os.path.join(tmp_dir, 'PutPositionalDataRequest1.xml')
+            with open(os.path.join(test_folder,
+                    'PutPositionalDataRequest1000117_1000141.xml')) as fid:
+                data = fid.read()
+            with open(fname, 'w') as fid:
+                fid.write(data.replace('p10001,-26.85,2.02,7.76;',
+                    'p10001,-26.85,2.02;', 1))
+            with self.assertRaises(ValueError):
+                sp.read_position_request(fname, {}, 1)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+
+class TestFolderWatcher(unittest.TestCase):
+    """Unit tests for the FolderWatcher class.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.watcher = sp.FolderWatcher(self.tmp_dir, game_stats_file,
+                window = 1.2)
+        self.arrived = []
+        self.watcher.subscribe(lambda w, fname, frames:
+                self.arrived.append((os.path.basename(fname), frames[0])))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def deliver(self, name, length = None):
+        with open(os.path.join(test_folder, name)) as fid:
+            data = fid.read()
+        with open(os.path.join(self.tmp_dir, name), 'w') as fid:
+            fid.write(data[:length])
+
+    def test_rolling_window(self):
+        later = 'PutPositionalDataRequest1000142_1000166.xml'
+        self.assertEqual(self.watcher.poll(), 0)
+        # a partially written file is read once it is complete
+        self.deliver(later, 5000)
+        self.assertEqual(self.watcher.poll(), 0)
+        self.deliver(later)
+        self.assertEqual(self.watcher.poll(), 1)
+        self.assertEqual(self.watcher.poll(), 0)
+        self.assertEqual(self.arrived, [(later, 10396)])
+        # a late file is merged, only the last 30 frames are kept
+        self.deliver('PutPositionalDataRequest1000117_1000141.xml')
+        self.assertEqual(self.watcher.poll(), 1)
+        pos_data, ball, frames = self.watcher.data()
+        np.testing.assert_array_equal(frames, np.arange(10391, 10421))
+        expected = sp.load_folder(test_folder, game_stats_file)
+        np.testing.assert_array_equal(pos_data['home'], expected[0]['home'][-30:])
+        np.testing.assert_array_equal(ball, expected[1][-30:])
+
+    def test_broken_file(self):
+        """A complete but malformed file is skipped, not retried."""
+        name = 'PutPositionalDataRequest1000117_1000141.xml'
+        with open(os.path.join(test_folder, name)) as fid:
+            data = fid.read()
+        with open(os.path.join(self.tmp_dir, name), 'w') as fid:
+            fid.write(data.replace('p10001,-26.85,2.02,7.76;',
+                'p10001,-26.85,2.02;', 1))
+        with self.assertWarns(RuntimeWarning):
+            self.assertEqual(self.watcher.poll(), 0)
+        self.assertEqual(list(self.watcher.errors), [name])
+        self.assertEqual(self.watcher.pending, [])
+        self.assertEqual(self.watcher.poll(), 0)
+        self.assertEqual(self.arrived, [])
+
+    def test_watch(self):
+        import asyncio
+
+        async def deliver_and_stop(stop):
+            await asyncio.sleep(0.02)
+            self.deliver('PutPositionalDataRequest1000117_1000141.xml')
+            while not self.arrived:
+                await asyncio.sleep(0.01)
+            stop.set()
+
+        async def main():
+            stop = asyncio.Event()
+            await asyncio.gather(self.watcher.watch(0.01, stop),
+                    asyncio.wait_for(deliver_and_stop(stop), 5.0))
+        asyncio.run(main())
+        self.assertEqual(len(self.watcher.data()[2]), 25)
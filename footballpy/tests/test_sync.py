@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+test_sync: unittests for synchronising events with position data.
+
+@author: rein
+@license: MIT
+@version 0.1
+"""
+
+import os
+import datetime as dt
+import unittest
+import numpy as np
+import pandas as pd
+import footballpy.processing.sync as sync
+import footballpy.fs.loader.opta_f24 as f24
+
+
+def path_to_tstfile(fname):
+    """Full path to a file in the opta testfiles folder."""
+    return os.path.abspath(os.path.join(__file__, '../../testfiles/opta', fname))
+
+
+class TestNearestRows(unittest.TestCase):
+    """Unit tests for nearest_rows and sync_by_time."""
+
+    def test_nearest(self):
+        frames = np.array([0, 10, 20, 30])
+        rows = sync.nearest_rows([-3, 0, 4, 5, 6, 29, 40], frames)
+        np.testing.assert_array_equal(rows, [0, 0, 0, 0, 1, 3, 3])
+        rows = sync.nearest_rows([-3, 4, 6, 40], frames, tolerance = 3)
+        np.testing.assert_array_equal(rows, [0, -1, -1, -1])
+        np.testing.assert_array_equal(sync.nearest_rows([1, 5], [4]), [0, 0])
+        np.testing.assert_array_equal(sync.nearest_rows([1, 5], []), [-1, -1])
+
+    def test_time(self):
+        kickoff = pd.Timestamp('2016-08-26 20:30', tz = 'Europe/Berlin')
+        first = pd.date_range(kickoff, periods = 100, freq = '40ms')
+        second = pd.date_range(kickoff + pd.Timedelta(minutes = 60),
+                periods = 100, freq = '40ms')
+        frame_times = first.append(second)
+        events = [kickoff + pd.Timedelta(milliseconds = 81),
+                (kickoff + pd.Timedelta(minutes = 60, seconds = 1)).tz_convert('UTC'),
+                kickoff + pd.Timedelta(minutes = 30)]
+        rows = sync.sync_by_time(events, frame_times)
+        np.testing.assert_array_equal(rows, [2, 125, 99])
+        rows = sync.sync_by_time(events, frame_times, tolerance = 0.04)
+        np.testing.assert_array_equal(rows, [2, 125, -1])
+        naive = pd.Series(frame_times.tz_convert('UTC').tz_localize(None))
+        rows = sync.sync_by_time(naive.astype(str), naive, tolerance = 0.04)
+        np.testing.assert_array_equal(rows, np.arange(200))
+        stamps = np.array(['2016-08-26T20:30:01', 'NaT'], 'datetime64[ms]')
+        np.testing.assert_array_equal(sync.as_nanoseconds(stamps),
+                [stamps[0].astype('datetime64[ns]').view(np.int64),
+                    np.iinfo(np.int64).min])
+
+
+class TestGameClock(unittest.TestCase):
+    """Unit tests for sync_by_clock and sync_by_kickoff."""
+
+    def test_clock(self):
+        frames = sync.sync_by_clock([1, 1, 2, 2, 16], [0, 61, 45*60, 50*60 + 0.5, 0],
+                {1: 10000, 2: 100000})
+        np.testing.assert_array_equal(frames, [10000, 11525, 100000,
+            100000 + 7512, -1])
+        frames = sync.sync_by_clock([3], [95*60], {1: 0, 3: 500}, frame_rate = 10)
+        np.testing.assert_array_equal(frames, [3500])
+
+    def test_kickoff(self):
+        kickoffs = {1: dt.datetime(2016, 8, 26, 20, 30, 5),
+                2: dt.datetime(2016, 8, 26, 21, 32, 10)}
+        times = [dt.datetime(2016, 8, 26, 20, 31, 5, 20000),
+                dt.datetime(2016, 8, 26, 21, 33, 10), dt.datetime(2016, 8, 26, 22)]
+        frames = sync.sync_by_kickoff(times, ['1', '2', '3'], kickoffs,
+                {1: 1, 2: 70000})
+        np.testing.assert_array_equal(frames, [1 + 1500, 71500, -1])
+
+
+class TestOpta(unittest.TestCase):
+    """Unit tests for the Opta coordinates and events."""
+
+    def test_pitch(self):
+        x, y = sync.opta_to_pitch([0, 50, 100, 75], [0, 50, 100, 25], 105, 68,
+                [False, False, False, True])
+        np.testing.assert_allclose(x, [-52.5, 0, 52.5, -26.25])
+        np.testing.assert_allclose(y, [-34, 0, 34, 17])
+
+    def test_events(self):
+        table = f24.read_event_table(path_to_tstfile(
+            'f24-22-2016-123456-eventdetails.xml'))
+        frames = np.concatenate([np.arange(10000, 10000 + 46*60*25),
+            np.arange(100000, 100000 + 48*60*25)])
+        res = sync.sync_opta_events(table.events, frames, {1: 10000, 2: 100000},
+                {'length': 100.0, 'width': 60.0}, attacks_left = [('101', 1),
+                    ('100', 2)])
+        self.assertEqual(list(res.columns), ['frame', 'row', 'x', 'y'])
+        self.assertEqual(list(res['frame'][:4]), [-1, 10000, 10025, 10100])
+        self.assertEqual(list(res['row'][:4]), [-1, 0, 25, 100])
+        self.assertEqual(res['frame'][9], 100000 + (13*60 + 11) * 25)
+        self.assertEqual(res['row'][9], 46*60*25 + (13*60 + 11) * 25)
+        self.assertEqual(res['row'][11], -1)
+        np.testing.assert_allclose(res['x'][2:4], [0.1, -11.6])
+        np.testing.assert_allclose(res['y'][2:4], [0.18, -3.06])
+        np.testing.assert_allclose(res['x'][9], 34.0)
+
+
+if __name__ == '__main__':
+    unittest.main()